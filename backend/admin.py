@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from backend.models import EquipmentType, Equipment
+from backend.models import EquipmentType, Equipment, EquipmentImportJob, EquipmentArchive
 
 
 class EquipmentTypeAdmin(admin.ModelAdmin):
@@ -49,3 +49,47 @@ class EquipmentAdmin(admin.ModelAdmin):
 admin.site.register(Equipment, EquipmentAdmin)
 
 
+class EquipmentArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'equipment_type', 'serial_number', 'description',
+                    'created_at', 'updated_at', 'archived_at', 'created_by', 'updated_by', )
+    list_display_links = ('id', )
+    search_fields = ('id', 'serial_number', 'description', )
+    fields = ('id', 'equipment_type', 'serial_number', 'description',
+              'created_at', 'updated_at', 'archived_at', 'created_by', 'updated_by', )
+    list_filter = ('equipment_type', 'archived_at', )
+    readonly_fields = ('id', 'created_at', 'updated_at', 'archived_at', 'created_by', 'updated_by', )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(EquipmentArchive, EquipmentArchiveAdmin)
+
+
+class EquipmentImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'count', 'saved', 'failed', 'created_at', 'started_at', 'finished_at',
+                    'created_by', )
+    list_display_links = ('id', )
+    search_fields = ('id', 'status', )
+    fields = ('id', 'status', 'content_type', 'count', 'saved', 'failed', 'error',
+              'created_at', 'started_at', 'finished_at', 'created_by', )
+    list_filter = ('status', 'created_at', 'created_by', )
+    readonly_fields = ('id', 'created_at', 'started_at', 'finished_at', 'created_by', )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(EquipmentImportJob, EquipmentImportJobAdmin)
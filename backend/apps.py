@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class BackendConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend'
     verbose_name = 'Equipment'
+
+    def ready(self):
+        # Сброс кэша пользователей при их изменении (обработчики сигналов)
+        from backend import authentication  # noqa: F401
+
+        # Измерение запросов (Server-Timing, /metrics)
+        if settings.METRICS_ENABLED:
+            from backend.metrics import install
+            install()
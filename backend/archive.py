@@ -0,0 +1,98 @@
+"""
+    Архив оборудования (холодная таблица EquipmentArchive)
+
+    Архивация (DELETE /api/equipment/{id}, POST /api/equipment/archive) только помечает оборудование (is_archived).
+    Процесс run_archive_mover переносит помеченное оборудование в EquipmentArchive порциями по ключу: INSERT ... SELECT
+    в архив и DELETE из таблицы оборудования (вместе с поисковыми индексами) в одной транзакции, ключи сохраняются.
+    Таблица оборудования и ее индексы содержат только действующее (и еще не перенесенное) оборудование.
+
+    Уникальность тип + серийный номер с архивным оборудованием проверяется сериализатором и сервисным слоем
+    (find_archived_equipments), ограничение уникальности БД действует только в таблице оборудования.
+    Восстановление (POST /api/equipment/restore) переносит оборудование из архива обратно
+"""
+from django.db import connections, router, transaction, IntegrityError
+from django.utils import timezone
+
+from backend.models import Equipment, EquipmentArchive
+
+
+def find_archived_equipments(keys) -> dict:
+    """
+        Архивное оборудование по парам (ключ типа, серийный номер) одним запросом
+    """
+    keys = set(keys)
+    if not keys:
+        return dict()
+    archived_equipments = dict()
+    for equipment in EquipmentArchive.objects.filter(
+            equipment_type_id__in={key[0] for key in keys},
+            serial_number__in={key[1] for key in keys}
+    ).only('id', 'equipment_type_id', 'serial_number'):
+        key = (equipment.equipment_type_id, equipment.serial_number)
+        if key in keys:
+            archived_equipments.setdefault(key, equipment)
+    return archived_equipments
+
+
+def copy_rows(source_model, target_model, pks: list, values: dict) -> int:
+    """
+        Копирование строк между таблицами одним INSERT ... SELECT по ключам (values - значения колонок target_model
+        вместо колонок source_model), возвращает количество скопированных строк
+    """
+    connection = connections[router.db_for_write(target_model)]
+    quote_name = connection.ops.quote_name
+    fields = target_model._meta.concrete_fields
+    select = ['%s' if field.column in values else quote_name(field.column) for field in fields]
+    params = [field.get_db_prep_save(values[field.column], connection) for field in fields if field.column in values]
+    sql = f'INSERT INTO {quote_name(target_model._meta.db_table)} ' \
+          f'({", ".join(quote_name(field.column) for field in fields)}) ' \
+          f'SELECT {", ".join(select)} FROM {quote_name(source_model._meta.db_table)} ' \
+          f'WHERE {quote_name(source_model._meta.pk.column)} IN ({", ".join(["%s"] * len(pks))})'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + list(pks))
+        return cursor.rowcount
+
+
+def move_archived_equipments(chunk_size: int) -> int:
+    """
+        Перенос порции помеченного оборудования в архив, возвращает количество перенесенного (0 - переносить нечего)
+    """
+    with transaction.atomic():
+        pks = list(Equipment.objects.select_for_update(skip_locked=True).filter(is_archived=True)
+                   .order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not pks:
+            return 0
+        copy_rows(Equipment, EquipmentArchive, pks, {'archived_at': timezone.now()})
+        Equipment.objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def restore_archived_equipments(pks: list, user_id: int) -> tuple:
+    """
+        Перенос оборудования из архива обратно в таблицу оборудования, возвращает ключи восстановленного и ключи
+        невосстановленного
+
+        При нарушении уникальности (оборудование с тем же типом и серийным номером создано в обход проверок) -
+        построчно, такое оборудование остается в архиве (невосстановленное)
+    """
+    values = {'is_archived': False, 'updated_by_id': user_id, 'updated_at': timezone.now()}
+    with transaction.atomic():
+        pks = list(EquipmentArchive.objects.select_for_update().filter(pk__in=pks).values_list('id', flat=True))
+        if not pks:
+            return pks, list()
+        try:
+            with transaction.atomic():
+                copy_rows(EquipmentArchive, Equipment, pks, values)
+            restored = pks
+        except IntegrityError:
+            restored = list()
+            for pk in pks:
+                try:
+                    with transaction.atomic():
+                        copy_rows(EquipmentArchive, Equipment, [pk], values)
+                    restored.append(pk)
+                except IntegrityError:
+                    pass
+        EquipmentArchive.objects.filter(pk__in=restored).delete()
+    restored_pks = set(restored)
+    return restored, [pk for pk in pks if pk not in restored_pks]
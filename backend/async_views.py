@@ -0,0 +1,248 @@
+"""
+    Async-контроллеры чтения для ASGI (uvicorn и т.п.)
+
+    Под ASGI синхронный контроллер DRF целиком выполняется в пуле потоков (sync_to_async). Чтение списков
+    оборудования и типов оборудования и детальной информации по оборудованию выполняется здесь в цикле событий:
+    аутентификация по JWT, фильтрация, пагинация и чтение строк - через async ORM, ответ - той же схемой, что и
+    у синхронных контроллеров (те же сервисы, метод aexecute).
+
+    Остальные запросы передаются синхронному контроллеру DRF (delegate), который обслуживал бы их без async-контроллера:
+    изменения (POST, PUT, DELETE), OPTIONS, Browsable API (Accept: text/html, ?format=), форматированный вывод
+    (Accept: application/json; indent=4) и курсорная пагинация списка оборудования (?cursor=)
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers, get_conditional_response
+from django.utils.decorators import classonlymethod
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy as _
+from django.views import View
+from django_filters.utils import translate_validation
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, AuthenticationFailed, PermissionDenied
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt import exceptions as jwt_exceptions
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from backend.authentication import CachedJWTAuthentication, get_user_key, is_cache_enabled
+from backend.conditional import equipment_validators, set_cache_control
+from backend.dictionary import equipment_type_dictionary, equipment_type_validators
+from backend.pagination import EquipmentCursorPagination
+from backend.renderers import FastJSONRenderer
+from backend.services import GetEquipmentListService, GetEquipmentTypeListService, GetEquipmentDetailsService
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """
+        Аутентификация по JWT со снимком пользователя из кэша и чтением через async ORM при промахе
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        key = get_user_key(user_id)
+        snapshot = await cache.aget(key, None) if is_cache_enabled() else None
+        if snapshot is None:
+            try:
+                user = await self.get_snapshot_queryset().aget(**{jwt_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise jwt_exceptions.AuthenticationFailed(_('User not found'), code='user_not_found') from e
+            snapshot = self.build_snapshot(user)
+            if is_cache_enabled():
+                await cache.aset(key, snapshot, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return self.build_user(validated_token, snapshot)
+
+
+class AsyncReadView(View):
+    """
+        Базовый async-контроллер чтения
+
+        delegate - контроллер DRF того же маршрута (ViewSet.as_view из роутера): права, фильтр, пагинация и область
+        кэша количества берутся из его класса, ему же передаются запросы, которые здесь не обслуживаются
+    """
+
+    delegate = None
+    service_class = None
+    # Валидаторы условного GET (те же, что у контроллера DRF)
+    validators = None
+    # Параметры запроса, при которых запрос передается синхронному контроллеру
+    delegated_query_params = ()
+
+    authentication_class = AsyncJWTAuthentication
+    renderer_class = FastJSONRenderer
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Аутентификация по JWT, а не по сессии (как в APIView.as_view)
+        view.csrf_exempt = True
+        return view
+
+    @property
+    def viewset_class(self):
+        return self.delegate.cls
+
+    @property
+    def queryset(self):
+        return self.viewset_class.queryset
+
+    @property
+    def filterset_class(self):
+        return self.viewset_class.filterset_class
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def filter_queryset(self, queryset):
+        """
+            Фильтрация списка (как в DjangoFilterBackend, выборка строится без запросов к БД)
+        """
+        filterset = self.filterset_class(self.request.GET, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return filterset.qs
+
+    async def apaginate_queryset(self, queryset):
+        self.paginator = self.viewset_class.pagination_class()
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self,
+                                                       scope=self.viewset_class.__name__)
+
+    def is_native_request(self, request) -> bool:
+        """
+            Запрос обслуживается async-контроллером (ответ JSON без форматирования)
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if api_settings.URL_FORMAT_OVERRIDE in request.GET or \
+                any(param in request.GET for param in self.delegated_query_params):
+            return False
+        accept = request.headers.get('Accept', '*/*')
+        return 'text/html' not in accept and 'indent' not in accept and request.accepts('application/json')
+
+    async def dispatch(self, request, *args, **kwargs):
+        if not self.is_native_request(request):
+            return await sync_to_async(self.delegate)(request, *args, **kwargs)
+        return await self.get(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            await self.initial(request)
+            response = await self.get_conditional_response(request)
+            if response is None:
+                data = await self.service_class.aexecute(request, self, *args, **kwargs)
+                response = self.render(data)
+            self.set_validators(response)
+        except APIException as exc:
+            response = self.handle_exception(request, exc)
+        return self.finalize_response(response)
+
+    def finalize_response(self, response) -> HttpResponse:
+        """
+            Заголовки - как в ответах DRF
+        """
+        actions = self.delegate.actions
+        response['Allow'] = ', '.join(method.upper() for method in self.viewset_class.http_method_names
+                                      if method in actions or method == 'options')
+        patch_vary_headers(response, ('Accept', ))
+        return response
+
+    async def get_conditional_response(self, request):
+        """
+            Ответ 304 (или 412), если данные не изменились (как в декораторе condition), иначе None
+        """
+        self.etag, self.last_modified = await self.validators.aget(request)
+        return get_conditional_response(request, etag=self.etag, last_modified=int(self.last_modified.timestamp()))
+
+    def set_validators(self, response) -> None:
+        if not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(int(self.last_modified.timestamp()))
+        response.headers.setdefault('ETag', self.etag)
+        set_cache_control(response)
+
+    async def initial(self, request) -> None:
+        """
+            Аутентификация и проверка прав (классы прав контроллера DRF)
+        """
+        authenticator = self.authentication_class()
+        user_auth_tuple = await authenticator.aauthenticate(request)
+        request.user, request.auth = user_auth_tuple if user_auth_tuple is not None else (AnonymousUser(), None)
+
+        self.action = self.delegate.actions.get(request.method.lower())
+        for permission in [permission() for permission in self.viewset_class.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.auth is None:
+                    raise NotAuthenticated()
+                raise PermissionDenied(detail=getattr(permission, 'message', None),
+                                       code=getattr(permission, 'code', None))
+
+    def handle_exception(self, request, exc: APIException) -> HttpResponse:
+        """
+            Ответ на исключение (как в exception_handler DRF)
+        """
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status_code=exc.status_code)
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            response['WWW-Authenticate'] = self.authentication_class().authenticate_header(request)
+        return response
+
+    def render(self, data, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+        return HttpResponse(self.renderer_class().render(data), status=status_code,
+                            content_type=self.renderer_class.media_type)
+
+
+class EquipmentListAsyncView(AsyncReadView):
+    """
+        Список оборудования (GET /api/equipment)
+    """
+
+    service_class = GetEquipmentListService
+    validators = equipment_validators
+    delegated_query_params = (EquipmentCursorPagination.cursor_query_param, )
+
+
+class EquipmentDetailsAsyncView(AsyncReadView):
+    """
+        Детальная информация по оборудованию (GET /api/equipment/{id})
+    """
+
+    service_class = GetEquipmentDetailsService
+    validators = equipment_validators
+
+
+class EquipmentTypeListAsyncView(AsyncReadView):
+    """
+        Список типов оборудования (GET /api/equipment-type)
+    """
+
+    service_class = GetEquipmentTypeListService
+    validators = equipment_type_validators
+
+    async def get(self, request, *args, **kwargs):
+        if not equipment_type_dictionary.is_dictionary_request(request):
+            return await super().get(request, *args, **kwargs)
+
+        # Справочник (список без параметров) - готовым ответом
+        try:
+            await self.initial(request)
+            entry = await equipment_type_dictionary.aget(
+                lambda: self.service_class.aexecute(request, self, *args, **kwargs)
+            )
+            response = equipment_type_dictionary.get_response(request, entry)
+        except APIException as exc:
+            response = self.handle_exception(request, exc)
+        return self.finalize_response(response)
@@ -0,0 +1,133 @@
+"""
+    Аутентификация по JWT с кэшированием пользователя
+
+    JWTAuthentication читает пользователя из БД при каждом запросе. Здесь для запроса достаточно снимка пользователя
+    (ключ, is_staff, is_active), который хранится в кэше (CACHES['default']) AUTH_USER_CACHE_TIMEOUT секунд:
+    пользователь запроса - экземпляр модели с отложенными остальными полями (они читаются из БД при обращении).
+    Снимок сбрасывается при сохранении и удалении пользователя (деактивация, изменение прав, смена пароля);
+    изменения в обход моделей (QuerySet.update) учитываются по истечении срока хранения.
+
+    Проверенные токены (подпись, срок действия, тип) хранятся в процессе на тот же срок, но не дольше срока действия
+    токена
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_KEY_PREFIX = 'auth:user'
+# Поля снимка пользователя
+USER_SNAPSHOT_FIELDS = ('id', 'is_staff', 'is_active', )
+# Предельное число проверенных токенов в процессе (при превышении хранилище очищается)
+VALIDATED_TOKENS_MAX_SIZE = 10000
+
+
+def get_user_key(user_id) -> str:
+    return f'{USER_KEY_PREFIX}:{user_id}'
+
+
+def is_cache_enabled() -> bool:
+    return settings.AUTH_USER_CACHE_TIMEOUT > 0
+
+
+def invalidate_user(*user_ids) -> None:
+    """
+        Сброс снимков пользователей (после изменения или удаления пользователя)
+    """
+    if user_ids:
+        cache.delete_many([get_user_key(user_id) for user_id in user_ids])
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def on_user_changed(sender, instance, **kwargs):
+    invalidate_user(getattr(instance, jwt_settings.USER_ID_FIELD))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+        Аутентификация по JWT: проверенные токены и снимок пользователя - из кэша (проверки - как в JWTAuthentication)
+    """
+
+    _validated_tokens = dict()
+    _lock = threading.Lock()
+
+    def get_validated_token(self, raw_token: bytes):
+        if not is_cache_enabled():
+            return super().get_validated_token(raw_token)
+
+        now = time.time()
+        entry = self._validated_tokens.get(raw_token, None)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        validated_token = super().get_validated_token(raw_token)
+        expires_at = min(now + settings.AUTH_USER_CACHE_TIMEOUT, validated_token.get('exp', now))
+        with self._lock:
+            if len(self._validated_tokens) >= VALIDATED_TOKENS_MAX_SIZE:
+                self._validated_tokens.clear()
+            self._validated_tokens[raw_token] = (expires_at, validated_token)
+        return validated_token
+
+    def get_user(self, validated_token):
+        if not is_cache_enabled():
+            return super().get_user(validated_token)
+
+        user_id = self.get_user_id(validated_token)
+        key = get_user_key(user_id)
+        snapshot = cache.get(key, None)
+        if snapshot is None:
+            try:
+                user = self.get_snapshot_queryset().get(**{jwt_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found') from e
+            snapshot = self.build_snapshot(user)
+            cache.set(key, snapshot, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return self.build_user(validated_token, snapshot)
+
+    @staticmethod
+    def get_user_id(validated_token):
+        try:
+            return validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+    def get_snapshot_queryset(self):
+        """
+            Выборка пользователя для снимка (только поля снимка)
+        """
+        fields = (*USER_SNAPSHOT_FIELDS, 'password') if jwt_settings.CHECK_REVOKE_TOKEN else USER_SNAPSHOT_FIELDS
+        return self.user_model.objects.only(*fields)
+
+    @staticmethod
+    def build_snapshot(user) -> dict:
+        """
+            Снимок пользователя для кэша (хеш пароля - только для проверки отзыва токенов)
+        """
+        snapshot = {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            snapshot['password_hash'] = get_md5_hash_password(user.password)
+        return snapshot
+
+    def build_user(self, validated_token, snapshot: dict):
+        """
+            Пользователь запроса по снимку (остальные поля отложены и читаются из БД при обращении)
+        """
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not snapshot['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != snapshot['password_hash']:
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, USER_SNAPSHOT_FIELDS,
+                                       [snapshot[field] for field in USER_SNAPSHOT_FIELDS])
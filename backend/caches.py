@@ -0,0 +1,147 @@
+"""
+    Кэш детальной информации по оборудованию (read-through)
+
+    В кэше (CACHES['default']) хранится схема оборудования (result ответа GET /api/equipment/{id}) вместе с версией
+    типов оборудования на момент чтения. Запись сбрасывается сервисами изменения и удаления оборудования,
+    переименование типа оборудования меняет версию типов (записи со старой версией считаются устаревшими).
+    Запись и версия типов читаются одним обращением к кэшу (get_many)
+
+    Счетчики попаданий и промахов - в пределах процесса
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.counts import get_count_version, aget_count_version
+from backend.models import Equipment
+from backend.replicas import is_replica_read, is_settled
+
+DETAILS_KEY_PREFIX = 'equipment:details'
+TYPES_VERSION_KEY = 'equipment:details:types-version'
+
+
+class EquipmentDetailsCache:
+    """
+        Кэш схемы оборудования по ключу оборудования
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def get_key(pk) -> str:
+        """
+            Ключ записи (None - ключ оборудования не число, такие запросы не кэшируются)
+        """
+        try:
+            return f'{DETAILS_KEY_PREFIX}:{int(pk)}'
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.EQUIPMENT_DETAILS_CACHE_TIMEOUT > 0
+
+    def get(self, pk, load) -> dict:
+        """
+            Схема оборудования из кэша, при промахе - из load() (с записью в кэш)
+        """
+        key = self.get_key(pk)
+        if key is None or not self.is_enabled():
+            return load()
+
+        cached = cache.get_many([key, TYPES_VERSION_KEY])
+        version = cached.get(TYPES_VERSION_KEY, None)
+        if version is None:
+            version = self._init_types_version()
+        entry = cached.get(key, None)
+        if entry is not None and entry[0] == version:
+            self._count(hits=1)
+            return entry[1]
+
+        self._count(misses=1)
+        data = load()
+        # Прочитанное с реплики сразу после изменения оборудования может быть устаревшим
+        if not is_replica_read() or is_settled(get_count_version(Equipment)):
+            cache.set(key, (version, data), timeout=settings.EQUIPMENT_DETAILS_CACHE_TIMEOUT)
+        return data
+
+    async def aget(self, pk, aload) -> dict:
+        """
+            Схема оборудования из кэша, при промахе - из await aload() (для async-контроллеров)
+        """
+        key = self.get_key(pk)
+        if key is None or not self.is_enabled():
+            return await aload()
+
+        cached = await cache.aget_many([key, TYPES_VERSION_KEY])
+        version = cached.get(TYPES_VERSION_KEY, None)
+        if version is None:
+            version = await self._ainit_types_version()
+        entry = cached.get(key, None)
+        if entry is not None and entry[0] == version:
+            self._count(hits=1)
+            return entry[1]
+
+        self._count(misses=1)
+        data = await aload()
+        if not is_replica_read() or is_settled(await aget_count_version(Equipment)):
+            await cache.aset(key, (version, data), timeout=settings.EQUIPMENT_DETAILS_CACHE_TIMEOUT)
+        return data
+
+    def invalidate(self, *pks) -> None:
+        """
+            Сброс записей оборудования (после изменения или удаления)
+        """
+        keys = [key for key in map(self.get_key, pks) if key is not None]
+        if keys:
+            cache.delete_many(keys)
+            self._count(invalidations=len(keys))
+
+    def invalidate_types(self) -> None:
+        """
+            Сброс всех записей (после переименования типа оборудования) - новая версия типов
+        """
+        cache.set(TYPES_VERSION_KEY, time.time_ns(), timeout=None)
+        self._count(invalidations=1)
+
+    def stats(self) -> dict:
+        """
+            Счетчики процесса: попадания, промахи, сбросы и доля попаданий
+        """
+        with self._lock:
+            hits, misses, invalidations = self.hits, self.misses, self.invalidations
+        return {
+            'hits': hits,
+            'misses': misses,
+            'invalidations': invalidations,
+            'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def _count(self, hits: int = 0, misses: int = 0, invalidations: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.invalidations += invalidations
+
+    @staticmethod
+    def _init_types_version() -> int:
+        version = time.time_ns()
+        if not cache.add(TYPES_VERSION_KEY, version, timeout=None):
+            version = cache.get(TYPES_VERSION_KEY, version)
+        return version
+
+    @staticmethod
+    async def _ainit_types_version() -> int:
+        version = time.time_ns()
+        if not await cache.aadd(TYPES_VERSION_KEY, version, timeout=None):
+            version = await cache.aget(TYPES_VERSION_KEY, version)
+        return version
+
+
+equipment_details_cache = EquipmentDetailsCache()
@@ -0,0 +1,88 @@
+"""
+    Условные GET-запросы (ETag, Last-Modified)
+
+    Валидаторы вычисляются без запросов к БД - по версиям данных моделей (backend.counts): версия меняется сервисным
+    слоем при каждом изменении данных модели и равна времени изменения (наносекунды), не реже раза в
+    DATA_VERSION_MAX_AGE секунд она ставится заново (изменения из других процессов при локальном кэше).
+    Если клиент прислал совпадающий If-None-Match (или If-Modified-Since), ответ 304 формируется до выполнения
+    сервиса - без чтения и сериализации данных
+
+    ETag слабый: тело ответа содержит время формирования (retTime)
+"""
+import datetime
+import hashlib
+from functools import wraps
+from urllib import parse
+
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from backend.counts import get_count_version, aget_count_version
+from backend.models import Equipment
+
+
+class DataVersionValidators:
+    """
+        Валидаторы ответа по версиям данных моделей (ответ зависит от пути, параметров запроса и формата)
+    """
+
+    def __init__(self, *models):
+        self.models = models
+
+    def get_versions(self) -> list:
+        return [get_count_version(model) for model in self.models]
+
+    async def aget_versions(self) -> list:
+        return [await aget_count_version(model) for model in self.models]
+
+    @staticmethod
+    def build_etag(request, versions: list) -> str:
+        query = parse.urlencode(sorted(request.GET.lists()), doseq=True)
+        # Формат ответа (JSON или Browsable API) - по рендереру, выбранному DRF (async-контроллеры отвечают в JSON)
+        renderer_format = getattr(getattr(request, 'accepted_renderer', None), 'format', 'json')
+        key = '|'.join([request.path, query, renderer_format, *map(str, versions)])
+        return f'W/"{hashlib.md5(key.encode("utf-8")).hexdigest()}"'
+
+    @staticmethod
+    def build_last_modified(versions: list) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(max(versions) / 10 ** 9, tz=datetime.timezone.utc)
+
+    def etag(self, request, *args, **kwargs) -> str:
+        return self.build_etag(request, self.get_versions())
+
+    def last_modified(self, request, *args, **kwargs) -> datetime.datetime:
+        return self.build_last_modified(self.get_versions())
+
+    async def aget(self, request) -> tuple:
+        """
+            ETag и Last-Modified (для async-контроллеров)
+        """
+        versions = await self.aget_versions()
+        return self.build_etag(request, versions), self.build_last_modified(versions)
+
+
+# Списки и детальная информация по оборудованию содержат имя типа: переименование типа меняет и версию оборудования
+equipment_validators = DataVersionValidators(Equipment)
+
+
+def conditional_get(validators: DataVersionValidators):
+    """
+        Декоратор контроллера: условный GET (condition) и Cache-Control: private, no-cache
+        (клиент хранит ответ, но каждый раз проверяет его актуальность)
+    """
+    def decorator(func):
+        func = condition(etag_func=validators.etag, last_modified_func=validators.last_modified)(func)
+
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            response = func(request, *args, **kwargs)
+            set_cache_control(response)
+            return response
+
+        return inner
+
+    return decorator
+
+
+def set_cache_control(response) -> None:
+    patch_cache_control(response, private=True, no_cache=True)
@@ -0,0 +1,170 @@
+"""
+    Подсчет количества записей для пагинированных списков
+
+    1. Точное количество кэшируется по нормализованному набору фильтров (сбрасывается при изменении данных)
+    2. Оценочное количество - по статистике таблицы (MySQL, без фильтров) или ограниченным подсчетом (COUNT до предела)
+
+    Версия данных модели (часть ключей кэша количества и валидаторов условных GET-запросов) хранится в кэше
+    DATA_VERSION_MAX_AGE секунд, затем ставится заново: при локальном кэше (CACHES) изменения, сделанные другими
+    процессами (воркеры, run_import_worker), по версии не видны, устаревание ограничено этим сроком
+"""
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from rest_framework.request import Request
+
+from backend.replicas import is_replica_read, is_settled
+
+COUNT_MODE_QUERY_PARAM = 'count'
+COUNT_MODE_EXACT = 'exact'
+COUNT_MODE_ESTIMATED = 'estimated'
+
+
+def get_version_key(model) -> str:
+    return f'count:version:{model._meta.label_lower}'
+
+
+def get_count_version(model) -> int:
+    """
+        Текущая версия данных модели (часть ключа кэша количества)
+    """
+    version_key = get_version_key(model)
+    version = cache.get(version_key, None)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(version_key, version, timeout=settings.DATA_VERSION_MAX_AGE):
+            version = cache.get(version_key, version)
+    return version
+
+
+async def aget_count_version(model) -> int:
+    """
+        Текущая версия данных модели (для async-контроллеров)
+    """
+    version_key = get_version_key(model)
+    version = await cache.aget(version_key, None)
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(version_key, version, timeout=settings.DATA_VERSION_MAX_AGE):
+            version = await cache.aget(version_key, version)
+    return version
+
+
+def invalidate_counts(*models) -> None:
+    """
+        Сброс кэша количества записей для моделей (новая версия данных)
+    """
+    for model in models:
+        cache.set(get_version_key(model), time.time_ns(), timeout=settings.DATA_VERSION_MAX_AGE)
+
+
+def get_table_rows_estimate(model):
+    """
+        Оценка количества строк таблицы по статистике СУБД (только MySQL, иначе None)
+    """
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT table_rows FROM information_schema.tables "
+                       "WHERE table_schema = DATABASE() AND table_name = %s", [model._meta.db_table])
+        row = cursor.fetchone()
+    return None if row is None or row[0] is None else int(row[0])
+
+
+class ResultCounter:
+    """
+        Подсчет количества записей в отфильтрованном списке с учетом режима (?count=exact|estimated)
+    """
+
+    def __init__(self, request: Request, view=None, scope: str = None):
+        query_params = getattr(request, 'query_params', request.GET)
+        self.mode = query_params.get(COUNT_MODE_QUERY_PARAM, COUNT_MODE_EXACT)
+        if self.mode != COUNT_MODE_ESTIMATED:
+            self.mode = COUNT_MODE_EXACT
+        self.filters = self.get_normalized_filters(query_params, view)
+        # Область кэша - контроллер списка (async-контроллер передает область соответствующего ему ViewSet)
+        self.scope = scope if scope is not None else view.__class__.__name__ if view is not None else ''
+        self.is_exact = True
+
+    @staticmethod
+    def get_normalized_filters(query_params, view=None) -> dict:
+        """
+            Нормализованный набор фильтров: только параметры фильтра списка, без пустых значений и пробелов по краям
+        """
+        filterset_class = getattr(view, 'filterset_class', None)
+        if filterset_class is None:
+            return dict()
+        filters = dict()
+        for name in sorted(filterset_class.base_filters):
+            value = query_params.get(name, '').strip()
+            if value:
+                filters[name] = value
+        return filters
+
+    def get_cache_key(self, model, version: int = None) -> str:
+        filters = '&'.join(f'{name}={value}' for name, value in self.filters.items())
+        digest = hashlib.md5(f'{self.scope}?{filters}'.encode('utf-8')).hexdigest()
+        if version is None:
+            version = get_count_version(model)
+        return f'count:{model._meta.label_lower}:{version}:{self.mode}:{digest}'
+
+    def count(self, queryset) -> int:
+        """
+            Количество записей в отфильтрованном списке (признак точности - в is_exact)
+        """
+        version = get_count_version(queryset.model)
+        key = self.get_cache_key(queryset.model, version)
+        cached = cache.get(key, None)
+        if cached is None:
+            cached = self.calculate(queryset)
+            # Количество, подсчитанное на реплике сразу после изменения данных, может быть устаревшим
+            if not is_replica_read() or is_settled(version):
+                cache.set(key, cached, timeout=settings.COUNT_CACHE_TIMEOUT)
+        count, self.is_exact = cached
+        return count
+
+    def calculate(self, queryset) -> tuple:
+        if self.mode == COUNT_MODE_EXACT:
+            return queryset.count(), True
+        if not self.filters:
+            estimate = get_table_rows_estimate(queryset.model)
+            if estimate is not None:
+                return estimate, False
+        cap = settings.COUNT_ESTIMATE_CAP
+        count = queryset[:cap + 1].count()
+        if count > cap:
+            return cap, False
+        return count, True
+
+    async def acount(self, queryset) -> int:
+        """
+            Количество записей в отфильтрованном списке (для async-контроллеров)
+        """
+        version = await aget_count_version(queryset.model)
+        key = self.get_cache_key(queryset.model, version)
+        cached = await cache.aget(key, None)
+        if cached is None:
+            cached = await self.acalculate(queryset)
+            if not is_replica_read() or is_settled(version):
+                await cache.aset(key, cached, timeout=settings.COUNT_CACHE_TIMEOUT)
+        count, self.is_exact = cached
+        return count
+
+    async def acalculate(self, queryset) -> tuple:
+        if self.mode == COUNT_MODE_EXACT:
+            return await queryset.acount(), True
+        if not self.filters:
+            # Статистика таблицы читается обычным курсором (у курсоров Django нет async-интерфейса)
+            estimate = await sync_to_async(get_table_rows_estimate)(queryset.model)
+            if estimate is not None:
+                return estimate, False
+        cap = settings.COUNT_ESTIMATE_CAP
+        count = await queryset[:cap + 1].acount()
+        if count > cap:
+            return cap, False
+        return count, True
@@ -0,0 +1,12 @@
+"""
+    MySQL с пулом соединений процесса (ENGINE 'backend.db.mysql', см. backend.db.pool)
+"""
+from django.db.backends.mysql import base
+
+from backend.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    def ping_connection(self, connection) -> None:
+        connection.ping()
@@ -0,0 +1,243 @@
+"""
+    Пул соединений с БД в процессе (по псевдониму БД)
+
+    Django открывает соединение на поток и без CONN_MAX_AGE закрывает его в конце каждого запроса: каждый запрос
+    платит за соединение с MySQL и настройку сессии (init_command, autocommit, уровень изоляции). Здесь соединение
+    в конце запроса возвращается в пул процесса (CONN_MAX_AGE=0) и следующий запрос любого потока получает его без
+    соединения и настройки сессии.
+
+    1. В пуле не более DATABASE_POOL_SIZE соединений на псевдоним БД, при их нехватке запрос ждет свободное до
+       DATABASE_POOL_TIMEOUT секунд (затем - OperationalError)
+    2. Соединение, простаивавшее дольше DATABASE_POOL_PING_INTERVAL секунд, проверяется перед выдачей (ping),
+       соединение старше DATABASE_POOL_RECYCLE секунд или открытое с другими параметрами (например, после смены
+       NAME на тестовую БД) переоткрывается
+    3. Соединение с ошибкой, незавершенной транзакцией или отключенным autocommit в пул не возвращается
+
+    Счетчики (соединения, повторные использования, ожидания и время ожидания) - в пределах процесса (get_pool_stats)
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+
+class PooledConnection:
+    """
+        Соединение драйвера БД в пуле
+    """
+
+    def __init__(self, connection, params: dict):
+        self.connection = connection
+        # Параметры соединения (get_connection_params), с которыми оно открыто
+        self.params = params
+        self.created_at = time.monotonic()
+        self.released_at = self.created_at
+        # Соединение уже использовалось (сессия настроена)
+        self.is_reused = False
+        # Текущий режим autocommit соединения (None - не установлен)
+        self.autocommit = None
+
+
+class ConnectionPool:
+    """
+        Ограниченный пул соединений одного псевдонима БД
+    """
+
+    def __init__(self, alias: str, size: int, timeout: float, recycle: float, ping_interval: float):
+        self.alias = alias
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.pid = os.getpid()
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._open = 0
+        self.connects = 0
+        self.reuses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.health_check_failures = 0
+        self.recycles = 0
+        self.discards = 0
+
+    def acquire(self, params: dict, connect, ping, error_class) -> PooledConnection:
+        """
+            Соединение из пула (свободное, после проверки) или новое connect(params); params - параметры соединения
+            (соединение с другими параметрами переоткрывается), ping(connection) - проверка соединения,
+            error_class - исключение при истечении ожидания
+        """
+        started_at = None
+        with self._condition:
+            while not self._idle and self._open >= self.size:
+                now = time.monotonic()
+                if started_at is None:
+                    started_at = now
+                    self.waits += 1
+                remaining = self.timeout - (now - started_at)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    self.wait_time += now - started_at
+                    raise error_class(f"Connection pool of database '{self.alias}' is exhausted "
+                                      f"({self.size} connections, waited {self.timeout} s)")
+                self._condition.wait(remaining)
+            if started_at is not None:
+                self.wait_time += time.monotonic() - started_at
+            # Последнее возвращенное соединение - самое "теплое"
+            pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                self._open += 1
+
+        if pooled is not None:
+            now = time.monotonic()
+            if now - pooled.created_at >= self.recycle or pooled.params != params:
+                self._count(recycles=1)
+            elif now - pooled.released_at < self.ping_interval or self._ping(ping, pooled):
+                self._count(reuses=1)
+                return pooled
+            else:
+                self._count(health_check_failures=1)
+            # Соединение переоткрывается (место в пуле сохраняется)
+            self._close(pooled)
+
+        try:
+            pooled = PooledConnection(connect(params), params)
+        except BaseException:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        self._count(connects=1)
+        return pooled
+
+    def release(self, pooled: PooledConnection, discard: bool = False) -> None:
+        """
+            Возврат соединения в пул (discard - соединение закрывается)
+        """
+        if discard:
+            self._close(pooled)
+            self._count(discards=1)
+        pooled.is_reused = True
+        pooled.released_at = time.monotonic()
+        with self._condition:
+            if discard:
+                self._open -= 1
+            else:
+                self._idle.append(pooled)
+            self._condition.notify()
+
+    def stats(self) -> dict:
+        """
+            Счетчики пула: размер, открытые, свободные и занятые соединения, соединения с БД, повторные
+            использования, ожидания (количество, время, истечения), проверки, переоткрытия и закрытия
+        """
+        with self._condition:
+            return {
+                'size': self.size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'connects': self.connects,
+                'reuses': self.reuses,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'timeouts': self.timeouts,
+                'health_check_failures': self.health_check_failures,
+                'recycles': self.recycles,
+                'discards': self.discards,
+            }
+
+    def _count(self, **counters) -> None:
+        with self._condition:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @staticmethod
+    def _ping(ping, pooled: PooledConnection) -> bool:
+        try:
+            ping(pooled.connection)
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close(pooled: PooledConnection) -> None:
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+
+_pools = dict()
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str) -> ConnectionPool:
+    """
+        Пул псевдонима БД (в дочернем процессе - новый: соединения родителя не используются)
+    """
+    pool = _pools.get(alias, None)
+    if pool is None or pool.pid != os.getpid():
+        with _pools_lock:
+            pool = _pools.get(alias, None)
+            if pool is None or pool.pid != os.getpid():
+                pool = ConnectionPool(alias, settings.DATABASE_POOL_SIZE, settings.DATABASE_POOL_TIMEOUT,
+                                      settings.DATABASE_POOL_RECYCLE, settings.DATABASE_POOL_PING_INTERVAL)
+                _pools[alias] = pool
+    return pool
+
+
+def get_pool_stats() -> dict:
+    """
+        Счетчики пулов процесса по псевдонимам БД
+    """
+    return {alias: pool.stats() for alias, pool in list(_pools.items()) if pool.pid == os.getpid()}
+
+
+class PooledDatabaseWrapperMixin:
+    """
+        Соединения DatabaseWrapper - из пула процесса: закрытие соединения возвращает его в пул, настройка сессии
+        (autocommit, init_connection_state) для соединения из пула не повторяется
+    """
+
+    pooled = None
+
+    def get_new_connection(self, conn_params):
+        self.pooled = get_pool(self.alias).acquire(
+            conn_params, super().get_new_connection, self.ping_connection, self.Database.OperationalError
+        )
+        return self.pooled.connection
+
+    def ping_connection(self, connection) -> None:
+        """
+            Проверка соединения драйвера (исключение - соединение неработоспособно)
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def init_connection_state(self):
+        if self.pooled is not None and self.pooled.is_reused:
+            return
+        super().init_connection_state()
+
+    def _set_autocommit(self, autocommit):
+        if self.pooled is not None and self.pooled.autocommit == autocommit:
+            return
+        super()._set_autocommit(autocommit)
+        if self.pooled is not None:
+            self.pooled.autocommit = autocommit
+
+    def _close(self):
+        pooled, self.pooled = self.pooled, None
+        if pooled is None or pooled.connection is not self.connection:
+            return super()._close()
+        # Соединение с ошибкой или незавершенной транзакцией в пул не возвращается
+        get_pool(self.alias).release(
+            pooled, discard=self.errors_occurred or self.in_atomic_block or not self.autocommit
+        )
@@ -0,0 +1,141 @@
+"""
+    Справочник типов оборудования - готовые байты ответа
+
+    Список типов без параметров (GET /api/equipment-type) запрашивается при каждой загрузке страниц клиента, а меняется
+    редко. Для него ответ (JSON без retTime) формируется один раз на версию данных типов (backend.counts) и хранится
+    в процессе вместе с ETag: повторный запрос - одно обращение к кэшу за версией, без фильтрации, подсчета
+    и сериализации. Ответ перестраивается при изменении версии (сервисы создания и изменения типа) и, как реестр
+    типов (backend.registry), не реже раза в EQUIPMENT_TYPE_REGISTRY_MAX_AGE секунд.
+
+    retTime, как и в остальных ответах, - время ответа: он дописывается к готовым байтам при каждом ответе (сжатие
+    gzip - тоже). ETag - хэш ответа без retTime, т.е. самих данных типов: он не меняется при переотметке версии
+    данных и одинаков во всех процессах. ETag слабый - байты ответов отличаются retTime
+"""
+import gzip
+import hashlib
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from backend.conditional import DataVersionValidators, set_cache_control
+from backend.counts import get_count_version, aget_count_version
+from backend.models import EquipmentType
+from backend.renderers import FastJSONRenderer
+
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+class EquipmentTypeDictionaryEntry:
+    """
+        Готовый ответ справочника одной версии данных типов
+    """
+
+    def __init__(self, data: dict, version: int):
+        data.pop('retTime', None)
+        self.version = version
+        self.built_at = time.monotonic()
+        # Ответ без retTime (последний ключ схемы ответа, дописывается в get_body)
+        self.body = FastJSONRenderer().render(data)
+        self.etag = f'W/"{hashlib.md5(self.body).hexdigest()}"'
+
+    def is_actual(self, version: int) -> bool:
+        return self.version == version and time.monotonic() - self.built_at < settings.EQUIPMENT_TYPE_REGISTRY_MAX_AGE
+
+    def get_body(self) -> bytes:
+        """
+            Байты ответа с текущим retTime
+        """
+        return self.body[:-1] + b',"retTime":%d}' % int(time.time() * 10 ** 3)
+
+
+class EquipmentTypeDictionary:
+    """
+        Справочник типов оборудования: готовый ответ актуальной версии данных типов
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry = None
+
+    @staticmethod
+    def is_dictionary_request(request) -> bool:
+        """
+            Запрос справочника: без параметров, ответ JSON без форматирования (не Browsable API)
+        """
+        if request.method not in ('GET', 'HEAD') or request.GET:
+            return False
+        renderer = getattr(request, 'accepted_renderer', None)
+        return (renderer is None or renderer.format == 'json') and \
+            'indent' not in getattr(request, 'accepted_media_type', '')
+
+    @staticmethod
+    def accepts_gzip(request) -> bool:
+        return bool(re_accepts_gzip.search(request.headers.get('Accept-Encoding', '')))
+
+    def get(self, build) -> EquipmentTypeDictionaryEntry:
+        """
+            Ответ справочника, при изменении версии (или устаревании) - из схемы ответа build()
+        """
+        # Версия читается до построения: изменение во время построения приведет к повторному построению
+        version = get_count_version(EquipmentType)
+        entry = self._entry
+        if entry is None or not entry.is_actual(version):
+            with self._lock:
+                entry = self._entry
+                if entry is None or not entry.is_actual(version):
+                    entry = EquipmentTypeDictionaryEntry(build(), version)
+                    self._entry = entry
+        return entry
+
+    async def aget(self, abuild) -> EquipmentTypeDictionaryEntry:
+        """
+            Ответ справочника, при изменении версии (или устаревании) - из схемы ответа await abuild()
+            (для async-контроллеров)
+        """
+        version = await aget_count_version(EquipmentType)
+        entry = self._entry
+        if entry is None or not entry.is_actual(version):
+            entry = EquipmentTypeDictionaryEntry(await abuild(), version)
+            self._entry = entry
+        return entry
+
+    def get_response(self, request, entry: EquipmentTypeDictionaryEntry) -> HttpResponse:
+        """
+            Ответ справочника (сжатый, если клиент принимает gzip) или 304, если у клиента актуальная копия
+        """
+        response = get_conditional_response(request, etag=entry.etag)
+        if response is None:
+            body = entry.get_body()
+            if self.accepts_gzip(request):
+                response = HttpResponse(gzip.compress(body, mtime=0), content_type=FastJSONRenderer.media_type)
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(body, content_type=FastJSONRenderer.media_type)
+        response['ETag'] = entry.etag
+        patch_vary_headers(response, ('Accept-Encoding', ))
+        set_cache_control(response)
+        return response
+
+
+class EquipmentTypeListValidators(DataVersionValidators):
+    """
+        Валидаторы списка типов оборудования: условный GET справочника выполняет сам справочник (ETag по данным типов)
+    """
+
+    def etag(self, request, *args, **kwargs):
+        if equipment_type_dictionary.is_dictionary_request(request):
+            return None
+        return super().etag(request, *args, **kwargs)
+
+    def last_modified(self, request, *args, **kwargs):
+        if equipment_type_dictionary.is_dictionary_request(request):
+            return None
+        return super().last_modified(request, *args, **kwargs)
+
+
+equipment_type_dictionary = EquipmentTypeDictionary()
+equipment_type_validators = EquipmentTypeListValidators(EquipmentType)
@@ -0,0 +1,77 @@
+"""
+    Потоковая выгрузка оборудования (NDJSON, CSV)
+
+    Строки читаются порциями по ключу (id > последний id порции, ORDER BY id LIMIT n), а не одним курсором:
+    MySQL-драйвер загружает весь результат запроса в память клиента, поэтому память процесса ограничена размером порции
+    независимо от количества выгружаемых строк
+"""
+import csv
+import io
+
+from backend.renderers import FastJSONRenderer
+
+EXPORT_FORMAT_QUERY_PARAM = 'export_format'
+EXPORT_FORMAT_NDJSON = 'ndjson'
+EXPORT_FORMAT_CSV = 'csv'
+EXPORT_FORMATS = [EXPORT_FORMAT_NDJSON, EXPORT_FORMAT_CSV]
+
+EXPORT_CONTENT_TYPES = {
+    EXPORT_FORMAT_NDJSON: 'application/x-ndjson',
+    EXPORT_FORMAT_CSV: 'text/csv; charset=utf-8',
+}
+
+
+def iterate_chunks(queryset, chunk_size: int):
+    """
+        Порции строк выборки (сортировка по id, очередная порция - по ключу после последней строки предыдущей)
+    """
+    queryset = queryset.order_by('id')
+    last_id = None
+    while True:
+        chunk = list(queryset[:chunk_size] if last_id is None else queryset.filter(id__gt=last_id)[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1].id
+
+
+def encode_ndjson(chunks, fields):
+    """
+        NDJSON: одна запись (схема EquipmentSerializer) на строку
+    """
+    render = FastJSONRenderer().render
+    for chunk in chunks:
+        yield b''.join(render(dict(zip(fields, row))) + b'\n' for row in chunk)
+
+
+def encode_csv(chunks, fields):
+    """
+        CSV: строка заголовка с именами полей, затем записи
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+EXPORT_ENCODERS = {
+    EXPORT_FORMAT_NDJSON: encode_ndjson,
+    EXPORT_FORMAT_CSV: encode_csv,
+}
+
+
+def export_rows(queryset, fields, export_format: str, chunk_size: int, prepare=None):
+    """
+        Поток байтов выгрузки для StreamingHttpResponse (prepare - преобразование порции строк в значения полей)
+    """
+    chunks = iterate_chunks(queryset, chunk_size)
+    if prepare is not None:
+        chunks = map(prepare, chunks)
+    return EXPORT_ENCODERS[export_format](chunks, fields)
@@ -2,6 +2,7 @@ from django.db.models import Q
 from django_filters import rest_framework as filters
 
 from backend.models import EquipmentType, Equipment
+from backend.search import search_equipments, filter_serial_number_contains
 
 
 def filter_equipment_type_q(queryset, name, value):
@@ -39,8 +40,7 @@ class EquipmentTypeFilter(filters.FilterSet):
 
 
 def filter_equipment_q(queryset, name, value):
-    return queryset.filter(Q(equipment_type__name__icontains=value) | Q(serial_number__icontains=value) |
-                           Q(description__icontains=value))
+    return search_equipments(queryset, value)
 
 
 def filter_equipment_equipment_type(queryset, name, value):
@@ -48,7 +48,7 @@ def filter_equipment_equipment_type(queryset, name, value):
 
 
 def filter_equipment_serial_number(queryset, name, value):
-    return queryset.filter(serial_number__icontains=value)
+    return filter_serial_number_contains(queryset, value)
 
 
 def filter_equipment_description(queryset, name, value):
@@ -63,7 +63,9 @@ class EquipmentFilter(filters.FilterSet):
     """
     q = \
         filters.CharFilter(label='Equipment type name or serial number or description for result set filtering '
-                                 '(by content case insensitive).',
+                                 '(full-text: every word matches the beginning of a word of serial number or '
+                                 'description, or is contained in equipment type name or serial number (3+ '
+                                 'characters); ordered by relevance).',
                            method=filter_equipment_q)
     equipment_type_name = \
         filters.CharFilter(label='Equipment type name for result set filtering (by content case insensitive).',
@@ -79,3 +81,26 @@ class EquipmentFilter(filters.FilterSet):
         model = Equipment
         fields = ['equipment_type_name', 'serial_number', 'description']
 
+
+def filter_archived_equipment_q(queryset, name, value):
+    return queryset.filter(Q(equipment_type__name__icontains=value) | Q(serial_number__icontains=value) |
+                           Q(description__icontains=value))
+
+
+def filter_archived_equipment_serial_number(queryset, name, value):
+    return queryset.filter(serial_number__icontains=value)
+
+
+class ArchivedEquipmentFilter(EquipmentFilter):
+    """
+        Фильтры для архивного оборудования (восстановление)
+
+        Архивное оборудование исключено из поисковых индексов: q и serial_number - по вхождению без индексов
+    """
+    q = \
+        filters.CharFilter(label='Equipment type name or serial number or description for result set filtering '
+                                 '(by content case insensitive).',
+                           method=filter_archived_equipment_q)
+    serial_number = \
+        filters.CharFilter(label='Serial number for result set filtering (by content case insensitive).',
+                           method=filter_archived_equipment_serial_number)
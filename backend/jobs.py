@@ -0,0 +1,100 @@
+"""
+    Фоновые задания загрузки оборудования
+
+    Задания хранятся в БД (EquipmentImportJob), брокер не нужен: процесс run_import_worker забирает очередное
+    ожидающее задание (SELECT ... FOR UPDATE SKIP LOCKED) и выполняет его тем же пакетным сервисом создания
+    оборудования, что и POST /api/equipment. Прогресс и ошибки записываются в БД после каждого пакета
+
+    Задание, выполняемое дольше IMPORT_JOB_TIMEOUT (процесс остановлен посреди задания), переводится в статус failed
+    перед получением очередного задания. Повторно оно не выполняется: часть оборудования могла быть уже сохранена
+"""
+import io
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from backend.models import EquipmentImportJob, EquipmentImportJobError
+from backend.parsers import NDJSON_MEDIA_TYPE, iterate_json, iterate_ndjson
+from backend.services import CreateEquipmentReport, CreateEquipmentService
+
+
+class ImportJobReport(CreateEquipmentReport):
+    """
+        Результаты задания загрузки: после каждого пакета ошибки дописываются в EquipmentImportJobError,
+        счетчики - в задание (сохраненное оборудование в памяти не накапливается)
+    """
+
+    def __init__(self, job: EquipmentImportJob):
+        super().__init__(compact=False)
+        self.job = job
+
+    def add_saved(self, index: int, instance) -> None:
+        self.saved_count += 1
+
+    def flush(self) -> None:
+        if self.failed_equipments:
+            EquipmentImportJobError.objects.bulk_create([
+                EquipmentImportJobError(job=self.job, index=error['index'], error=error['error'], data=error['data'])
+                for error in self.failed_equipments.values()
+            ])
+            self.failed_equipments.clear()
+        EquipmentImportJob.objects.filter(pk=self.job.pk).update(
+            count=self.count, saved=self.saved_count, failed=self.failed_count
+        )
+
+
+def fail_stale_import_jobs() -> int:
+    """
+        Перевод в статус failed заданий, выполняемых дольше IMPORT_JOB_TIMEOUT, возвращает их количество
+    """
+    now = timezone.now()
+    return EquipmentImportJob.objects.filter(
+        status=EquipmentImportJob.STATUS_RUNNING, started_at__lt=now - timedelta(seconds=settings.IMPORT_JOB_TIMEOUT)
+    ).update(
+        status=EquipmentImportJob.STATUS_FAILED, payload='', finished_at=now,
+        error=f'Import job was not finished in {settings.IMPORT_JOB_TIMEOUT} seconds (the worker was stopped)'
+    )
+
+
+def claim_import_job():
+    """
+        Очередное ожидающее задание (переводится в статус running), None - если заданий нет
+    """
+    with transaction.atomic():
+        job = EquipmentImportJob.objects.select_for_update(skip_locked=True) \
+            .filter(status=EquipmentImportJob.STATUS_PENDING).order_by('id').first()
+        if job is None:
+            return None
+        job.status = EquipmentImportJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def run_import_job(job: EquipmentImportJob) -> None:
+    """
+        Выполнение задания загрузки (ошибка разбора данных или сбой - статус failed с описанием ошибки). Результат
+        не записывается в задание, уже переведенное в статус failed по IMPORT_JOB_TIMEOUT
+    """
+    stream = io.BytesIO(job.payload.encode('utf-8'))
+    equipments = iterate_ndjson(stream) if job.content_type == NDJSON_MEDIA_TYPE else iterate_json(stream)
+    report = ImportJobReport(job)
+    try:
+        CreateEquipmentService.process(equipments, job.created_by_id, report)
+    except Exception as e:
+        job.status = EquipmentImportJob.STATUS_FAILED
+        job.error = str(getattr(e, 'detail', e)) or traceback.format_exc(limit=1)
+    else:
+        job.status = EquipmentImportJob.STATUS_DONE
+    job.count, job.saved, job.failed = report.count, report.saved_count, report.failed_count
+    job.payload = ''
+    job.finished_at = timezone.now()
+    updated = EquipmentImportJob.objects.filter(pk=job.pk, status=EquipmentImportJob.STATUS_RUNNING).update(
+        status=job.status, error=job.error, count=job.count, saved=job.saved, failed=job.failed, payload=job.payload,
+        finished_at=job.finished_at
+    )
+    if not updated:
+        job.refresh_from_db()
@@ -0,0 +1,91 @@
+"""
+    Нагрузочное сравнение контроллеров чтения (async-контроллеры под ASGI и синхронные под WSGI)
+
+    Команда отправляет запросы к уже запущенному серверу из нескольких потоков (по одному соединению keep-alive
+    на поток) и выводит пропускную способность и задержки. Сервер запускается отдельно, см. README
+"""
+import http.client
+import threading
+import time
+from urllib import parse
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def percentile(values: list, percent: float) -> float:
+    """
+        Перцентиль отсортированного списка (ближайшее значение)
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Measure throughput of read endpoints of a running server (ASGI with async views vs WSGI)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='URL of the running server')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Request path (repeat for several paths, default /api/equipment)')
+        parser.add_argument('--concurrency', type=int, default=32, help='Number of concurrent connections')
+        parser.add_argument('--requests', type=int, default=2000, help='Total number of requests per path')
+        parser.add_argument('--username', required=True, help='User whose access token authorizes the requests')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}', 'Accept': 'application/json'}
+
+        url = parse.urlsplit(options['base_url'])
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        concurrency = max(1, options['concurrency'])
+
+        for path in options['paths'] or ['/api/equipment']:
+            latencies, errors = list(), list()
+            lock = threading.Lock()
+            remaining = [options['requests']]
+
+            def worker():
+                connection = connection_class(url.hostname, url.port, timeout=60)
+                while True:
+                    with lock:
+                        if remaining[0] <= 0:
+                            break
+                        remaining[0] -= 1
+                    started = time.perf_counter()
+                    try:
+                        connection.request('GET', url.path.rstrip('/') + path, headers=headers)
+                        response = connection.getresponse()
+                        response.read()
+                        status = response.status
+                    except (OSError, http.client.HTTPException) as e:
+                        connection.close()
+                        status = str(e) or e.__class__.__name__
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                        if status != 200:
+                            errors.append(status)
+                connection.close()
+
+            threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            total = time.perf_counter() - started
+
+            latencies.sort()
+            self.stdout.write(
+                f'{path}: {len(latencies)} requests, concurrency {concurrency}, {total:.2f} s, '
+                f'{len(latencies) / total:.1f} req/s, latency p50 {percentile(latencies, 50) * 1000:.1f} ms, '
+                f'p95 {percentile(latencies, 95) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms'
+            )
+            if errors:
+                self.stdout.write(self.style.WARNING(f'{path}: {len(errors)} failed requests (first: {errors[0]})'))
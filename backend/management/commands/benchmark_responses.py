@@ -0,0 +1,129 @@
+"""
+    Сравнение затрат CPU на формирование схемы ответа: повторная валидация через сериализаторы ответов
+    (прежний способ) и прямая сборка (backend.responses)
+"""
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+
+from backend.models import Equipment
+from backend.responses import build_response
+from backend.serializers import EquipmentSerializer, PaginationListSerializer, EquipmentListSerializer, \
+    EquipmentDetailsSerializer
+
+
+def legacy_list_response(equipments: list) -> dict:
+    result = EquipmentSerializer(equipments, many=True).data
+    pagination_list_serializer = PaginationListSerializer(data=get_pagination_info(equipments))
+    pagination_list_serializer.is_valid()
+    return_serializer = EquipmentListSerializer(
+        data={
+            'retCode': 0,
+            'retMsg': 'Ok',
+            'result': result,
+            'retExtInfo': pagination_list_serializer.data,
+            'retTime': int(time.time() * 10 ** 3)
+        }
+    )
+    return_serializer.is_valid()
+    return return_serializer.initial_data
+
+
+def list_response(equipments: list) -> dict:
+    return build_response(EquipmentSerializer(equipments, many=True).data, get_pagination_info(equipments))
+
+
+def legacy_details_response(instance: Equipment) -> dict:
+    equipment_serializer = EquipmentSerializer(
+        data={
+            'id': instance.id,
+            'equipment_type': instance.equipment_type_id,
+            'serial_number': instance.serial_number,
+            'description': instance.description
+        },
+        instance=instance
+    )
+    equipment_serializer.is_valid()
+    return_serializer = EquipmentDetailsSerializer(
+        data={
+            'retCode': 0,
+            'retMsg': 'Ok',
+            'result': equipment_serializer.data,
+            'retExtInfo': '',
+            'retTime': int(time.time() * 10 ** 3)
+        }
+    )
+    return_serializer.is_valid()
+    return return_serializer.data
+
+
+def details_response(instance: Equipment) -> dict:
+    return build_response(EquipmentSerializer(instance).data)
+
+
+def get_pagination_info(equipments: list) -> dict:
+    return {
+        'count_items': len(equipments),
+        'items_per_page': len(equipments),
+        'start_item_index': 1,
+        'end_item_index': len(equipments),
+        'previous_page': None,
+        'current_page': 1,
+        'next_page': None,
+        'is_count_exact': True,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark CPU time of building API responses with and without re-validation of response serializers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Number of equipment in list response')
+        parser.add_argument('--repeat', type=int, default=50, help='Number of built responses for each case')
+
+    def handle(self, *args, **options):
+        equipments = list(Equipment.objects.select_related('equipment_type').filter(is_archived=False)
+                          [:options['page_size']])
+        if not equipments:
+            raise CommandError('There is no equipment in the database')
+
+        cases = (
+            (f'list ({len(equipments)} rows)', legacy_list_response, list_response, equipments),
+            ('details', legacy_details_response, details_response, equipments[0]),
+        )
+        renderer = JSONRenderer()
+        for name, legacy, fast, argument in cases:
+
+            # Ответы должны совпадать побайтово
+            with mock.patch('time.time', return_value=time.time()):
+                if renderer.render(legacy(argument)) != renderer.render(fast(argument)):
+                    raise CommandError(f'Responses differ: {name}')
+
+            legacy_cpu, legacy_queries = self.measure(legacy, argument, options['repeat'])
+            fast_cpu, fast_queries = self.measure(fast, argument, options['repeat'])
+            self.stdout.write(
+                f'{name}: re-validation {legacy_cpu:.2f} ms CPU, {legacy_queries} queries; '
+                f'direct {fast_cpu:.2f} ms CPU, {fast_queries} queries; '
+                f'saved {legacy_cpu - fast_cpu:.2f} ms CPU per request'
+            )
+
+    @staticmethod
+    def measure(build, argument, repeat: int) -> tuple:
+        """
+            Среднее время CPU (мс) и количество запросов к БД на одно формирование ответа
+        """
+        queries = list()
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            start = time.process_time()
+            for _ in range(repeat):
+                build(argument)
+            cpu = (time.process_time() - start) * 10 ** 3 / repeat
+        return cpu, len(queries) // repeat
@@ -0,0 +1,119 @@
+"""
+    Сравнение времени общего фильтра q списка оборудования: индексы поиска (backend.search) и прежний способ
+    (вхождение в имя типа, серийный номер и описание без индексов)
+
+    Измеряется то, что выполняет список: количество найденного и первая страница. --seed добавляет синтетическое
+    оборудование типа 'Benchmark' (детерминированно по --random-seed), чтобы замер повторялся на любой БД
+"""
+import random
+import string
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from backend.counts import invalidate_counts
+from backend.management.commands.benchmark_read_views import percentile
+from backend.models import Equipment, EquipmentType
+from backend.registry import equipment_type_registry
+from backend.search import search_equipments, index_equipments, INDEX_BATCH_SIZE
+
+BENCHMARK_TYPE_NAME = 'Benchmark'
+BENCHMARK_TYPE_MASK = 'XXXXXXXXXX'
+BENCHMARK_WORDS = ('core', 'switch', 'access', 'point', 'router', 'rack', 'floor', 'office', 'backup', 'uplink',
+                   'gateway', 'firewall', 'storage', 'server', 'camera', 'printer')
+DEFAULT_QUERIES = ('switch', 'core rack', 'stuv', 'benchmark', 'q1')
+
+
+def legacy_search_equipments(queryset, value: str):
+    return queryset.filter(Q(equipment_type__name__icontains=value) | Q(serial_number__icontains=value) |
+                           Q(description__icontains=value)).order_by('id')
+
+
+def seed_equipments(count: int, random_seed: int) -> int:
+    """
+        Добавление синтетического оборудования типа 'Benchmark' (с индексами поиска), возвращает количество
+    """
+    generator = random.Random(random_seed)
+    equipment_type, _ = EquipmentType.objects.get_or_create(
+        name=BENCHMARK_TYPE_NAME, defaults={'serial_number_mask': BENCHMARK_TYPE_MASK}
+    )
+    equipment_type_registry.invalidate()
+    existing = set(Equipment.objects.filter(equipment_type=equipment_type).values_list('serial_number', flat=True))
+    serial_numbers = dict()
+    while len(serial_numbers) < count:
+        serial_number = ''.join(generator.choices(string.ascii_uppercase + string.digits, k=len(BENCHMARK_TYPE_MASK)))
+        if serial_number not in existing:
+            serial_numbers[serial_number] = ' '.join(generator.sample(BENCHMARK_WORDS, 3))
+
+    last_id = Equipment.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    with transaction.atomic():
+        Equipment.objects.bulk_create(
+            [Equipment(equipment_type=equipment_type, serial_number=serial_number, description=description)
+             for serial_number, description in serial_numbers.items()],
+            batch_size=INDEX_BATCH_SIZE
+        )
+        # bulk_create в MySQL не возвращает ключи - новое оборудование индексируется порциями по ключу
+        while True:
+            equipments = list(Equipment.objects.filter(equipment_type=equipment_type, id__gt=last_id)
+                              .order_by('id').only('id', 'serial_number', 'description')[:INDEX_BATCH_SIZE])
+            if not equipments:
+                break
+            index_equipments(equipments, replace=False)
+            last_id = equipments[-1].id
+    invalidate_counts(Equipment)
+    return count
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the q filter of the equipment list: search indexes vs substring search without indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', action='append', dest='queries',
+                            help=f'Search string (repeat for several strings, default {", ".join(DEFAULT_QUERIES)})')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of searches for each case')
+        parser.add_argument('--seed', type=int, default=0,
+                            help=f"Number of synthetic equipment of type '{BENCHMARK_TYPE_NAME}' added before the run")
+        parser.add_argument('--random-seed', type=int, default=1, help='Random seed of synthetic equipment')
+
+    def handle(self, *args, **options):
+        if options['seed'] > 0:
+            count = seed_equipments(options['seed'], options['random_seed'])
+            self.stdout.write(f"Added {count} equipment of type '{BENCHMARK_TYPE_NAME}'")
+        total = Equipment.objects.filter(is_archived=False).count()
+        if not total:
+            raise CommandError('There is no equipment in the database (use --seed)')
+        self.stdout.write(f'{total} equipment, {options["repeat"]} searches for each case')
+
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        for value in options['queries'] or DEFAULT_QUERIES:
+            results = list()
+            for name, search in (('legacy', legacy_search_equipments), ('indexed', search_equipments)):
+                latencies, count, queries = self.measure(search, value, page_size, max(1, options['repeat']))
+                results.append(f'{name} {count} found, p50 {percentile(latencies, 50) * 1000:.1f} ms, '
+                               f'p95 {percentile(latencies, 95) * 1000:.1f} ms, {queries} queries')
+            self.stdout.write(f"q='{value}': " + '; '.join(results))
+
+    @staticmethod
+    def measure(search, value: str, page_size: int, repeat: int) -> tuple:
+        """
+            Отсортированные задержки (с) поиска (количество и первая страница), количество найденного и запросов к БД
+        """
+        latencies, queries = list(), list()
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        count = 0
+        with connection.execute_wrapper(count_query):
+            for _ in range(repeat):
+                started = time.perf_counter()
+                queryset = search(Equipment.objects.filter(is_archived=False), value)
+                count = queryset.count()
+                list(queryset.select_related('equipment_type')[:page_size])
+                latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        return latencies, count, len(queries) // repeat
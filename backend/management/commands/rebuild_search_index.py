@@ -0,0 +1,18 @@
+"""
+    Перестроение поисковых индексов оборудования (EquipmentSearchToken, EquipmentSerialNumberGram)
+"""
+from django.core.management.base import BaseCommand
+
+from backend.search import rebuild_index, INDEX_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Rebuild search indexes of equipment (used by the q and serial_number filters)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=INDEX_BATCH_SIZE,
+                            help='Number of equipment indexed in one batch')
+
+    def handle(self, *args, **options):
+        count = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Search indexes were rebuilt for {count} equipment'))
@@ -0,0 +1,33 @@
+"""
+    Процесс переноса архивированного оборудования в архив (EquipmentArchive)
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from backend.archive import move_archived_equipments
+
+
+class Command(BaseCommand):
+    help = 'Move archived equipment to the archive table (EquipmentArchive) in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Move all archived equipment and exit instead of waiting for new ones')
+        parser.add_argument('--chunk-size', type=int, default=settings.ARCHIVE_MOVER_CHUNK_SIZE,
+                            help='Number of equipment moved in one transaction')
+        parser.add_argument('--poll-interval', type=float, default=settings.ARCHIVE_MOVER_POLL_INTERVAL,
+                            help='Pause (seconds) when there is no archived equipment to move')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            count = move_archived_equipments(options['chunk_size'])
+            if count == 0:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            self.stdout.write(f'{count} equipment moved to archive')
@@ -0,0 +1,37 @@
+"""
+    Процесс выполнения заданий фоновой загрузки оборудования (EquipmentImportJob)
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from backend.jobs import claim_import_job, run_import_job, fail_stale_import_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run background import jobs of equipment (submitted with POST /api/equipment-import)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Run all pending jobs and exit instead of waiting for new ones')
+        parser.add_argument('--poll-interval', type=float, default=settings.IMPORT_WORKER_POLL_INTERVAL,
+                            help='Pause (seconds) when there are no pending jobs')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            failed = fail_stale_import_jobs()
+            if failed:
+                self.stdout.write(f'{failed} import job(s) failed by timeout of {settings.IMPORT_JOB_TIMEOUT} seconds')
+            job = claim_import_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            self.stdout.write(f'Import job {job.id} started')
+            run_import_job(job)
+            self.stdout.write(f'Import job {job.id} {job.status}: count={job.count}, saved={job.saved}, '
+                              f'failed={job.failed}')
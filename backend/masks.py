@@ -0,0 +1,85 @@
+"""
+    Маски серийных номеров
+
+    Маска типа оборудования компилируется в заякоренное регулярное выражение один раз
+    и кэшируется по ключу типа оборудования (до изменения маски типа)
+"""
+import re
+
+PATTERNS = {
+    'N': '[0-9]',
+    'a': '[a-z]',
+    'A': '[A-Z]',
+    'X': '[A-Z0-9]',
+    'Z': '[-_@]',
+}
+
+MASK_PATTERN = re.compile(r'[NAaXZ]+')
+
+# Выражение, которое ничему не соответствует (для маски с недопустимыми символами)
+NEVER_MATCH_PATTERN = re.compile(r'(?!)')
+
+
+def compile_serial_number_mask(serial_number_mask: str) -> re.Pattern:
+    """
+        Компиляция маски в регулярное выражение (проверка - через fullmatch)
+    """
+    if not is_valid_serial_number_mask(serial_number_mask):
+        return NEVER_MATCH_PATTERN
+    return re.compile(''.join([PATTERNS[c] for c in serial_number_mask]))
+
+
+def is_valid_serial_number_mask(serial_number_mask: str) -> bool:
+    """
+        Маска состоит только из допустимых символов
+    """
+    return MASK_PATTERN.fullmatch(serial_number_mask) is not None
+
+
+class SerialNumberMaskCache:
+    """
+        Кэш скомпилированных масок по ключу типа оборудования
+
+        Вместе с выражением хранится исходная маска: если маска типа изменилась (в том числе в другом процессе),
+        выражение перекомпилируется при следующем обращении
+    """
+
+    def __init__(self):
+        self._matchers = dict()
+
+    def get(self, equipment_type) -> re.Pattern:
+        """
+            Скомпилированная маска типа оборудования
+        """
+        cached = self._matchers.get(equipment_type.id, None)
+        if cached is None or cached[0] != equipment_type.serial_number_mask:
+            cached = (equipment_type.serial_number_mask, compile_serial_number_mask(equipment_type.serial_number_mask))
+            self._matchers[equipment_type.id] = cached
+        return cached[1]
+
+    def invalidate(self, equipment_type_id=None) -> None:
+        """
+            Сброс кэша для типа оборудования (или всего кэша)
+        """
+        if equipment_type_id is None:
+            self._matchers.clear()
+        else:
+            self._matchers.pop(equipment_type_id, None)
+
+
+serial_number_masks = SerialNumberMaskCache()
+
+
+def match_serial_number(equipment_type, serial_number: str) -> bool:
+    """
+        Проверка серийного номера по маске типа оборудования
+    """
+    return serial_number_masks.get(equipment_type).fullmatch(serial_number) is not None
+
+
+def match_serial_numbers(equipment_type, serial_numbers) -> list:
+    """
+        Пакетная проверка серийных номеров по маске типа оборудования (список признаков соответствия)
+    """
+    fullmatch = serial_number_masks.get(equipment_type).fullmatch
+    return [fullmatch(serial_number) is not None for serial_number in serial_numbers]
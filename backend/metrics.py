@@ -0,0 +1,420 @@
+"""
+    Метрики запросов: количество SQL-запросов и время БД, сервиса, сериализации, рендеринга и всего запроса
+
+    При METRICS_ENABLED MetricsMiddleware (первым в MIDDLEWARE) измеряет каждый запрос: SQL-запросы - через
+    execute_wrapper соединений, этапы - обертками, которые устанавливает install: execute и aexecute сервисов
+    (service), data и is_valid сериализаторов DRF и values_to_representation (serializer), рендеринг ответа
+    DRF и async-контроллеров (renderer). Результат - в гистограммах по маршруту и действию контроллера (GET /metrics,
+    формат Prometheus, только для адресов METRICS_ALLOWED_IPS) вместе со счетчиками кэша детальной информации и пула
+    соединений с БД, при METRICS_SERVER_TIMING - и в заголовке ответа Server-Timing.
+
+    Без METRICS_ENABLED ничего из этого не устанавливается. Метрики - в пределах процесса. Вложенные вызовы
+    одного этапа учитываются один раз, время этапа включает вложенные этапы (время сервиса - и БД, и сериализацию).
+    Тело потоковых ответов (выгрузка) формируется после ответа и не учитывается
+"""
+import contextvars
+import inspect
+import ipaddress
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METRICS_PREFIX = 'equipment'
+# Этапы запроса (порядок в Server-Timing)
+PHASES = ('service', 'serializer', 'renderer')
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Метрики текущего запроса (None - запрос не измеряется)
+_request_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+        Метрики запроса: SQL-запросы, время БД и этапов
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.action = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.timings = dict()
+        # Этапы, которые выполняются сейчас (вложенные вызовы не измеряются)
+        self.active = set()
+
+    def get_server_timing(self, total: float) -> str:
+        """
+            Значение заголовка Server-Timing (миллисекунды)
+        """
+        timings = [f'db;dur={self.db_time * 1000:.3f};desc="{self.queries} queries"']
+        timings.extend(f'{phase};dur={self.timings[phase] * 1000:.3f}' for phase in PHASES if phase in self.timings)
+        timings.append(f'total;dur={total * 1000:.3f}')
+        return ', '.join(timings)
+
+
+@contextmanager
+def measure(phase: str):
+    """
+        Измерение этапа phase в текущем запросе
+    """
+    metrics = _request_metrics.get()
+    if metrics is None or phase in metrics.active:
+        yield
+        return
+    metrics.active.add(phase)
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.active.discard(phase)
+        metrics.timings[phase] = metrics.timings.get(phase, 0.0) + time.perf_counter() - started_at
+
+
+def timed(func, phase: str):
+    """
+        Обертка функции (или async-функции) с измерением этапа phase
+    """
+    if iscoroutinefunction(func):
+        @wraps(func)
+        async def ainner(*args, **kwargs):
+            with measure(phase):
+                return await func(*args, **kwargs)
+
+        return ainner
+
+    @wraps(func)
+    def inner(*args, **kwargs):
+        with measure(phase):
+            return func(*args, **kwargs)
+
+    return inner
+
+
+def instrument(owner, name: str, phase: str) -> None:
+    """
+        Замена атрибута name класса owner (метод, staticmethod, classmethod или property) оберткой с измерением
+    """
+    attr = inspect.getattr_static(owner, name)
+    if isinstance(attr, property):
+        attr = property(timed(attr.fget, phase), attr.fset, attr.fdel, attr.__doc__)
+    elif isinstance(attr, (staticmethod, classmethod)):
+        attr = type(attr)(timed(attr.__func__, phase))
+    else:
+        attr = timed(attr, phase)
+    setattr(owner, name, attr)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """
+        Учет SQL-запроса в метриках текущего запроса (execute_wrappers соединения)
+    """
+    metrics = _request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started_at = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started_at
+
+
+def on_connection_created(sender, connection, **kwargs):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def install() -> None:
+    """
+        Установка измерений (при METRICS_ENABLED, из BackendConfig.ready)
+    """
+    from rest_framework.response import Response
+    from rest_framework.serializers import BaseSerializer
+
+    from backend import services
+    from backend.async_views import AsyncReadView
+    from backend.serializers import EquipmentSerializer
+
+    connection_created.connect(on_connection_created, dispatch_uid='backend.metrics')
+    for service_class in vars(services).values():
+        if inspect.isclass(service_class) and service_class.__module__ == services.__name__ and \
+                service_class.__name__.endswith('Service'):
+            for name in ('execute', 'aexecute'):
+                if name in vars(service_class):
+                    instrument(service_class, name, 'service')
+    instrument(BaseSerializer, 'data', 'serializer')
+    instrument(BaseSerializer, 'is_valid', 'serializer')
+    instrument(EquipmentSerializer, 'values_to_representation', 'serializer')
+    instrument(Response, 'rendered_content', 'renderer')
+    instrument(AsyncReadView, 'render', 'renderer')
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labelnames: tuple, labels: tuple, **extra) -> str:
+    pairs = [*zip(labelnames, labels), *extra.items()]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+def format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_metric(name: str, kind: str, documentation: str, samples) -> list:
+    """
+        Строки метрики в формате Prometheus (samples - пары (метки, значение))
+    """
+    lines = [f'# HELP {name} {documentation}', f'# TYPE {name} {kind}']
+    lines.extend(f'{name}{format_labels(tuple(labels), tuple(labels.values()))} {format_value(value)}'
+                 for labels, value in samples)
+    return lines
+
+
+class Counter:
+    """
+        Счетчик с метками
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values = dict()
+
+    def inc(self, labels: tuple, value: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def collect(self) -> list:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        lines.extend(f'{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}'
+                     for labels, value in values)
+        return lines
+
+
+class Histogram:
+    """
+        Гистограмма с метками (количество наблюдений по верхним границам buckets, сумма и количество)
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._values = dict()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels, None)
+            if entry is None:
+                entry = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def collect(self) -> list:
+        with self._lock:
+            values = sorted((labels, list(entry)) for labels, entry in self._values.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, entry in values:
+            count = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), entry):
+                count += bucket_count
+                le = bound if bound == '+Inf' else format_value(bound)
+                lines.append(f'{self.name}_bucket{format_labels(self.labelnames, labels, le=le)} {count}')
+            lines.append(f'{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(entry[-1])}')
+            lines.append(f'{self.name}_count{format_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+        Метрики запросов процесса по маршруту и действию контроллера
+    """
+
+    def __init__(self):
+        labelnames = ('route', 'action')
+        self.requests = Counter(f'{METRICS_PREFIX}_http_requests_total', 'Requests by route, action and status',
+                                (*labelnames, 'method', 'status'))
+        self.duration = Histogram(f'{METRICS_PREFIX}_http_request_duration_seconds', 'Total time of request',
+                                  labelnames, DURATION_BUCKETS)
+        self.db_duration = Histogram(f'{METRICS_PREFIX}_http_request_db_seconds', 'Time of SQL queries of request',
+                                     labelnames, DURATION_BUCKETS)
+        self.queries = Histogram(f'{METRICS_PREFIX}_http_request_queries', 'Number of SQL queries of request',
+                                 labelnames, QUERIES_BUCKETS)
+        self.phase_duration = Histogram(f'{METRICS_PREFIX}_http_request_phase_seconds',
+                                        'Time of request phase (service, serializer, renderer)',
+                                        (*labelnames, 'phase'), DURATION_BUCKETS)
+
+    def observe(self, route: str, action: str, method: str, status: int, total: float,
+                metrics: RequestMetrics) -> None:
+        labels = (route, action)
+        self.requests.inc((*labels, method, str(status)))
+        self.duration.observe(labels, total)
+        self.db_duration.observe(labels, metrics.db_time)
+        self.queries.observe(labels, metrics.queries)
+        for phase, value in metrics.timings.items():
+            self.phase_duration.observe((*labels, phase), value)
+
+    def collect(self) -> list:
+        lines = list()
+        for metric in (self.requests, self.duration, self.db_duration, self.queries, self.phase_duration):
+            lines.extend(metric.collect())
+        return lines
+
+
+registry = MetricsRegistry()
+
+
+def collect_details_cache() -> list:
+    """
+        Счетчики кэша детальной информации по оборудованию
+    """
+    from backend.caches import equipment_details_cache
+
+    stats = equipment_details_cache.stats()
+    name = f'{METRICS_PREFIX}_details_cache'
+    return [
+        *format_metric(f'{name}_hits_total', 'counter', 'Hits of equipment details cache', [({}, stats['hits'])]),
+        *format_metric(f'{name}_misses_total', 'counter', 'Misses of equipment details cache',
+                       [({}, stats['misses'])]),
+        *format_metric(f'{name}_invalidations_total', 'counter', 'Invalidations of equipment details cache',
+                       [({}, stats['invalidations'])]),
+        *format_metric(f'{name}_hit_ratio', 'gauge', 'Hit ratio of equipment details cache',
+                       [({}, stats['hit_ratio'])]),
+    ]
+
+
+def collect_db_pool() -> list:
+    """
+        Счетчики пулов соединений с БД (backend.db.pool) по псевдонимам БД
+    """
+    from backend.db.pool import get_pool_stats
+
+    pools = sorted(get_pool_stats().items())
+    if not pools:
+        return list()
+    name = f'{METRICS_PREFIX}_db_pool'
+    lines = format_metric(f'{name}_connections', 'gauge', 'Connections of pool by state',
+                          [({'alias': alias, 'state': state}, stats[state])
+                           for alias, stats in pools for state in ('open', 'idle', 'in_use')])
+    lines.extend(format_metric(f'{name}_size', 'gauge', 'Maximum connections of pool',
+                               [({'alias': alias}, stats['size']) for alias, stats in pools]))
+    for counter, documentation in (('connects', 'New connections of pool'),
+                                   ('reuses', 'Reused connections of pool'),
+                                   ('waits', 'Waits for a free connection of pool'),
+                                   ('wait_time', 'Time of waits for a free connection of pool (seconds)'),
+                                   ('timeouts', 'Timed out waits for a free connection of pool'),
+                                   ('health_check_failures', 'Failed health checks of idle connections of pool'),
+                                   ('recycles', 'Connections of pool reopened by age or changed parameters'),
+                                   ('discards', 'Connections closed instead of return to pool')):
+        metric_name = f'{name}_wait_seconds_total' if counter == 'wait_time' else f'{name}_{counter}_total'
+        lines.extend(format_metric(metric_name, 'counter', documentation,
+                                   [({'alias': alias}, stats[counter]) for alias, stats in pools]))
+    return lines
+
+
+def render_metrics() -> str:
+    """
+        Метрики процесса в формате Prometheus
+    """
+    return '\n'.join([*registry.collect(), *collect_details_cache(), *collect_db_pool()]) + '\n'
+
+
+def is_metrics_client(request) -> bool:
+    """
+        Адрес клиента (REMOTE_ADDR) входит в METRICS_ALLOWED_IPS (адреса и сети)
+    """
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_IPS)
+
+
+def get_route(request) -> str:
+    """
+        Маршрут запроса (имя маршрута или шаблон URL)
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+def get_action(view_func, method: str) -> str:
+    """
+        Действие контроллера (ViewSet DRF или async-контроллер с delegate), иначе - метод HTTP
+    """
+    actions = getattr(view_func, 'actions', None)
+    if actions is None:
+        delegate = getattr(view_func, 'view_initkwargs', dict()).get('delegate', None)
+        actions = getattr(delegate, 'actions', None)
+    method = method.lower()
+    return actions.get(method, method) if actions else method
+
+
+class MetricsMiddleware:
+    """
+        Измерение запроса: заголовок Server-Timing и метрики процесса (GET /metrics)
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _request_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _request_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _request_metrics.get()
+        if metrics is not None:
+            metrics.action = get_action(view_func, request.method)
+        return None
+
+    @staticmethod
+    def finish(request, response, metrics: RequestMetrics):
+        total = time.perf_counter() - metrics.started_at
+        registry.observe(get_route(request), metrics.action or request.method.lower(), request.method,
+                         response.status_code, total, metrics)
+        if settings.METRICS_SERVER_TIMING:
+            response.headers['Server-Timing'] = metrics.get_server_timing(total)
+        return response
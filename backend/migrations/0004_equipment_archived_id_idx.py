@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0003_alter_equipment_description_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='equipment',
+            options={'ordering': ['id'], 'verbose_name': 'Equipment', 'verbose_name_plural': 'Equipment'},
+        ),
+        migrations.AlterModelOptions(
+            name='equipmenttype',
+            options={'ordering': ['name'], 'verbose_name': 'Type of equipment', 'verbose_name_plural': 'Type of equipment'},
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['is_archived', 'id'], name='equ__archived_id__idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from backend.search import get_equipment_tokens, INDEX_BATCH_SIZE
+
+
+def build_search_index(apps, schema_editor):
+    Equipment = apps.get_model('backend', 'Equipment')
+    EquipmentSearchToken = apps.get_model('backend', 'EquipmentSearchToken')
+    last_id = 0
+    while True:
+        equipments = list(Equipment.objects.filter(is_archived=False, id__gt=last_id).order_by('id')
+                          .only('id', 'serial_number', 'description')[:INDEX_BATCH_SIZE])
+        if not equipments:
+            return
+        EquipmentSearchToken.objects.bulk_create(
+            [EquipmentSearchToken(equipment_id=equipment.pk, token=token, weight=weight)
+             for equipment in equipments for token, weight in get_equipment_tokens(equipment).items()]
+        )
+        last_id = equipments[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_equipment_archived_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=50, verbose_name='Token')),
+                ('weight', models.PositiveSmallIntegerField(verbose_name='Weight of token')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='backend.equipment', verbose_name='Equipment')),
+            ],
+            options={
+                'verbose_name': 'Search token of equipment',
+                'verbose_name_plural': 'Search tokens of equipment',
+                'indexes': [models.Index(fields=['token', 'equipment'], name='equ_sch_tkn__token_equ__idx')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from backend.search import get_grams, INDEX_BATCH_SIZE
+
+
+def build_serial_number_grams(apps, schema_editor):
+    Equipment = apps.get_model('backend', 'Equipment')
+    EquipmentSerialNumberGram = apps.get_model('backend', 'EquipmentSerialNumberGram')
+    last_id = 0
+    while True:
+        equipments = list(Equipment.objects.filter(is_archived=False, id__gt=last_id).order_by('id')
+                          .only('id', 'serial_number')[:INDEX_BATCH_SIZE])
+        if not equipments:
+            return
+        EquipmentSerialNumberGram.objects.bulk_create(
+            [EquipmentSerialNumberGram(equipment_id=equipment.pk, gram=gram)
+             for equipment in equipments for gram in get_grams(equipment.serial_number)]
+        )
+        last_id = equipments[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_equipmentsearchtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentSerialNumberGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3, verbose_name='Trigram of serial number')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='serial_number_grams', to='backend.equipment', verbose_name='Equipment')),
+            ],
+            options={
+                'verbose_name': 'Trigram of serial number of equipment',
+                'verbose_name_plural': 'Trigrams of serial numbers of equipment',
+                'indexes': [models.Index(fields=['gram', 'equipment'], name='equ_sn_grm__gram_equ__idx')],
+            },
+        ),
+        migrations.RunPython(build_serial_number_grams, migrations.RunPython.noop),
+    ]
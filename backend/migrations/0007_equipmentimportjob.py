@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('backend', '0006_equipmentserialnumbergram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status')),
+                ('content_type', models.CharField(max_length=100, verbose_name='Media type of payload')),
+                ('payload', models.TextField(blank=True, verbose_name='Payload (cleared when the job is finished)')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count of processed items')),
+                ('saved', models.PositiveIntegerField(default=0, verbose_name='Count of saved items')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Count of failed items')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error of job')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished at')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Created by')),
+            ],
+            options={
+                'verbose_name': 'Import job of equipment',
+                'verbose_name_plural': 'Import jobs of equipment',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EquipmentImportJobError',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='Index of item in input set')),
+                ('error', models.TextField(verbose_name='Error message')),
+                ('data', models.TextField(verbose_name='Item data')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='errors', to='backend.equipmentimportjob', verbose_name='Import job')),
+            ],
+            options={
+                'verbose_name': 'Error of import job of equipment',
+                'verbose_name_plural': 'Errors of import jobs of equipment',
+                'ordering': ['index'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='equipmentimportjoberror',
+            constraint=models.UniqueConstraint(fields=('job', 'index'), name='equ_imp_job_err__job_index__unq'),
+        ),
+        migrations.AddIndex(
+            model_name='equipmentimportjob',
+            index=models.Index(fields=['status', 'id'], name='equ_imp_job__status_id__idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('backend', '0007_equipmentimportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('serial_number', models.CharField(max_length=50, verbose_name='Serial number of equipment')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Description of equipment')),
+                ('created_at', models.DateTimeField(verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(verbose_name='Updated at')),
+                ('archived_at', models.DateTimeField(verbose_name='Moved to archive at')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created by')),
+                ('equipment_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_equipments', to='backend.equipmenttype', verbose_name='Type of equipment')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Updated by')),
+            ],
+            options={
+                'verbose_name': 'Archived equipment',
+                'verbose_name_plural': 'Archived equipment',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['equipment_type', 'serial_number'], name='equ_arc__type_sn__idx')],
+            },
+        ),
+    ]
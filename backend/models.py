@@ -53,6 +53,10 @@ class Equipment(models.Model):
                 fields=['is_archived', 'equipment_type', 'serial_number'],
                 name='equ__type_serial_number__idx'
             ),
+            Index(
+                fields=['is_archived', 'id'],
+                name='equ__archived_id__idx'
+            ),
         )
         constraints = [
             models.UniqueConstraint(
@@ -61,3 +65,129 @@ class Equipment(models.Model):
             ),
         ]
 
+
+class EquipmentArchive(models.Model):
+    """
+        Архивное оборудование (холодная таблица)
+
+        Архивированное оборудование (Equipment.is_archived) переносится сюда процессом run_archive_mover с тем же
+        ключом, таблица оборудования и ее индексы содержат только действующее оборудование
+    """
+    # Признак архивного оборудования (как у Equipment, для сообщений об уникальности)
+    is_archived = True
+
+    id = models.BigIntegerField(primary_key=True, verbose_name='ID')
+    equipment_type = models.ForeignKey('EquipmentType', on_delete=models.PROTECT, related_name='archived_equipments',
+                                       verbose_name='Type of equipment')
+    serial_number = models.CharField(max_length=50, verbose_name='Serial number of equipment')
+    description = models.TextField(verbose_name='Description of equipment', null=True, blank=True)
+    created_at = models.DateTimeField(verbose_name='Created at')
+    updated_at = models.DateTimeField(verbose_name='Updated at')
+    created_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='archived_created_by',
+                                   null=True, blank=True, verbose_name='Created by')
+    updated_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='archived_updated_by',
+                                   null=True, blank=True, verbose_name='Updated by')
+    archived_at = models.DateTimeField(verbose_name='Moved to archive at')
+
+    class Meta:
+        verbose_name = 'Archived equipment'
+        verbose_name_plural = 'Archived equipment'
+        ordering = ['id']
+        indexes = (
+            Index(
+                fields=['equipment_type', 'serial_number'],
+                name='equ_arc__type_sn__idx'
+            ),
+        )
+
+
+class EquipmentSearchToken(models.Model):
+    """
+        Поисковый токен оборудования (индекс для общего поиска q по серийному номеру и описанию)
+    """
+    equipment = models.ForeignKey('Equipment', on_delete=models.CASCADE, related_name='search_tokens',
+                                  verbose_name='Equipment')
+    token = models.CharField(max_length=50, verbose_name='Token')
+    weight = models.PositiveSmallIntegerField(verbose_name='Weight of token')
+
+    class Meta:
+        verbose_name = 'Search token of equipment'
+        verbose_name_plural = 'Search tokens of equipment'
+        indexes = (
+            Index(fields=['token', 'equipment'], name='equ_sch_tkn__token_equ__idx'),
+        )
+
+
+class EquipmentSerialNumberGram(models.Model):
+    """
+        Триграмма серийного номера оборудования (индекс для фильтра serial_number по вхождению)
+    """
+    equipment = models.ForeignKey('Equipment', on_delete=models.CASCADE, related_name='serial_number_grams',
+                                  verbose_name='Equipment')
+    gram = models.CharField(max_length=3, verbose_name='Trigram of serial number')
+
+    class Meta:
+        verbose_name = 'Trigram of serial number of equipment'
+        verbose_name_plural = 'Trigrams of serial numbers of equipment'
+        indexes = (
+            Index(fields=['gram', 'equipment'], name='equ_sn_grm__gram_equ__idx'),
+        )
+
+
+class EquipmentImportJob(models.Model):
+    """
+        Задание фоновой загрузки оборудования (выполняется командой run_import_worker)
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUSES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    status = models.CharField(max_length=10, choices=STATUSES, default=STATUS_PENDING, verbose_name='Status')
+    content_type = models.CharField(max_length=100, verbose_name='Media type of payload')
+    payload = models.TextField(blank=True, verbose_name='Payload (cleared when the job is finished)')
+    count = models.PositiveIntegerField(default=0, verbose_name='Count of processed items')
+    saved = models.PositiveIntegerField(default=0, verbose_name='Count of saved items')
+    failed = models.PositiveIntegerField(default=0, verbose_name='Count of failed items')
+    error = models.TextField(null=True, blank=True, verbose_name='Error of job')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created at')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Started at')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Finished at')
+    created_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='import_jobs',
+                                   verbose_name='Created by')
+
+    class Meta:
+        verbose_name = 'Import job of equipment'
+        verbose_name_plural = 'Import jobs of equipment'
+        ordering = ['id']
+        indexes = (
+            Index(fields=['status', 'id'], name='equ_imp_job__status_id__idx'),
+        )
+
+
+class EquipmentImportJobError(models.Model):
+    """
+        Ошибочная входящая запись задания фоновой загрузки оборудования
+    """
+    job = models.ForeignKey('EquipmentImportJob', on_delete=models.CASCADE, related_name='errors',
+                            verbose_name='Import job')
+    index = models.PositiveIntegerField(verbose_name='Index of item in input set')
+    error = models.TextField(verbose_name='Error message')
+    data = models.TextField(verbose_name='Item data')
+
+    class Meta:
+        verbose_name = 'Error of import job of equipment'
+        verbose_name_plural = 'Errors of import jobs of equipment'
+        ordering = ['index']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['job', 'index'],
+                name='equ_imp_job_err__job_index__unq'
+            ),
+        ]
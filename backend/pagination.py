@@ -1,7 +1,107 @@
+from base64 import b64encode
+from functools import partial
+from urllib import parse
+
+from django.core.paginator import Paginator, InvalidPage, Page
+from django.utils.functional import cached_property
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+
+from backend.counts import ResultCounter
+
+
+class CountedPaginator(Paginator):
+    """
+        Пагинатор, получающий количество записей через ResultCounter (кэш / оценка) вместо COUNT(*) на каждый запрос
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, counter=None):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.counter = counter
+
+    @cached_property
+    def count(self):
+        if self.counter is None:
+            return super().count
+        return self.counter.count(self.object_list)
+
+    @property
+    def is_count_exact(self) -> bool:
+        return self.counter is None or self.counter.is_exact
 
 
 class EquipmentPageNumberPagination(pagination.PageNumberPagination):
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(CountedPaginator, counter=ResultCounter(request, view))
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None, scope: str = None) -> list:
+        """
+            Пагинация для async-контроллеров (количество и строки страницы читаются через async ORM)
+        """
+        self.request = request
+        counter = ResultCounter(request, view, scope=scope)
+        paginator = CountedPaginator(queryset, self.page_size, counter=counter)
+        paginator.count = await counter.acount(queryset)
+
+        page_number = request.GET.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        # Границы страницы - как в Paginator.page()
+        bottom = (number - 1) * paginator.per_page
+        top = bottom + paginator.per_page
+        if top + paginator.orphans >= paginator.count:
+            top = paginator.count
+        rows = [row async for row in queryset[bottom:top]]
+        self.page = Page(rows, number, paginator)
+        return rows
+
+    def get_paginated_response_schema(self, schema):
+        # Уберем алгоритм формирования OpenAPI схемы от данного класса - схема будет от сериализатора
+        return schema['items']
+
+
+class EquipmentCursorPagination(pagination.CursorPagination):
+    """
+        Курсорная (keyset) пагинация по ключу: WHERE id > <позиция> ORDER BY id LIMIT <размер страницы + 1>
+
+        Включается параметром запроса cursor (пустое значение - первая страница).
+        Курсоры следующей и предыдущей страниц отдаются непрозрачной строкой, а не ссылкой
+    """
+    ordering = 'id'
+    cursor_query_param = 'cursor'
+
+    def encode_cursor(self, cursor):
+        # Кодируем курсор так же, как DRF, но без подстановки в URL
+        tokens = {}
+        if cursor.offset != 0:
+            tokens['o'] = str(cursor.offset)
+        if cursor.reverse:
+            tokens['r'] = '1'
+        if cursor.position is not None:
+            tokens['p'] = cursor.position
+
+        querystring = parse.urlencode(tokens, doseq=True)
+        return b64encode(querystring.encode('ascii')).decode('ascii')
+
+    def get_next_cursor(self):
+        return self.get_next_link()
+
+    def get_previous_cursor(self):
+        return self.get_previous_link()
+
     def get_paginated_response_schema(self, schema):
         # Уберем алгоритм формирования OpenAPI схемы от данного класса - схема будет от сериализатора
         return schema['items']
+
+
+class EquipmentImportJobErrorCursorPagination(EquipmentCursorPagination):
+    """
+        Курсорная пагинация ошибок задания фоновой загрузки (по индексу входящей записи)
+    """
+    ordering = 'index'
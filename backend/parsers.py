@@ -0,0 +1,190 @@
+"""
+    Разбор входящего JSON
+
+    1. Быстрый разбор всего тела (orjson, если не установлен - стандартная реализация DRF)
+    2. Потоковый разбор больших тел (массив JSON, NDJSON) по одному элементу: в памяти не больше блока чтения
+       и текущего элемента
+"""
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.json import strict_constant
+
+from backend.renderers import FastJSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# Форматы тела запроса, которые разбираются потоково
+STREAM_MEDIA_TYPES = ('application/json', NDJSON_MEDIA_TYPE)
+
+# Размер блока чтения тела запроса и предельный размер одного элемента при потоковом разборе
+STREAM_BLOCK_SIZE = 64 * 1024
+STREAM_MAX_ITEM_SIZE = 1024 * 1024
+
+JSON_WHITESPACE = ' \t\n\r'
+
+
+def get_media_type(content_type: str) -> str:
+    """
+        Тип содержимого без параметров (charset и т.п.)
+    """
+    return content_type.split(';')[0].strip().lower()
+
+
+def loads(data):
+    """
+        Разбор одного значения JSON (orjson, если установлен)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data, parse_constant=strict_constant)
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+        Парсер JSON на orjson (NaN/Infinity отклоняются, как в JSONParser со STRICT_JSON)
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class NDJSONParser(parsers.BaseParser):
+    """
+        Парсер NDJSON (одно значение JSON на строку, пустые строки пропускаются) - в список значений
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        items = list()
+        for item in iterate_ndjson(stream, encoding):
+            if isinstance(item, ParseError):
+                raise item
+            items.append(item)
+        return items
+
+
+def iterate_ndjson(stream, encoding: str = 'utf-8'):
+    """
+        Потоковый разбор NDJSON по строкам
+
+        Строка, которая не разбирается, возвращается как исключение ParseError (разбор продолжается со следующей строки)
+    """
+    for number, line in enumerate(iter(stream.readline, b''), start=1):
+        try:
+            line = line.decode(encoding).strip()
+            if line:
+                yield loads(line)
+        except ValueError as exc:
+            yield ParseError('JSON parse error - line %d: %s' % (number, str(exc)))
+
+
+def iterate_json(stream, encoding: str = 'utf-8'):
+    """
+        Потоковый разбор JSON: элементы массива по одному (единичное значение - как массив из одного элемента)
+
+        Ошибка синтаксиса возвращается последним элементом как исключение ParseError (дальше тело не разбирается)
+    """
+    try:
+        yield from JSONArrayReader(stream, encoding)
+    except ParseError as exc:
+        yield exc
+
+
+class JSONArrayReader:
+    """
+        Потоковое чтение массива JSON из тела запроса блоками по STREAM_BLOCK_SIZE
+    """
+
+    def __init__(self, stream, encoding: str = 'utf-8'):
+        self.reader = codecs.getreader(encoding)(stream)
+        self.decode = json.JSONDecoder(parse_constant=strict_constant).raw_decode
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def __iter__(self):
+        if self.next_char() != '[':
+            yield self.decode_value()
+            self.expect_end()
+            return
+        self.position += 1
+        if self.next_char() == ']':
+            self.position += 1
+            self.expect_end()
+            return
+        while True:
+            yield self.decode_value()
+            char = self.next_char()
+            self.position += 1
+            if char == ']':
+                self.expect_end()
+                return
+            if char != ',':
+                raise ParseError("JSON parse error - Expecting ',' delimiter")
+
+    def read_block(self) -> None:
+        block = self.reader.read(STREAM_BLOCK_SIZE)
+        self.eof = not block
+        self.buffer = self.buffer[self.position:] + block
+        self.position = 0
+
+    def next_char(self) -> str:
+        """
+            Очередной значимый символ (пробельные пропускаются), пустая строка - конец тела
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in JSON_WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                return ''
+            self.read_block()
+
+    def decode_value(self):
+        """
+            Очередное значение: если оно не помещается в прочитанные блоки, дочитывается следующий блок
+        """
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decode(self.buffer, self.position)
+            except json.JSONDecodeError as exc:
+                if self.eof or len(self.buffer) - self.position > STREAM_MAX_ITEM_SIZE:
+                    raise ParseError('JSON parse error - %s' % str(exc))
+                self.read_block()
+                continue
+            except ValueError as exc:
+                raise ParseError('JSON parse error - %s' % str(exc))
+            # Число в конце буфера может продолжаться в следующем блоке
+            if end == len(self.buffer) and not self.eof:
+                self.read_block()
+                continue
+            self.position = end
+            return value
+
+    def expect_end(self) -> None:
+        if self.next_char():
+            raise ParseError('JSON parse error - Extra data')
@@ -32,7 +32,8 @@ class EquipmentPermission(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method == 'OPTIONS':
             return True
-        if view.action in ['list', 'create', 'retrieve', 'update', 'destroy']:
+        if view.action in ['list', 'export', 'create', 'bulk_update', 'bulk_archive', 'bulk_restore',
+                           'retrieve', 'update', 'destroy']:
             return request.user.is_authenticated
         else:
             return False
@@ -44,3 +45,19 @@ class EquipmentPermission(permissions.BasePermission):
             return request.user.is_authenticated
         else:
             return False
+
+
+class EquipmentImportJobPermission(permissions.BasePermission):
+    """
+        Раздача привилегий для методов для заданий фоновой загрузки оборудования
+
+        Постановка, состояние и ошибки - авторизованным (доступ к чужим заданиям ограничивается в сервисе)
+    """
+
+    def has_permission(self, request, view):
+        if request.method == 'OPTIONS':
+            return True
+        if view.action in ['create', 'retrieve', 'errors']:
+            return request.user.is_authenticated
+        else:
+            return False
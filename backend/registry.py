@@ -0,0 +1,106 @@
+"""
+    Реестр типов оборудования в памяти процесса
+
+    Таблица типов маленькая и меняется редко: типы загружаются целиком одним запросом и хранятся в процессе
+    (по ключу и по имени в нижнем регистре, маски компилируются при загрузке). Актуальность проверяется по версии
+    данных типов (backend.counts, ее меняют сервисы создания и изменения типа) - одно обращение к кэшу без запросов
+    к БД. Кроме того, реестр перечитывается не реже раза в EQUIPMENT_TYPE_REGISTRY_MAX_AGE секунд: при локальном кэше
+    (CACHES) изменения, сделанные другими процессами, по версии не видны.
+
+    Снимок может отставать, поэтому проверки при записи ему не доверяют отсутствие типа (тип ищется в БД,
+    PreloadedEquipmentTypeField) и уникальность имени (проверяется запросом к БД)
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from backend.counts import get_count_version, aget_count_version
+from backend.masks import serial_number_masks
+from backend.models import EquipmentType
+
+
+class EquipmentTypeSnapshot:
+    """
+        Загруженные типы оборудования (не изменяется после загрузки)
+    """
+
+    def __init__(self, equipment_types: list, version: int):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.types = {equipment_type.id: equipment_type for equipment_type in equipment_types}
+        self.names = {equipment_type.id: equipment_type.name for equipment_type in equipment_types}
+        self.ids_by_name = {equipment_type.name.lower(): equipment_type.id for equipment_type in equipment_types}
+        for equipment_type in equipment_types:
+            serial_number_masks.get(equipment_type)
+
+    def get(self, pk):
+        """
+            Тип оборудования по ключу (None - такого типа нет)
+        """
+        return self.types.get(pk, None)
+
+    def get_by_name(self, name: str):
+        """
+            Тип оборудования по имени без учета регистра (None - такого типа нет)
+        """
+        pk = self.ids_by_name.get(name.lower(), None)
+        return None if pk is None else self.types[pk]
+
+    def is_actual(self, version: int) -> bool:
+        return self.version == version and time.monotonic() - self.loaded_at < settings.EQUIPMENT_TYPE_REGISTRY_MAX_AGE
+
+
+class EquipmentTypeRegistry:
+    """
+        Реестр типов оборудования: актуальный снимок типов (перечитывается при изменении версии данных типов)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def get_snapshot(self) -> EquipmentTypeSnapshot:
+        # Версия читается до загрузки: изменение во время загрузки приведет к повторной загрузке при следующем обращении
+        version = get_count_version(EquipmentType)
+        snapshot = self._snapshot
+        if snapshot is None or not snapshot.is_actual(version):
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or not snapshot.is_actual(version):
+                    snapshot = EquipmentTypeSnapshot(list(EquipmentType.objects.all()), version)
+                    self._snapshot = snapshot
+        return snapshot
+
+    async def aget_snapshot(self) -> EquipmentTypeSnapshot:
+        """
+            Актуальный снимок типов (для async-контроллеров)
+        """
+        version = await aget_count_version(EquipmentType)
+        snapshot = self._snapshot
+        if snapshot is None or not snapshot.is_actual(version):
+            snapshot = EquipmentTypeSnapshot([equipment_type async for equipment_type in EquipmentType.objects.all()],
+                                             version)
+            self._snapshot = snapshot
+        return snapshot
+
+    def get(self, pk):
+        """
+            Тип оборудования по ключу (None - такого типа нет)
+        """
+        return self.get_snapshot().get(pk)
+
+    def get_by_name(self, name: str):
+        """
+            Тип оборудования по имени без учета регистра (None - такого типа нет)
+        """
+        return self.get_snapshot().get_by_name(name)
+
+    def invalidate(self) -> None:
+        """
+            Сброс реестра процесса (следующее обращение загрузит типы заново)
+        """
+        self._snapshot = None
+
+
+equipment_type_registry = EquipmentTypeRegistry()
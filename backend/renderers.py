@@ -0,0 +1,53 @@
+"""
+    Быстрая сериализация JSON (orjson)
+
+    Если orjson не установлен, используется стандартная реализация DRF (json + encoders.JSONEncoder).
+    Даты/время, UUID, подклассы dict/list/str (ReturnDict, ErrorDetail) orjson сериализует сам,
+    обращение к JSONEncoder DRF остается только для типов, которых orjson не знает (Decimal, lazy-строки и т.п.)
+"""
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Символы, которые DRF экранирует для совместимости с JavaScript (U+2028, U+2029)
+LINE_SEPARATOR = '\u2028'.encode('utf-8')
+PARAGRAPH_SEPARATOR = '\u2029'.encode('utf-8')
+
+
+def default(obj):
+    """
+        Типы, которые orjson не сериализует сам (Decimal, lazy-строки, QuerySet и т.п.) - как в JSONEncoder DRF
+    """
+    return encoders.JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+        Рендерер JSON на orjson (формат ответа совпадает с JSONRenderer: компактный, без экранирования не-ASCII)
+    """
+
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        # Форматированный вывод (Accept: application/json; indent=4, Browsable API) - стандартной реализацией
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=default, option=self.options)
+        except orjson.JSONEncodeError:
+            # Целые вне диапазона 64 бит и т.п. - стандартной реализацией (она же сформирует исключение)
+            return super().render(data, accepted_media_type, renderer_context)
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
@@ -0,0 +1,188 @@
+"""
+    Чтение с реплик БД (DATABASE_REPLICAS)
+
+    Сервисы чтения списка, детальной информации и выгрузки оборудования (декоратор replica_read) читают с одной
+    из реплик, остальные запросы (запись, проверки при записи, аутентификация) - с основной БД. Маршрутизацию
+    выполняет ReplicaRouter (DATABASE_ROUTERS) по реплике, выбранной для текущего сервиса (contextvars - работает
+    и в async-контроллерах).
+
+    Чтение своих изменений: после запроса с записью (ReplicaRouter.db_for_write) пользователь читает с основной БД
+    DATABASE_REPLICA_STICKY_TIMEOUT секунд (отметка в кэше, ее ставит ReplicaStickinessMiddleware). На тот же срок
+    после изменения данных прочитанное с реплики не записывается в кэши (количество, детальная информация): реплика
+    может отставать
+"""
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_KEY_PREFIX = 'db:primary'
+
+# Реплика чтения текущего сервиса (None - основная БД)
+_replica = contextvars.ContextVar('replica', default=None)
+# Состояние текущего запроса (ReplicaStickinessMiddleware)
+_request_state = contextvars.ContextVar('replica_request_state', default=None)
+
+
+class ReplicaRequestState:
+    """
+        Состояние запроса: была ли запись в основную БД
+    """
+
+    def __init__(self):
+        self.written = False
+
+
+def get_sticky_key(user_id) -> str:
+    return f'{STICKY_KEY_PREFIX}:{user_id}'
+
+
+def stick_to_primary(user_id) -> None:
+    """
+        Чтение пользователя - с основной БД (после записи, на DATABASE_REPLICA_STICKY_TIMEOUT секунд)
+    """
+    cache.set(get_sticky_key(user_id), True, timeout=settings.DATABASE_REPLICA_STICKY_TIMEOUT)
+
+
+def is_request_written() -> bool:
+    state = _request_state.get()
+    return state is not None and state.written
+
+
+def get_replica(request):
+    """
+        Реплика для чтения в запросе (None - основная БД: реплик нет, пользователь недавно изменял данные или
+        запрос уже писал в основную БД)
+    """
+    if not settings.DATABASE_REPLICAS or is_request_written():
+        return None
+    user_id = getattr(getattr(request, 'user', None), 'pk', None)
+    if user_id is not None and cache.get(get_sticky_key(user_id), False):
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+async def aget_replica(request):
+    """
+        Реплика для чтения в запросе (для async-контроллеров)
+    """
+    if not settings.DATABASE_REPLICAS or is_request_written():
+        return None
+    user_id = getattr(getattr(request, 'user', None), 'pk', None)
+    if user_id is not None and await cache.aget(get_sticky_key(user_id), False):
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+@contextmanager
+def use_replica(alias):
+    """
+        Чтение в блоке - с реплики alias (None - с основной БД)
+    """
+    token = _replica.set(alias)
+    try:
+        yield alias
+    finally:
+        _replica.reset(token)
+
+
+def replica_read(func):
+    """
+        Декоратор сервиса чтения (execute(request, view, ...) или aexecute): чтение - с реплики
+    """
+    if iscoroutinefunction(func):
+        @wraps(func)
+        async def ainner(request, *args, **kwargs):
+            with use_replica(await aget_replica(request)):
+                return await func(request, *args, **kwargs)
+
+        return ainner
+
+    @wraps(func)
+    def inner(request, *args, **kwargs):
+        with use_replica(get_replica(request)):
+            return func(request, *args, **kwargs)
+
+    return inner
+
+
+def is_replica_read() -> bool:
+    return _replica.get() is not None
+
+
+def is_settled(version: int) -> bool:
+    """
+        Данные версии version (backend.counts) уже есть на репликах (изменены раньше окна привязки к основной БД)
+    """
+    return time.time_ns() - version >= settings.DATABASE_REPLICA_STICKY_TIMEOUT * 10 ** 9
+
+
+class ReplicaRouter:
+    """
+        Маршрутизация запросов к БД: чтение в сервисах чтения - с реплики, остальное - с основной БД
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+
+class ReplicaStickinessMiddleware:
+    """
+        Привязка пользователя к основной БД после запроса с записью (чтение своих изменений)
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = ReplicaRequestState()
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state.written:
+            self.stick(request)
+        return response
+
+    async def __acall__(self, request):
+        state = ReplicaRequestState()
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state.written:
+            # Пользователь сессии (AuthenticationMiddleware) загружается из БД синхронно
+            await sync_to_async(self.stick)(request)
+        return response
+
+    @staticmethod
+    def stick(request) -> None:
+        # Пользователь запроса (JWT) известен после выполнения контроллера DRF
+        user = getattr(request, 'user', None)
+        if settings.DATABASE_REPLICAS and user is not None and user.is_authenticated:
+            stick_to_primary(user.pk)
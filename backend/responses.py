@@ -0,0 +1,73 @@
+"""
+    Формирование схемы ответа
+
+    Схема ответа (retCode, retMsg, result, retExtInfo, retTime) собирается напрямую из уже сериализованных данных,
+    без повторной валидации через сериализаторы ответов (они остаются для описания OpenAPI схемы)
+"""
+import time
+
+from rest_framework.viewsets import ModelViewSet
+
+
+def build_response(result, ret_ext_info='', ret_msg: str = 'Ok', ret_code: int = 0) -> dict:
+    """
+        Схема ответа
+    """
+    return {
+        'retCode': ret_code,
+        'retMsg': ret_msg,
+        'result': result,
+        'retExtInfo': ret_ext_info,
+        'retTime': int(time.time() * 10 ** 3)
+    }
+
+
+def build_pagination_info(view: ModelViewSet, page) -> dict:
+    """
+        Дополнительная информация по результатам пагинации (схема PaginationListSerializer)
+    """
+    if page is None:
+        count = view.paginator.count
+        return {
+            'count_items': count,
+            'items_per_page': view.paginator.per_page,
+            'start_item_index': 0 if count == 0 else 1,
+            'end_item_index': count,
+            'previous_page': None,
+            'current_page': 1,
+            'next_page': None,
+            'is_count_exact': True,
+        }
+    return build_page_info(view.paginator.page)
+
+
+def build_page_info(django_page) -> dict:
+    """
+        Дополнительная информация по странице пагинатора CountedPaginator (схема PaginationListSerializer)
+    """
+    return {
+        'count_items': django_page.paginator.count,
+        'items_per_page': django_page.paginator.per_page,
+        'start_item_index': django_page.start_index(),
+        'end_item_index': django_page.end_index(),
+        'previous_page': django_page.previous_page_number() if django_page.has_previous() else None,
+        'current_page': django_page.number,
+        'next_page': django_page.next_page_number() if django_page.has_next() else None,
+        'is_count_exact': django_page.paginator.is_count_exact,
+    }
+
+
+def build_error_info(index: int, error: str, data: str) -> dict:
+    """
+        Схема ошибочной входящей записи (ErrorCreateEquipmentSerializer)
+
+        Пробелы по краям строк убираются так же, как это делал CharField сериализатора
+        (только если обе строки после этого не пустые - иначе сериализатор отдавал исходные значения)
+    """
+    if error.strip() and data.strip():
+        error, data = error.strip(), data.strip()
+    return {
+        'index': index,
+        'error': error,
+        'data': data,
+    }
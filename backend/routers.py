@@ -4,10 +4,25 @@ from rest_framework import routers
 class EquipmentRouter(routers.SimpleRouter):
     routes = [
         routers.Route(url=r'^{prefix}$',
-                      mapping={'get': 'list', 'post': 'create'},
+                      mapping={'get': 'list', 'post': 'create', 'put': 'bulk_update'},
                       name='{basename}-list',
                       detail=False,
                       initkwargs={'suffix': 'List'}),
+        routers.Route(url=r'^{prefix}/export$',
+                      mapping={'get': 'export'},
+                      name='{basename}-export',
+                      detail=False,
+                      initkwargs={'suffix': 'Export'}),
+        routers.Route(url=r'^{prefix}/archive$',
+                      mapping={'post': 'bulk_archive'},
+                      name='{basename}-archive',
+                      detail=False,
+                      initkwargs={'suffix': 'Archive'}),
+        routers.Route(url=r'^{prefix}/restore$',
+                      mapping={'post': 'bulk_restore'},
+                      name='{basename}-restore',
+                      detail=False,
+                      initkwargs={'suffix': 'Restore'}),
         routers.Route(url=r'^{prefix}/{lookup}$',
                       mapping={'get': 'retrieve', 'put': 'update', 'delete': 'destroy'},
                       name='{basename}-detail',
@@ -44,3 +59,23 @@ class UserRouter(routers.SimpleRouter):
                       detail=True,
                       initkwargs={'suffix': 'Detail'})
     ]
+
+
+class EquipmentImportJobRouter(routers.SimpleRouter):
+    routes = [
+        routers.Route(url=r'^{prefix}$',
+                      mapping={'post': 'create'},
+                      name='{basename}-list',
+                      detail=False,
+                      initkwargs={'suffix': 'List'}),
+        routers.Route(url=r'^{prefix}/{lookup}$',
+                      mapping={'get': 'retrieve'},
+                      name='{basename}-detail',
+                      detail=True,
+                      initkwargs={'suffix': 'Detail'}),
+        routers.Route(url=r'^{prefix}/{lookup}/errors$',
+                      mapping={'get': 'errors'},
+                      name='{basename}-errors',
+                      detail=True,
+                      initkwargs={'suffix': 'Errors'}),
+    ]
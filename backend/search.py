@@ -0,0 +1,182 @@
+"""
+    Поисковые индексы оборудования
+
+    1. Полнотекстовый поиск (общий фильтр q): серийный номер и описание разбиваются на токены в таблицу
+       EquipmentSearchToken. Поиск идет по префиксу токена (LIKE 'term%' по индексу), имя типа оборудования
+       ищется подзапросом по небольшой таблице типов, фрагменты серийного номера (от GRAM_LENGTH символов) -
+       по триграммам (п. 2). Результат упорядочен по релевантности (сумма весов совпавших токенов).
+    2. Поиск по вхождению в серийный номер (фильтр serial_number): триграммы серийного номера в таблице
+       EquipmentSerialNumberGram. Кандидаты - оборудование, у которого есть все триграммы строки поиска,
+       затем они проверяются по вхождению.
+
+    Индексы обновляются сервисным слоем при создании, изменении и архивации оборудования.
+"""
+import re
+from functools import reduce
+from operator import or_, and_
+
+from django.db.models import Q, Sum, OuterRef, Subquery, Value, Case, When, IntegerField, Count
+from django.db.models.functions import Coalesce
+
+from backend.models import Equipment, EquipmentType, EquipmentSearchToken, EquipmentSerialNumberGram
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+TOKEN_MAX_LENGTH = 50
+GRAM_LENGTH = 3
+
+SERIAL_NUMBER_WEIGHT = 4
+SERIAL_NUMBER_PART_WEIGHT = 3
+EQUIPMENT_TYPE_NAME_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+SERIAL_NUMBER_FRAGMENT_WEIGHT = 1
+
+INDEX_BATCH_SIZE = 1000
+
+
+def tokenize(text) -> list:
+    """
+        Разбиение текста на токены (в нижнем регистре, без повторов, в порядке появления)
+    """
+    if not text:
+        return list()
+    return list(dict.fromkeys(token[:TOKEN_MAX_LENGTH] for token in TOKEN_PATTERN.findall(text.lower())))
+
+
+def get_equipment_tokens(equipment) -> dict:
+    """
+        Токены оборудования с весами (при повторе берется наибольший вес)
+    """
+    tokens = dict()
+    for token in tokenize(equipment.description):
+        tokens[token] = DESCRIPTION_WEIGHT
+    for token in tokenize(equipment.serial_number):
+        tokens[token] = SERIAL_NUMBER_PART_WEIGHT
+    if equipment.serial_number:
+        tokens[equipment.serial_number.lower()[:TOKEN_MAX_LENGTH]] = SERIAL_NUMBER_WEIGHT
+    return tokens
+
+
+def get_grams(text) -> list:
+    """
+        Триграммы текста (в нижнем регистре, без повторов)
+    """
+    if not text:
+        return list()
+    text = text.lower()
+    return list(dict.fromkeys(text[i:i + GRAM_LENGTH] for i in range(len(text) - GRAM_LENGTH + 1)))
+
+
+def index_equipments(equipments, replace: bool = True) -> None:
+    """
+        Обновление индексов оборудования (после создания или изменения; для нового оборудования replace=False)
+    """
+    equipments = [equipment for equipment in equipments if equipment.pk is not None]
+    if not equipments:
+        return
+    if replace:
+        unindex_equipments([equipment.pk for equipment in equipments])
+    EquipmentSearchToken.objects.bulk_create(
+        [EquipmentSearchToken(equipment_id=equipment.pk, token=token, weight=weight)
+         for equipment in equipments for token, weight in get_equipment_tokens(equipment).items()],
+        batch_size=INDEX_BATCH_SIZE
+    )
+    EquipmentSerialNumberGram.objects.bulk_create(
+        [EquipmentSerialNumberGram(equipment_id=equipment.pk, gram=gram)
+         for equipment in equipments for gram in get_grams(equipment.serial_number)],
+        batch_size=INDEX_BATCH_SIZE
+    )
+
+
+def unindex_equipments(equipment_ids) -> None:
+    """
+        Удаление оборудования из индексов (после архивации)
+    """
+    equipment_ids = list(equipment_ids)
+    for offset in range(0, len(equipment_ids), INDEX_BATCH_SIZE):
+        EquipmentSearchToken.objects.filter(equipment_id__in=equipment_ids[offset:offset + INDEX_BATCH_SIZE]).delete()
+        EquipmentSerialNumberGram.objects \
+            .filter(equipment_id__in=equipment_ids[offset:offset + INDEX_BATCH_SIZE]).delete()
+
+
+def rebuild_index(batch_size: int = INDEX_BATCH_SIZE) -> int:
+    """
+        Полное перестроение индексов по неархивному оборудованию (порциями по ключу), возвращает количество оборудования
+    """
+    EquipmentSearchToken.objects.all().delete()
+    EquipmentSerialNumberGram.objects.all().delete()
+    count = 0
+    last_id = 0
+    while True:
+        equipments = list(Equipment.objects.filter(is_archived=False, id__gt=last_id).order_by('id')
+                          .only('id', 'serial_number', 'description')[:batch_size])
+        if not equipments:
+            return count
+        index_equipments(equipments, replace=False)
+        count += len(equipments)
+        last_id = equipments[-1].id
+
+
+def search_equipments(queryset, value: str):
+    """
+        Фильтрация оборудования по общей строке поиска с упорядочиванием по релевантности
+
+        Каждое слово запроса должно совпасть с началом токена серийного номера/описания, входить в имя типа или
+        в серийный номер; либо вся строка поиска входит в серийный номер (как фрагмент с разделителями)
+    """
+    terms = tokenize(value)
+    if not terms:
+        return queryset.filter(Q(equipment_type__name__icontains=value) | Q(serial_number__icontains=value) |
+                               Q(description__icontains=value))
+
+    # Построение выборки не выполняет запросов (типы оборудования - подзапросом), в том числе в async-контроллерах
+    conditions = list()
+    fragments = list()
+    for term in terms:
+        equipment_ids = EquipmentSearchToken.objects.filter(token__startswith=term).values('equipment_id')
+        type_ids = EquipmentType.objects.filter(name__icontains=term).order_by().values('id')
+        condition = Q(id__in=equipment_ids) | Q(equipment_type_id__in=type_ids)
+        if get_grams(term):
+            condition |= serial_number_contains(term)
+            fragments.append(term)
+        conditions.append(condition)
+    condition = reduce(and_, conditions)
+    value = value.strip().lower()
+    if value not in terms and get_grams(value):
+        condition |= serial_number_contains(value)
+        fragments.append(value)
+    queryset = queryset.filter(condition)
+
+    token_score = EquipmentSearchToken.objects \
+        .filter(reduce(or_, [Q(token__startswith=term) for term in terms]), equipment_id=OuterRef('pk')) \
+        .order_by().values('equipment_id').annotate(score=Sum('weight')).values('score')
+    type_score = Case(When(reduce(or_, [Q(equipment_type__name__icontains=term) for term in terms]),
+                           then=Value(EQUIPMENT_TYPE_NAME_WEIGHT)),
+                      default=Value(0), output_field=IntegerField())
+    search_rank = Coalesce(Subquery(token_score, output_field=IntegerField()), Value(0)) + type_score
+    if fragments:
+        # Проверяется только у найденного оборудования
+        search_rank += Case(When(reduce(or_, [Q(serial_number__icontains=fragment) for fragment in fragments]),
+                                 then=Value(SERIAL_NUMBER_FRAGMENT_WEIGHT)),
+                            default=Value(0), output_field=IntegerField())
+    return queryset.annotate(search_rank=search_rank).order_by('-search_rank', 'id')
+
+
+def serial_number_contains(value: str) -> Q:
+    """
+        Условие вхождения value в серийный номер (без учета регистра): кандидаты - оборудование со всеми
+        триграммами value (индекс триграмм), затем проверка по вхождению. value - не короче GRAM_LENGTH
+    """
+    grams = get_grams(value)
+    equipment_ids = EquipmentSerialNumberGram.objects.filter(gram__in=grams) \
+        .order_by().values('equipment_id').annotate(grams=Count('gram', distinct=True)) \
+        .filter(grams=len(grams)).values('equipment_id')
+    return Q(id__in=equipment_ids, serial_number__icontains=value)
+
+
+def filter_serial_number_contains(queryset, value: str):
+    """
+        Фильтрация оборудования по вхождению в серийный номер (без учета регистра) через индекс триграмм
+    """
+    if not get_grams(value):
+        return queryset.filter(serial_number__icontains=value)
+    return queryset.filter(serial_number_contains(value))
@@ -1,9 +1,16 @@
-import re
+from operator import attrgetter
 
 from django.contrib.auth.models import User
 from rest_framework import serializers, status
+from rest_framework.validators import UniqueTogetherValidator
 
-from backend.models import Equipment, EquipmentType
+from backend.archive import find_archived_equipments
+from backend.masks import PATTERNS, is_valid_serial_number_mask, match_serial_number
+from backend.models import Equipment, EquipmentType, EquipmentImportJob
+from backend.registry import equipment_type_registry
+
+# Поля уникальности тип + серийный номер (ограничение equ__type_serial_number__unq)
+EQUIPMENT_UNIQUE_FIELDS = ('equipment_type', 'serial_number')
 
 
 class SimpleResponseSerializer(serializers.Serializer):
@@ -55,6 +62,25 @@ class PaginationListSerializer(serializers.Serializer):
     previous_page = serializers.IntegerField(help_text='Number of previous page (null if the current page is the last)')
     current_page = serializers.IntegerField(help_text='Number of current page')
     next_page = serializers.IntegerField(help_text='Number of next page (null if the current page is the first)')
+    is_count_exact = serializers.BooleanField(help_text='Total number of items is exact (false if it is estimated, '
+                                                        'then count_items is lower bound or table statistics)')
+
+    def create(self, validated_data):
+        pass
+
+    def update(self, instance, validated_data):
+        pass
+
+
+class CursorPaginationListSerializer(serializers.Serializer):
+    """
+        Схема для дополнительной информации для списка с курсорной пагинацией
+    """
+    items_per_page = serializers.IntegerField(help_text='Number of items on one page')
+    previous_cursor = serializers.CharField(allow_null=True,
+                                            help_text='Cursor of previous page (null if the current page is the first)')
+    next_cursor = serializers.CharField(allow_null=True,
+                                        help_text='Cursor of next page (null if the current page is the last)')
 
     def create(self, validated_data):
         pass
@@ -98,8 +124,7 @@ class EquipmentTypeRequestSerializer(serializers.ModelSerializer):
         """
             Валидация маски (значение только из определенных символов)
         """
-        match = re.findall(r'[NAaXZ]+', value)
-        if not match or match[0] != value:
+        if not is_valid_serial_number_mask(value):
             raise serializers.ValidationError(f"Serial number mask must consist of the characters"
                                               f" 'N', 'A', 'a', 'X', and 'Z' only",
                                               code='serial_number_mask')
@@ -145,9 +170,94 @@ class EquipmentSerializer(serializers.ModelSerializer):
         model = Equipment
         fields = ('id', 'equipment_type', 'equipment_type_name', 'serial_number', 'description', )
 
+    # Колонки для быстрого чтения (values_list): имя типа берется из реестра типов, без соединения с таблицей типов
+    VALUES_FIELDS = ('id', 'equipment_type_id', 'serial_number', 'description', )
+    # Колонки полей схемы (ключ читается всегда - по нему работают пагинация и выгрузка порциями)
+    FIELD_COLUMNS = {
+        'id': 'id',
+        'equipment_type': 'equipment_type_id',
+        'equipment_type_name': 'equipment_type_id',
+        'serial_number': 'serial_number',
+        'description': 'description',
+    }
+
     @staticmethod
     def get_equipment_type_name(obj) -> serializers.CharField:
-        return obj.equipment_type.name if isinstance(obj, Equipment) else dict(obj)['equipment_type'].name
+        if not isinstance(obj, Equipment):
+            return dict(obj)['equipment_type'].name
+        if Equipment.equipment_type.is_cached(obj):
+            return obj.equipment_type.name
+        equipment_type = equipment_type_registry.get(obj.equipment_type_id)
+        return obj.equipment_type.name if equipment_type is None else equipment_type.name
+
+    @classmethod
+    def values_queryset(cls, queryset, fields=None):
+        """
+            Выборка только колонок схемы (без экземпляров моделей, описания аудита и пользователей),
+            fields - поля схемы (None - все поля)
+        """
+        if fields is None:
+            return queryset.values_list(*cls.VALUES_FIELDS, named=True)
+        columns = dict.fromkeys(['id', *[cls.FIELD_COLUMNS[field] for field in fields]])
+        return queryset.values_list(*columns, named=True)
+
+    @classmethod
+    def values_to_rows(cls, rows, equipment_types=None, fields=None) -> list:
+        """
+            Преобразование строк values_queryset в кортежи полей схемы (equipment_types - снимок реестра типов,
+            async-контроллеры передают его сами; fields - поля схемы, None - все поля)
+        """
+        if fields is None:
+            names = (equipment_types or equipment_type_registry.get_snapshot()).names
+            return [(row[0], row[1], names.get(row[1], None), row[2], row[3]) for row in rows]
+
+        getters = list()
+        for field in fields:
+            if field == 'equipment_type_name':
+                names = (equipment_types or equipment_type_registry.get_snapshot()).names
+                getters.append(lambda row: names.get(row.equipment_type_id, None))
+            else:
+                getters.append(attrgetter(cls.FIELD_COLUMNS[field]))
+        return [tuple(getter(row) for getter in getters) for row in rows]
+
+    @classmethod
+    def values_to_representation(cls, rows, equipment_types=None, fields=None) -> list:
+        """
+            Преобразование строк values_queryset в схему (совпадает с to_representation экземпляров)
+        """
+        keys = cls.Meta.fields if fields is None else fields
+        return [dict(zip(keys, row)) for row in cls.values_to_rows(rows, equipment_types, fields)]
+
+
+class PreloadedEquipmentTypeField(serializers.PrimaryKeyRelatedField):
+    """
+        Поле типа оборудования, которое берет типы из заранее загруженного словаря (context['equipment_types'],
+        если его нет - из реестра типов) вместо запроса к БД на каждую запись
+
+        Снимок реестра может отставать (тип создан в другом процессе): тип, которого нет в снимке, ищется в БД,
+        найденный добавляется в словарь context['equipment_types'], реестр процесса сбрасывается
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        equipment_types = self.context.get('equipment_types', None)
+        if equipment_types is None:
+            equipment_type = equipment_type_registry.get(pk)
+        else:
+            equipment_type = equipment_types.get(pk, None)
+        if equipment_type is None:
+            equipment_type = EquipmentType.objects.filter(pk=pk).first()
+            if equipment_type is None:
+                self.fail('does_not_exist', pk_value=data)
+            equipment_type_registry.invalidate()
+            if equipment_types is not None:
+                equipment_types[pk] = equipment_type
+        return equipment_type
 
 
 class EquipmentRequestSerializer(serializers.ModelSerializer):
@@ -157,13 +267,9 @@ class EquipmentRequestSerializer(serializers.ModelSerializer):
         1. Валидация полей
         2. Зависимость обязательности полей от типа запроса (создание/изменение)
     """
-    PATTERNS = {
-        'N': '[0-9]',
-        'a': '[a-z]',
-        'A': '[A-Z]',
-        'X': '[A-Z0-9]',
-        'Z': '[-_@]',
-    }
+    PATTERNS = PATTERNS
+    # Тип оборудования - из реестра типов (без запроса к таблице типов)
+    serializer_related_field = PreloadedEquipmentTypeField
 
     class Meta:
         model = Equipment
@@ -177,6 +283,11 @@ class EquipmentRequestSerializer(serializers.ModelSerializer):
             self.Meta.extra_kwargs['equipment_type'] = {'required': False}
             self.Meta.extra_kwargs['serial_number'] = {'required': False}
             self.Meta.extra_kwargs['description'] = {'required': False}
+            # Тип изменяемого оборудования - из реестра типов (валидаторы обращаются к instance.equipment_type)
+            if isinstance(instance, Equipment) and not Equipment.equipment_type.is_cached(instance):
+                equipment_type = equipment_type_registry.get(instance.equipment_type_id)
+                if equipment_type is not None:
+                    instance.equipment_type = equipment_type
         else:
             self.Meta.extra_kwargs = dict()
 
@@ -185,7 +296,7 @@ class EquipmentRequestSerializer(serializers.ModelSerializer):
             Валидация по типу и серийному номеру
 
             1. Проверка серийного номера по маске типа
-            2. Уникальность тип + серийный номер
+            2. Уникальность тип + серийный номер (в том числе с архивным оборудованием)
         """
         serial_number = dict(data).get('serial_number', None)
         equipment_type = dict(data).get('equipment_type', None)
@@ -200,16 +311,8 @@ class EquipmentRequestSerializer(serializers.ModelSerializer):
         else:
             if not serial_number or not equipment_type:
                 return data
-        serial_number_mask = EquipmentType.objects.get(pk=equipment_type.id).serial_number_mask
-
-        pattern = ''.join([self.PATTERNS.get(c, ')АДМИН ПОСТАРАЛСЯ(') for c in serial_number_mask])
-        match = re.findall(pattern, serial_number)
-        if not match or match[0] != serial_number:
-            raise serializers.ValidationError(f"Serial number '{serial_number}' does not match "
-                                              f"'{equipment_type.name}' equipment type mask '{serial_number_mask}' "
-                                              f"where 'N' is in [0-9], 'A' is in [A-Z], 'a' is in [a-z], "
-                                              f"'X' is in [A-Z, 0-9], 'Z' is in [-_@]",
-                                              code='serial_number')
+        if not match_serial_number(equipment_type, serial_number):
+            raise self.serial_number_mask_error(serial_number, equipment_type)
 
         if self.instance:
             equipments = self.Meta.model.objects\
@@ -219,14 +322,109 @@ class EquipmentRequestSerializer(serializers.ModelSerializer):
             equipments = self.Meta.model.objects\
                 .filter(equipment_type_id=equipment_type.id, serial_number=serial_number)
         if len(equipments) != 0:
-            archive_flag = '-archived' if equipments[0].is_archived else ''
-            raise serializers.ValidationError(f"Equipment with type '{equipment_type.name}' and "
-                                              f"serial number '{serial_number}' is already exist"
-                                              f" (id={equipments[0].pk}{archive_flag})",
-                                              code='serial_number')
+            raise self.unique_error()
+        archived_equipments = find_archived_equipments([(equipment_type.id, serial_number)])
+        if archived_equipments:
+            archived_equipment, = archived_equipments.values()
+            raise self.archived_error(equipment_type, serial_number, archived_equipment.pk)
 
         return data
 
+    @staticmethod
+    def serial_number_mask_error(serial_number, equipment_type) -> serializers.ValidationError:
+        """
+            Ошибка несоответствия серийного номера маске типа
+        """
+        return serializers.ValidationError(f"Serial number '{serial_number}' does not match "
+                                           f"'{equipment_type.name}' equipment type mask "
+                                           f"'{equipment_type.serial_number_mask}' "
+                                           f"where 'N' is in [0-9], 'A' is in [A-Z], 'a' is in [a-z], "
+                                           f"'X' is in [A-Z, 0-9], 'Z' is in [-_@]",
+                                           code='serial_number')
+
+    @staticmethod
+    def unique_error() -> serializers.ValidationError:
+        """
+            Ошибка уникальности тип + серийный номер (текст и код - как у UniqueTogetherValidator, который DRF 3.15+
+            строит по ограничению уникальности модели)
+        """
+        return serializers.ValidationError(
+            UniqueTogetherValidator.message.format(field_names=', '.join(EQUIPMENT_UNIQUE_FIELDS)), code='unique'
+        )
+
+    @staticmethod
+    def archived_error(equipment_type, serial_number, pk) -> serializers.ValidationError:
+        """
+            Ошибка уникальности тип + серийный номер с архивным оборудованием (ключ - в архивной таблице)
+        """
+        return serializers.ValidationError(f"Equipment with type '{equipment_type.name}' and "
+                                           f"serial number '{serial_number}' is already exist"
+                                           f" (id={pk}-archived)",
+                                           code='serial_number')
+
+
+class EquipmentBulkRequestSerializer(EquipmentRequestSerializer):
+    """
+        Схема оборудования во входящих запросах пакетного создания
+
+        1. Валидация полей без обращений к БД
+        2. Маска и уникальность тип + серийный номер проверяются пакетно в сервисе (CreateEquipmentService)
+    """
+    equipment_type = PreloadedEquipmentTypeField(queryset=EquipmentType.objects.all())
+
+    class Meta:
+        model = Equipment
+        fields = ('id', 'equipment_type', 'serial_number', 'description', )
+        read_only_fields = ['id']
+        extra_kwargs = dict()
+        validators = []
+
+    def validate(self, data):
+        """
+            Проверки по типу и серийному номеру выполняются пакетно в сервисе
+        """
+        return data
+
+
+class EquipmentBulkUpdateRequestSerializer(EquipmentBulkRequestSerializer):
+    """
+        Схема оборудования во входящих запросах пакетного изменения (ключ и изменяемые поля)
+
+        1. Валидация полей без обращений к БД
+        2. Маска и уникальность тип + серийный номер проверяются пакетно в сервисе (BulkUpdateEquipmentService)
+    """
+    id = serializers.IntegerField(min_value=1, help_text='Id of equipment')
+    equipment_type = PreloadedEquipmentTypeField(queryset=EquipmentType.objects.all(), required=False)
+
+    class Meta:
+        model = Equipment
+        fields = ('id', 'equipment_type', 'serial_number', 'description', )
+        extra_kwargs = {
+            'serial_number': {'required': False},
+            'description': {'required': False},
+        }
+        validators = []
+
+    def __init__(self, instance=None, data=None, **kwargs):
+        # Все поля, кроме ключа, необязательны (без переключения Meta.extra_kwargs в EquipmentRequestSerializer)
+        serializers.ModelSerializer.__init__(self, instance, data, **kwargs)
+
+
+class EquipmentBulkArchiveRequestSerializer(serializers.Serializer):
+    """
+        Схема входящего запроса пакетной архивации и восстановления оборудования
+
+        Оборудование - по списку ключей и (или) по параметрам фильтров списка оборудования
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, required=False,
+                                help_text='Ids of equipments (all filtered equipments if omitted)')
+
+    def create(self, validated_data):
+        pass
+
+    def update(self, instance, validated_data):
+        pass
+
 
 class EquipmentListSerializer(BaseResponseSerializer):
     """
@@ -236,6 +434,14 @@ class EquipmentListSerializer(BaseResponseSerializer):
     retExtInfo = PaginationListSerializer()
 
 
+class EquipmentCursorListSerializer(BaseResponseSerializer):
+    """
+        Схема ответа в списке оборудования с курсорной пагинацией
+    """
+    result = EquipmentSerializer(many=True)
+    retExtInfo = CursorPaginationListSerializer()
+
+
 class EquipmentDetailsSerializer(BaseResponseSerializer):
     """
         Схема ответа в получении деталей заданного оборудования
@@ -282,6 +488,88 @@ class EquipmentCreateSerializer(BaseResponseSerializer):
     retExtInfo = InfoCreateEquipmentSerializer(many=False)
 
 
+class InfoCreateEquipmentCompactSerializer(serializers.Serializer):
+    """
+        Схема дополнительной информации для компактного ответа при создании оборудования
+    """
+    count = serializers.IntegerField(help_text='Count of items in input set')
+    saved = serializers.IntegerField(help_text='Count of saved items')
+    failed = serializers.IntegerField(help_text='Count of failed items')
+    failed_indexes = serializers.ListField(child=serializers.IntegerField(),
+                                           help_text='Indexes of failed items in input set')
+
+    def create(self, validated_data):
+        pass
+
+    def update(self, instance, validated_data):
+        pass
+
+
+class EquipmentCreateCompactSerializer(BaseResponseSerializer):
+    """
+        Схема компактного ответа для создания оборудования (без сохраненного оборудования)
+    """
+    result = EquipmentSerializer(many=True, help_text='Always empty')
+    retExtInfo = InfoCreateEquipmentCompactSerializer(many=False)
+
+
+class EquipmentBulkUpdateSerializer(BaseResponseSerializer):
+    """
+        Схема ответа для пакетного изменения оборудования (дополнительная информация - как при создании)
+    """
+    result = EquipmentSerializer(many=True)
+    retExtInfo = InfoCreateEquipmentSerializer(many=False)
+
+
+class InfoBulkArchiveEquipmentSerializer(serializers.Serializer):
+    """
+        Схема дополнительной информации для ответа при пакетной архивации и восстановлении оборудования
+    """
+    count = serializers.IntegerField(help_text='Count of archived (restored) equipments')
+
+    def create(self, validated_data):
+        pass
+
+    def update(self, instance, validated_data):
+        pass
+
+
+class EquipmentBulkArchiveSerializer(BaseResponseSerializer):
+    """
+        Схема ответа для пакетной архивации оборудования
+    """
+    retExtInfo = InfoBulkArchiveEquipmentSerializer(many=False)
+
+
+class ErrorRestoreEquipmentSerializer(serializers.Serializer):
+    """
+        Схема невосстановленного архивного оборудования (для ответа при пакетном восстановлении)
+    """
+    id = serializers.IntegerField(help_text='Id of equipment left in the archive')
+    error = serializers.CharField(help_text='Reason why equipment was not restored')
+
+    def create(self, validated_data):
+        pass
+
+    def update(self, instance, validated_data):
+        pass
+
+
+class InfoBulkRestoreEquipmentSerializer(InfoBulkArchiveEquipmentSerializer):
+    """
+        Схема дополнительной информации для ответа при пакетном восстановлении оборудования
+    """
+    failed = serializers.IntegerField(help_text='Count of equipments left in the archive')
+    errors = ErrorRestoreEquipmentSerializer(many=True)
+
+
+class EquipmentBulkRestoreSerializer(BaseResponseSerializer):
+    """
+        Схема ответа для пакетного восстановления оборудования
+    """
+    retExtInfo = InfoBulkRestoreEquipmentSerializer(many=False)
+
+
 class EquipmentUpdateSerializer(BaseResponseSerializer):
     """
         Схема ответа для изменения оборудования
@@ -296,6 +584,31 @@ class EquipmentDeleteSerializer(BaseResponseSerializer):
     pass
 
 
+class EquipmentImportJobSerializer(serializers.ModelSerializer):
+    """
+        Схема задания фоновой загрузки оборудования
+    """
+
+    class Meta:
+        model = EquipmentImportJob
+        fields = ('id', 'status', 'count', 'saved', 'failed', 'error', 'created_at', 'started_at', 'finished_at', )
+
+
+class EquipmentImportJobDetailsSerializer(BaseResponseSerializer):
+    """
+        Схема ответа для постановки и получения состояния задания фоновой загрузки оборудования
+    """
+    result = EquipmentImportJobSerializer(many=False)
+
+
+class EquipmentImportJobErrorListSerializer(BaseResponseSerializer):
+    """
+        Схема ответа в списке ошибок задания фоновой загрузки оборудования (курсорная пагинация)
+    """
+    result = ErrorCreateEquipmentSerializer(many=True)
+    retExtInfo = CursorPaginationListSerializer()
+
+
 class UserSerializer(serializers.ModelSerializer):
     """
         Стандартная схема пользователя (используется во всех ответах)
@@ -1,18 +1,56 @@
 """
     Сервисный слой приложения
 """
-import time
-
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpRequest, StreamingHttpResponse
+from django.utils import timezone
+from django_filters.utils import translate_validation
 from rest_framework import serializers
-from rest_framework.exceptions import ParseError, NotFound
+from rest_framework.exceptions import ParseError, NotFound, UnsupportedMediaType
 from rest_framework.request import Request
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 
-from backend.serializers import EquipmentTypeListSerializer, EquipmentListSerializer, PaginationListSerializer, \
-    EquipmentTypeSerializer, EquipmentTypeCreateUpdateSerializer, EquipmentTypeRequestSerializer, \
-    EquipmentDetailsSerializer, EquipmentSerializer, EquipmentRequestSerializer, EquipmentUpdateSerializer, \
-    EquipmentCreateSerializer, EquipmentDeleteSerializer, ErrorCreateEquipmentSerializer, InfoCreateEquipmentSerializer, \
-    UserRegisterSerializer, UserSerializer, UserCreateSerializer, UserDetailsSerializer
+from backend.archive import find_archived_equipments, restore_archived_equipments
+from backend.caches import equipment_details_cache
+from backend.counts import invalidate_counts
+from backend.exports import EXPORT_FORMAT_QUERY_PARAM, EXPORT_FORMAT_NDJSON, EXPORT_FORMATS, EXPORT_CONTENT_TYPES, \
+    export_rows
+from backend.filters import EquipmentFilter, ArchivedEquipmentFilter
+from backend.masks import match_serial_numbers, serial_number_masks
+from backend.models import Equipment, EquipmentType, EquipmentImportJob, EquipmentArchive
+from backend.parsers import NDJSON_MEDIA_TYPE, STREAM_MEDIA_TYPES, get_media_type, iterate_json, iterate_ndjson
+from backend.pagination import EquipmentCursorPagination, EquipmentImportJobErrorCursorPagination
+from backend.registry import equipment_type_registry
+from backend.replicas import replica_read
+from backend.responses import build_response, build_pagination_info, build_error_info
+from backend.search import index_equipments, unindex_equipments
+from backend.serializers import EquipmentTypeSerializer, EquipmentTypeRequestSerializer, EquipmentSerializer, \
+    EquipmentRequestSerializer, EquipmentBulkRequestSerializer, EquipmentBulkUpdateRequestSerializer, \
+    EquipmentBulkArchiveRequestSerializer, UserRegisterSerializer, UserSerializer, EquipmentImportJobSerializer
+
+# Режим ответа при создании оборудования (?response=full|compact)
+CREATE_RESPONSE_QUERY_PARAM = 'response'
+CREATE_RESPONSE_FULL = 'full'
+CREATE_RESPONSE_COMPACT = 'compact'
+# Поля схемы оборудования в ответе и выгрузке (?fields=id,serial_number), по умолчанию - все поля
+FIELDS_QUERY_PARAM = 'fields'
+
+
+def get_requested_fields(request) -> tuple:
+    """
+        Поля схемы оборудования из параметра fields в порядке схемы (None - все поля)
+    """
+    value = request.GET.get(FIELDS_QUERY_PARAM, None)
+    if value is None:
+        return None
+    requested = {field.strip() for field in value.split(',')} - {''}
+    if not requested or not requested.issubset(EquipmentSerializer.Meta.fields):
+        raise ParseError(f"Parameter '{FIELDS_QUERY_PARAM}' must be a comma-separated list of: "
+                         f"{', '.join(EquipmentSerializer.Meta.fields)}", code=FIELDS_QUERY_PARAM)
+    fields = tuple(field for field in EquipmentSerializer.Meta.fields if field in requested)
+    return None if fields == EquipmentSerializer.Meta.fields else fields
 
 
 class GetEquipmentTypeListService:
@@ -21,7 +59,7 @@ class GetEquipmentTypeListService:
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> EquipmentTypeListSerializer:
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Получение пагинированого и отфильтрованного списка типов оборудования
         """
@@ -31,52 +69,37 @@ class GetEquipmentTypeListService:
 
         # Пагининация списка
         page = view.paginate_queryset(queryset)
-        if page is None:
-            equipment_type_list_serializer = view.get_serializer(queryset, many=True)
-            count = view.paginator.count
-            items_per_page = view.paginator.per_page
-            start_item_index = 0 if count == 0 else 1
-            end_item_index = count
-            previous_page = None
-            current_page = 1
-            next_page = None
-        else:
-            equipment_type_list_serializer = view.get_serializer(page, many=True)
-            count = view.paginator.page.paginator.count
-            items_per_page = view.paginator.page.paginator.per_page
-            start_item_index = view.paginator.page.start_index()
-            end_item_index = view.paginator.page.end_index()
-            previous_page = view.paginator.page.previous_page_number() if view.paginator.page.has_previous() else None
-            current_page = view.paginator.page.number
-            next_page = view.paginator.page.next_page_number() if view.paginator.page.has_next() else None
+        equipment_type_list_serializer = view.get_serializer(queryset if page is None else page, many=True)
 
         # Формирование дополнительной информации по результатам пагинации
-        pagination_list_serializer = PaginationListSerializer(
-            data={
-                'count_items': count,
-                'items_per_page': items_per_page,
-                'start_item_index': start_item_index,
-                'end_item_index': end_item_index,
-                'previous_page': previous_page,
-                'current_page': current_page,
-                'next_page': next_page,
-            }
-        )
-        pagination_list_serializer.is_valid()
+        pagination_info = build_pagination_info(view, page)
 
         # Формирование схемы ответа
-        return_serializer = EquipmentTypeListSerializer(
-            data={
-                'retCode': 0,
-                'retMsg': 'Ok' if count > 0 else 'Result set is empty',
-                'result': equipment_type_list_serializer.data,
-                'retExtInfo': pagination_list_serializer.data,
-                'retTime': int(time.time() * 10 ** 3)
-            }
+        return build_response(
+            equipment_type_list_serializer.data, pagination_info,
+            ret_msg='Ok' if pagination_info['count_items'] > 0 else 'Result set is empty'
         )
-        return_serializer.is_valid()
 
-        return return_serializer
+    @staticmethod
+    async def aexecute(request: HttpRequest, view, *args, **kwargs) -> dict:
+        """
+            Получение пагинированого и отфильтрованного списка типов оборудования (async-контроллер)
+        """
+
+        # Фильтрация списка
+        queryset = view.filter_queryset(view.get_queryset())
+
+        # Пагининация списка (читаются только нужные для ответа колонки)
+        page = await view.apaginate_queryset(queryset.values(*EquipmentTypeSerializer.Meta.fields))
+
+        # Формирование дополнительной информации по результатам пагинации
+        pagination_info = build_pagination_info(view, page)
+
+        # Формирование схемы ответа
+        return build_response(
+            page, pagination_info,
+            ret_msg='Ok' if pagination_info['count_items'] > 0 else 'Result set is empty'
+        )
 
 
 class CreateEquipmentTypeService:
@@ -85,7 +108,7 @@ class CreateEquipmentTypeService:
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> EquipmentTypeCreateUpdateSerializer:
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Создание типа оборудования
         """
@@ -94,24 +117,11 @@ class CreateEquipmentTypeService:
         equipment_type_serializer = EquipmentTypeRequestSerializer(data=request.data)
         equipment_type_serializer.is_valid(raise_exception=True)
         instance = equipment_type_serializer.save()
-
-        # Преобразование данных в стандартную схему для ответа
-        equipment_type_serializer = EquipmentTypeSerializer(data=equipment_type_serializer.data, instance=instance)
-        equipment_type_serializer.is_valid()
+        invalidate_counts(EquipmentType)
+        equipment_type_registry.invalidate()
 
         # Формирование схемы ответа
-        return_serializer = EquipmentTypeCreateUpdateSerializer(
-            data={
-                'retCode': 0,
-                'retMsg': 'Ok',
-                'result': equipment_type_serializer.data,
-                'retExtInfo': '',
-                'retTime': int(time.time() * 10 ** 3)
-            }
-        )
-        return_serializer.is_valid()
-
-        return return_serializer
+        return build_response(EquipmentTypeSerializer(instance).data, ret_msg='Ok')
 
 
 class UpdateEquipmentTypeService:
@@ -120,7 +130,7 @@ class UpdateEquipmentTypeService:
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> EquipmentTypeCreateUpdateSerializer:
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Изменения типа оборудования
         """
@@ -135,27 +145,23 @@ class UpdateEquipmentTypeService:
             raise NotFound(f"Equipment type with id='{pk}' was not found", code='id')
 
         # Обработка входящих данных (валидация и сохранение)
+        name = instance.name
         equipment_type_serializer = EquipmentTypeRequestSerializer(data=request.data, instance=instance)
         equipment_type_serializer.is_valid(raise_exception=True)
         instance = equipment_type_serializer.save()
 
-        # Преобразование данных в стандартную схему для ответа
-        equipment_type_serializer = EquipmentTypeSerializer(data=equipment_type_serializer.data, instance=instance)
-        equipment_type_serializer.is_valid()
+        # Сброс скомпилированной маски типа и количеств в списках (фильтры по имени типа)
+        serial_number_masks.invalidate(instance.id)
+        invalidate_counts(EquipmentType, Equipment)
+        equipment_type_registry.invalidate()
 
-        # Формирование схемы ответа
-        return_serializer = EquipmentTypeCreateUpdateSerializer(
-            data={
-                'retCode': 0,
-                'retMsg': 'Ok' if request.data else 'You changed nothing',
-                'result': equipment_type_serializer.data,
-                'retExtInfo': '',
-                'retTime': int(time.time() * 10 ** 3)
-            }
-        )
-        return_serializer.is_valid()
+        # Имя типа есть в схеме оборудования - сброс кэша детальной информации по оборудованию
+        if instance.name != name:
+            equipment_details_cache.invalidate_types()
 
-        return return_serializer
+        # Формирование схемы ответа
+        return build_response(EquipmentTypeSerializer(instance).data,
+                              ret_msg='Ok' if request.data else 'You changed nothing')
 
 
 class GetEquipmentListService:
@@ -164,142 +170,481 @@ class GetEquipmentListService:
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> EquipmentListSerializer:
+    @replica_read
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Получение пагинированого и отфильтрованного списка оборудования
         """
 
+        # Курсорная пагинация (по запросу)
+        if EquipmentCursorPagination.cursor_query_param in request.query_params:
+            return GetEquipmentListService.execute_cursor(request, view, *args, **kwargs)
+
+        # Обработка входящих данных (поля ответа)
+        fields = get_requested_fields(request)
+
         # Фильтрация списка
         queryset = view.filter_queryset(view.get_queryset())
 
-        # Пагининация списка
+        # Пагининация списка (читаются только нужные для ответа колонки)
+        queryset = EquipmentSerializer.values_queryset(queryset, fields)
         page = view.paginate_queryset(queryset)
-        if page is None:
-            equipment_list_serializer = view.get_serializer(queryset, many=True)
-            count = view.paginator.count
-            items_per_page = view.paginator.per_page
-            start_item_index = 0 if count == 0 else 1
-            end_item_index = count
-            previous_page = None
-            current_page = 1
-            next_page = None
-        else:
-            equipment_list_serializer = view.get_serializer(page, many=True)
-            count = view.paginator.page.paginator.count
-            items_per_page = view.paginator.page.paginator.per_page
-            start_item_index = view.paginator.page.start_index()
-            end_item_index = view.paginator.page.end_index()
-            previous_page = view.paginator.page.previous_page_number() if view.paginator.page.has_previous() else None
-            current_page = view.paginator.page.number
-            next_page = view.paginator.page.next_page_number() if view.paginator.page.has_next() else None
+        equipment_list = EquipmentSerializer.values_to_representation(queryset if page is None else page,
+                                                                      fields=fields)
+
+        # Формирование дополнительной информации по результатам пагинации
+        pagination_info = build_pagination_info(view, page)
+
+        # Формирование схемы ответа
+        return build_response(
+            equipment_list, pagination_info,
+            ret_msg='Ok' if pagination_info['count_items'] > 0 else 'Result set is empty'
+        )
+
+    @staticmethod
+    @replica_read
+    async def aexecute(request: HttpRequest, view, *args, **kwargs) -> dict:
+        """
+            Получение пагинированого и отфильтрованного списка оборудования (async-контроллер)
+
+            Курсорная пагинация выполняется синхронным контроллером (async-контроллер передает ему такие запросы)
+        """
+
+        # Обработка входящих данных (поля ответа)
+        fields = get_requested_fields(request)
+
+        # Фильтрация списка
+        queryset = view.filter_queryset(view.get_queryset())
+
+        # Пагининация списка (читаются только нужные для ответа колонки)
+        page = await view.apaginate_queryset(EquipmentSerializer.values_queryset(queryset, fields))
+        equipment_types = await equipment_type_registry.aget_snapshot()
+        equipment_list = EquipmentSerializer.values_to_representation(page, equipment_types, fields)
 
         # Формирование дополнительной информации по результатам пагинации
-        pagination_list_serializer = PaginationListSerializer(
-            data={
-                'count_items': count,
-                'items_per_page': items_per_page,
-                'start_item_index': start_item_index,
-                'end_item_index': end_item_index,
-                'previous_page': previous_page,
-                'current_page': current_page,
-                'next_page': next_page,
-            }
+        pagination_info = build_pagination_info(view, page)
+
+        # Формирование схемы ответа
+        return build_response(
+            equipment_list, pagination_info,
+            ret_msg='Ok' if pagination_info['count_items'] > 0 else 'Result set is empty'
         )
-        pagination_list_serializer.is_valid()
+
+    @staticmethod
+    def execute_cursor(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
+        """
+            Получение отфильтрованного списка оборудования с курсорной (keyset) пагинацией
+        """
+
+        # Обработка входящих данных (поля ответа)
+        fields = get_requested_fields(request)
+
+        # Фильтрация списка
+        queryset = view.filter_queryset(view.get_queryset())
+
+        # Пагининация списка (поиск по ключу вместо LIMIT/OFFSET, читаются только нужные для ответа колонки)
+        paginator = EquipmentCursorPagination()
+        page = paginator.paginate_queryset(EquipmentSerializer.values_queryset(queryset, fields), request, view=view)
+        equipment_list = EquipmentSerializer.values_to_representation(page, fields=fields)
+
+        # Формирование дополнительной информации по результатам пагинации (схема CursorPaginationListSerializer)
+        pagination_info = {
+            'items_per_page': paginator.page_size,
+            'previous_cursor': paginator.get_previous_cursor(),
+            'next_cursor': paginator.get_next_cursor(),
+        }
 
         # Формирование схемы ответа
-        return_serializer = EquipmentListSerializer(
-            data={
-                'retCode': 0,
-                'retMsg': 'Ok' if count > 0 else 'Result set is empty',
-                'result': equipment_list_serializer.data,
-                'retExtInfo': pagination_list_serializer.data,
-                'retTime': int(time.time() * 10 ** 3)
-            }
+        return build_response(
+            equipment_list, pagination_info,
+            ret_msg='Ok' if len(page) > 0 else 'Result set is empty'
         )
-        return_serializer.is_valid()
 
-        return return_serializer
+
+class ExportEquipmentService:
+    """
+        Сервис потоковой выгрузки отфильтрованного списка оборудования (NDJSON, CSV)
+    """
+
+    @staticmethod
+    @replica_read
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> StreamingHttpResponse:
+        """
+            Выгрузка всего отфильтрованного списка оборудования без пагинации
+        """
+
+        # Обработка входящих данных (формат выгрузки)
+        export_format = request.query_params.get(EXPORT_FORMAT_QUERY_PARAM, EXPORT_FORMAT_NDJSON)
+        if export_format not in EXPORT_FORMATS:
+            raise ParseError(f"Parameter '{EXPORT_FORMAT_QUERY_PARAM}' must be one of: "
+                             f"{', '.join(EXPORT_FORMATS)}", code=EXPORT_FORMAT_QUERY_PARAM)
+        fields = get_requested_fields(request)
+
+        # Фильтрация списка (фильтры проверяются до начала выгрузки)
+        queryset = view.filter_queryset(view.get_queryset())
+
+        # Формирование потокового ответа (читаются только нужные для ответа колонки, порциями; поток читается после
+        # выхода из сервиса - БД чтения закрепляется за выборкой)
+        response = StreamingHttpResponse(
+            export_rows(EquipmentSerializer.values_queryset(queryset.using(queryset.db), fields),
+                        EquipmentSerializer.Meta.fields if fields is None else fields,
+                        export_format, settings.EXPORT_CHUNK_SIZE,
+                        prepare=lambda rows: EquipmentSerializer.values_to_rows(rows, fields=fields)),
+            content_type=EXPORT_CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="equipment.{export_format}"'
+        return response
+
+
+class CreateEquipmentReport:
+    """
+        Накопление результатов создания оборудования для ответа
+
+        В компактном режиме сохраненное оборудование не возвращается, по ошибкам - только индексы входящих записей
+    """
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self.count = 0
+        self.saved_count = 0
+        self.failed_count = 0
+        self.saved_equipments = dict()
+        self.failed_equipments = dict()
+
+    def add_saved(self, index: int, instance: Equipment) -> None:
+        self.saved_count += 1
+        if not self.compact:
+            self.saved_equipments[index] = EquipmentSerializer(instance).data
+
+    def add_error(self, index: int, error: serializers.ValidationError, equipment) -> None:
+        """
+            Формирование схемы ошибочной входящей записи и добавление в словарь ошибок для ответа
+        """
+        self.failed_count += 1
+        if self.compact:
+            self.failed_equipments[index] = None
+            return
+        if not isinstance(error.detail, dict):
+            error = serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: error.detail})
+        self.failed_equipments[index] = build_error_info(index, str(error), str(equipment))
+
+    def flush(self) -> None:
+        """
+            Вызывается после обработки каждого пакета (для сохранения промежуточных результатов)
+        """
+        pass
+
+    def build_response(self) -> dict:
+        """
+            Схема ответа (EquipmentCreateSerializer или EquipmentCreateCompactSerializer)
+        """
+        info_created = {
+            "count": self.count,
+            "saved": self.saved_count,
+            "failed": self.failed_count,
+        }
+        if self.compact:
+            info_created['failed_indexes'] = sorted(self.failed_equipments)
+        else:
+            info_created['errors'] = [self.failed_equipments[i] for i in sorted(self.failed_equipments)]
+        return build_response(
+            [self.saved_equipments[i] for i in sorted(self.saved_equipments)], info_created,
+            ret_msg='Ok' if self.failed_count == 0 else 'There are some errors'
+        )
 
 
 class CreateEquipmentService:
     """
         Сервис создания оборудования
+
+        Пакетная обработка: входящие данные (массив JSON или NDJSON) разбираются потоково и обрабатываются пакетами
+        по settings.BULK_CREATE_BATCH_SIZE. Типы оборудования берутся из реестра типов (запрос - только для типа,
+        которого нет в снимке реестра), уникальность тип + серийный номер проверяется одним запросом на пакет
+        и одним - по архиву (предыдущие пакеты к этому моменту уже записаны), дубликаты внутри пакета отсекаются
+        в памяти, запись - через bulk_create.
+        При гонке параллельных загрузок окончательным арбитром служит ограничение equ__type_serial_number__unq
+        (для действующего оборудования).
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> EquipmentCreateSerializer:
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Создание оборудования
         """
 
-        # Приведение входящих данных к списку, если пришло единичное оборудование
-        if not isinstance(request.data, list):
-            equipments = [request.data]
-        else:
-            equipments = request.data
+        report = CreateEquipmentReport(
+            compact=request.query_params.get(CREATE_RESPONSE_QUERY_PARAM, None) == CREATE_RESPONSE_COMPACT
+        )
+        CreateEquipmentService.process(CreateEquipmentService.iterate_equipments(request), request.user.id, report)
+
+        # Формирование схемы ответа
+        return report.build_response()
+
+    @staticmethod
+    def process(equipments, user_id: int, report: CreateEquipmentReport) -> None:
+        """
+            Обработка входящего оборудования пакетами по мере разбора (в том числе в фоновых заданиях загрузки)
+        """
+        for batch in CreateEquipmentService.iterate_batches(equipments, report):
+            CreateEquipmentService._execute_batch(user_id, batch, report)
+            report.flush()
+
+        if report.saved_count:
+            invalidate_counts(Equipment)
 
-        saved_equipments = list()
-        failed_equipments = list()
+    @staticmethod
+    def iterate_batches(equipments, report: CreateEquipmentReport):
+        """
+            Пакеты входящих записей по settings.BULK_CREATE_BATCH_SIZE (словари записей по индексам)
 
-        # Обработка каждого оборудования в списке
+            Ошибка разбора первой записи прерывает обработку, ошибки разбора остальных записей - в отчет.
+            Последний пакет выдается всегда (может быть пустым), чтобы после него отчет был сохранен
+        """
+        batch_size = settings.BULK_CREATE_BATCH_SIZE
+        batch = dict()
         for i, equipment in enumerate(equipments):
+            report.count = i + 1
+            if isinstance(equipment, ParseError):
+                if i == 0:
+                    raise equipment
+                report.add_error(i, serializers.ValidationError(equipment.detail, code='parse_error'), '')
+                continue
+            batch[i] = equipment
+            if len(batch) >= batch_size:
+                yield batch
+                batch = dict()
+        yield batch
 
-            # Ловим ошибки валидации, чтобы не отваливаться, а сохранять в список ошибок
+    @staticmethod
+    def iterate_equipments(request: Request):
+        """
+            Входящее оборудование по одному
+
+            Массив JSON и NDJSON разбираются потоково, прочие форматы - разбором DRF целиком.
+            Единичное оборудование приводится к списку
+        """
+        media_type = get_media_type(request.content_type)
+        stream = request.stream if media_type in STREAM_MEDIA_TYPES else None
+        if stream is None:
+            return request.data if isinstance(request.data, list) else [request.data]
+        encoding = request.encoding or settings.DEFAULT_CHARSET
+        if media_type == NDJSON_MEDIA_TYPE:
+            return iterate_ndjson(stream, encoding)
+        return iterate_json(stream, encoding)
+
+    @staticmethod
+    def _execute_batch(user_id: int, equipments: dict, report: CreateEquipmentReport) -> None:
+        """
+            Обработка пакета оборудования (equipments - входящие записи по индексам)
+        """
+
+        # Актуальные типы оборудования (копия снимка реестра на время обработки пакета, ее дополняет
+        # PreloadedEquipmentTypeField типами, которых в снимке еще нет)
+        equipment_types = dict(equipment_type_registry.get_snapshot().types)
+
+        # Валидация полей без обращений к БД
+        validated_equipments = dict()
+        for i, equipment in equipments.items():
             try:
-                # Обработка входящих данных (валидация и сохранение)
-                equipment_serializer = EquipmentRequestSerializer(data=equipment)
+                equipment_serializer = EquipmentBulkRequestSerializer(
+                    data=equipment, context={'equipment_types': equipment_types}
+                )
                 equipment_serializer.is_valid(raise_exception=True)
-                equipment_serializer.validated_data['created_by_id'] = request.user.id
-                equipment_serializer.validated_data['updated_by_id'] = request.user.id
-                instance = equipment_serializer.save()
+            except serializers.ValidationError as e:
+                report.add_error(i, e, equipment)
+                continue
+            validated_equipments[i] = equipment_serializer.validated_data
+
+        # Проверка серийных номеров по маске (пакетно по каждому типу)
+        indexes_by_type = dict()
+        for i, validated_data in validated_equipments.items():
+            indexes_by_type.setdefault(validated_data['equipment_type'].id, list()).append(i)
+        for equipment_type_id, indexes in indexes_by_type.items():
+            equipment_type = equipment_types[equipment_type_id]
+            matches = match_serial_numbers(equipment_type,
+                                           [validated_equipments[i]['serial_number'] for i in indexes])
+            for i, is_match in zip(indexes, matches):
+                if not is_match:
+                    serial_number = validated_equipments.pop(i)['serial_number']
+                    report.add_error(
+                        i, EquipmentRequestSerializer.serial_number_mask_error(serial_number, equipment_type),
+                        equipments[i]
+                    )
+
+        # Отсев дубликатов внутри пакета (дубликаты из предыдущих пакетов найдет проверка уникальности в БД)
+        candidates = dict()
+        duplicates = list()
+        for i in sorted(validated_equipments):
+            validated_data = validated_equipments[i]
+            key = (validated_data['equipment_type'].id, validated_data['serial_number'])
+            if key in candidates:
+                duplicates.append(i)
+                continue
+            candidates[key] = (i, Equipment(
+                equipment_type=validated_data['equipment_type'],
+                serial_number=validated_data['serial_number'],
+                description=validated_data.get('description', None),
+                created_by_id=user_id,
+                updated_by_id=user_id,
+            ))
+
+        # Проверка уникальности тип + серийный номер одним запросом на пакет
+        if candidates:
+            for equipment in Equipment.objects.filter(
+                    equipment_type_id__in={key[0] for key in candidates},
+                    serial_number__in={key[1] for key in candidates}
+            ).only('id', 'equipment_type_id', 'serial_number'):
+                key = (equipment.equipment_type_id, equipment.serial_number)
+                if key in candidates:
+                    i, instance = candidates.pop(key)
+                    report.add_error(i, EquipmentRequestSerializer.unique_error(), equipments[i])
+            # Архивное оборудование (холодная таблица) - одним запросом на пакет
+            for key, archived_equipment in find_archived_equipments(candidates).items():
+                i, instance = candidates.pop(key)
+                report.add_error(i, EquipmentRequestSerializer.archived_error(
+                    instance.equipment_type, instance.serial_number, archived_equipment.pk
+                ), equipments[i])
+
+        # Сохранение пакета
+        CreateEquipmentService._save_batch(equipments, candidates, report)
+        index_equipments([instance for i, instance in candidates.values()], replace=False)
+        for i, instance in candidates.values():
+            if instance.pk is not None:
+                report.add_saved(i, instance)
+
+        # Дубликаты внутри пакета (как при построчном сохранении - ошибка уникальности)
+        for i in duplicates:
+            report.add_error(i, EquipmentRequestSerializer.unique_error(), equipments[i])
 
-                # Преобразование данных в стандартную схему для ответа
-                equipment_serializer = EquipmentSerializer(data=equipment_serializer.data, instance=instance)
-                equipment_serializer.is_valid()
+    @staticmethod
+    def _save_batch(equipments: dict, candidates: dict, report: CreateEquipmentReport) -> None:
+        """
+            Сохранение пакета одним bulk_create, при нарушении уникальности (гонка) - построчно
+        """
+        if not candidates:
+            return
+        instances = [instance for i, instance in candidates.values()]
+        try:
+            with transaction.atomic():
+                Equipment.objects.bulk_create(instances)
+        except IntegrityError:
+            for instance in instances:
+                instance.pk = None
+            for key, (i, instance) in list(candidates.items()):
+                try:
+                    with transaction.atomic():
+                        instance.save(force_insert=True)
+                except IntegrityError:
+                    instance.pk = None
+                    if not Equipment.objects.filter(equipment_type_id=key[0], serial_number=key[1]).exists():
+                        raise
+                    report.add_error(i, EquipmentRequestSerializer.unique_error(), equipments[i])
+            return
+
+        # Не все СУБД (например, MySQL) возвращают ключи при bulk_create - догружаем одним запросом
+        if any(instance.pk is None for instance in instances):
+            keys = {(equipment_type_id, serial_number): pk for pk, equipment_type_id, serial_number in
+                    Equipment.objects.filter(
+                        equipment_type_id__in={key[0] for key in candidates},
+                        serial_number__in={key[1] for key in candidates}
+                    ).values_list('id', 'equipment_type_id', 'serial_number')}
+            for key, (i, instance) in candidates.items():
+                instance.pk = keys.get(key, None)
+
+
+class CreateEquipmentImportJobService:
+    """
+        Сервис постановки задания фоновой загрузки оборудования
+    """
 
-                # Добавление данных в массив для ответа
-                saved_equipments.append(equipment_serializer.data)
+    @staticmethod
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
+        """
+            Постановка задания фоновой загрузки оборудования (выполняет процесс run_import_worker)
+        """
 
-            except serializers.ValidationError as e:
+        # Обработка входящих данных (тело запроса сохраняется без разбора - его разберет задание)
+        media_type = get_media_type(request.content_type)
+        if media_type not in STREAM_MEDIA_TYPES:
+            raise UnsupportedMediaType(media_type)
+        stream = request.stream
+        encoding = request.encoding or settings.DEFAULT_CHARSET
+        try:
+            payload = (stream.read() if stream is not None else b'').decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            raise ParseError(f"Payload must be a text in {encoding}", code='payload')
+        if not payload.strip():
+            raise ParseError("Request must have payload", code='payload')
 
-                # Формирование схемы ошибочной входящей записи
-                error_equipment_serializer = ErrorCreateEquipmentSerializer(
-                    data={
-                        "index": i,
-                        "error": str(e),
-                        "data": str(equipment)
-                    }
-                )
-                error_equipment_serializer.is_valid()
-
-                # Добавление данных в массив ошибок для ответа
-                failed_equipments.append(error_equipment_serializer.data)
-
-        # Формирование дополнительной информации по результатам создания оборудования
-        info_created_serializer = InfoCreateEquipmentSerializer(
-            data={
-                "count": len(equipments),
-                "saved": len(saved_equipments),
-                "failed": len(failed_equipments),
-                "errors": failed_equipments,
-            }
-        )
-        info_created_serializer.is_valid()
+        # Постановка задания
+        job = EquipmentImportJob.objects.create(content_type=media_type, payload=payload, created_by_id=request.user.id)
 
         # Формирование схемы ответа
-        return_serializer = EquipmentCreateSerializer(
-            data={
-                'retCode': 0,
-                'retMsg': 'Ok' if len(failed_equipments) == 0 else 'There are some errors',
-                'result': saved_equipments,
-                'retExtInfo': info_created_serializer.data,
-                'retTime': int(time.time() * 10 ** 3)
-            }
-        )
-        return_serializer.is_valid()
+        return build_response(EquipmentImportJobSerializer(job).data)
+
 
-        return return_serializer
+class GetEquipmentImportJobService:
+    """
+        Сервис получения состояния задания фоновой загрузки оборудования
+    """
+
+    @staticmethod
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
+        """
+            Получение состояния (прогресса) задания фоновой загрузки оборудования
+        """
+
+        # Обработка входящих данных (корректность ключа)
+        job = GetEquipmentImportJobService.get_job(request, view, **kwargs)
+
+        # Формирование схемы ответа
+        return build_response(EquipmentImportJobSerializer(job).data)
+
+    @staticmethod
+    def get_job(request: Request, view: ModelViewSet, **kwargs) -> EquipmentImportJob:
+        """
+            Задание по ключу (пользователю доступны только свои задания, администратору - все)
+        """
+        pk = kwargs.get("pk", None)
+        if not pk:
+            raise ParseError("Request must have 'id' parameter", code='id')
+        queryset = view.queryset if request.user.is_staff else view.queryset.filter(created_by_id=request.user.id)
+        try:
+            return queryset.defer('payload').get(pk=pk)
+        except:
+            raise NotFound(f"Import job with id='{pk}' was not found", code='id')
+
+
+class GetEquipmentImportJobErrorsService:
+    """
+        Сервис получения ошибок задания фоновой загрузки оборудования
+    """
+
+    @staticmethod
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
+        """
+            Получение ошибочных входящих записей задания (по индексу записи, курсорная пагинация)
+        """
+
+        # Обработка входящих данных (корректность ключа)
+        job = GetEquipmentImportJobService.get_job(request, view, **kwargs)
+
+        # Пагининация списка ошибок
+        paginator = EquipmentImportJobErrorCursorPagination()
+        page = paginator.paginate_queryset(job.errors.values('index', 'error', 'data'), request, view=view)
+
+        # Формирование дополнительной информации по результатам пагинации (схема CursorPaginationListSerializer)
+        pagination_info = {
+            'items_per_page': paginator.page_size,
+            'previous_cursor': paginator.get_previous_cursor(),
+            'next_cursor': paginator.get_next_cursor(),
+        }
+
+        # Формирование схемы ответа
+        return build_response(
+            page, pagination_info,
+            ret_msg='Ok' if len(page) > 0 else 'Result set is empty'
+        )
 
 
 class GetEquipmentDetailsService:
@@ -308,7 +653,8 @@ class GetEquipmentDetailsService:
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> EquipmentDetailsSerializer:
+    @replica_read
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Получение детальной информации по заданному оборудованию
         """
@@ -317,36 +663,65 @@ class GetEquipmentDetailsService:
         pk = kwargs.get("pk", None)
         if not pk:
             raise ParseError(f"Request must have 'id' parameter", code='id')
-        try:
-            instance = view.queryset.get(pk=pk)
-        except:
-            raise NotFound(f"Equipment with id='{pk}' was not found", code='id')
 
-        # Преобразование данных в стандартную схему для ответа
-        equipment_serializer = EquipmentSerializer(
-            data={
-                'id': instance.id,
-                'equipment_type': instance.equipment_type_id,
-                'serial_number': instance.serial_number,
-                'description': instance.description
-            },
-            instance=instance
-        )
-        equipment_serializer.is_valid()
+        # Схема оборудования (из кэша, при промахе - из БД; часть полей - из полной схемы в кэше)
+        fields = get_requested_fields(request)
+        if fields is not None and not equipment_details_cache.is_enabled():
+            equipment = GetEquipmentDetailsService.load(view, pk, fields)
+        else:
+            equipment = equipment_details_cache.get(pk, lambda: GetEquipmentDetailsService.load(view, pk))
+            if fields is not None:
+                equipment = {field: equipment[field] for field in fields}
 
         # Формирование схемы ответа
-        return_serializer = EquipmentDetailsSerializer(
-            data={
-                'retCode': 0,
-                'retMsg': 'Ok',
-                'result': equipment_serializer.data,
-                'retExtInfo': '',
-                'retTime': int(time.time() * 10 ** 3)
-            }
-        )
-        return_serializer.is_valid()
+        return build_response(equipment)
+
+    @staticmethod
+    @replica_read
+    async def aexecute(request: HttpRequest, view, *args, **kwargs) -> dict:
+        """
+            Получение детальной информации по заданному оборудованию (async-контроллер)
+        """
+
+        # Обработка входящих данных (корректность ключа)
+        pk = kwargs.get("pk", None)
+        if not pk:
+            raise ParseError(f"Request must have 'id' parameter", code='id')
+
+        # Схема оборудования (из кэша, при промахе - из БД; часть полей - из полной схемы в кэше)
+        fields = get_requested_fields(request)
+        if fields is not None and not equipment_details_cache.is_enabled():
+            equipment = await GetEquipmentDetailsService.aload(view, pk, fields)
+        else:
+            equipment = await equipment_details_cache.aget(pk, lambda: GetEquipmentDetailsService.aload(view, pk))
+            if fields is not None:
+                equipment = {field: equipment[field] for field in fields}
+
+        # Формирование схемы ответа
+        return build_response(equipment)
+
+    @staticmethod
+    def load(view, pk, fields=None) -> dict:
+        """
+            Схема оборудования из БД (читаются только колонки схемы или полей fields)
+        """
+        try:
+            row = EquipmentSerializer.values_queryset(view.queryset, fields).get(pk=pk)
+        except:
+            raise NotFound(f"Equipment with id='{pk}' was not found", code='id')
+        return EquipmentSerializer.values_to_representation([row], fields=fields)[0]
 
-        return return_serializer
+    @staticmethod
+    async def aload(view, pk, fields=None) -> dict:
+        """
+            Схема оборудования из БД (для async-контроллеров)
+        """
+        try:
+            row = await EquipmentSerializer.values_queryset(view.queryset, fields).aget(pk=pk)
+        except:
+            raise NotFound(f"Equipment with id='{pk}' was not found", code='id')
+        equipment_types = await equipment_type_registry.aget_snapshot()
+        return EquipmentSerializer.values_to_representation([row], equipment_types, fields)[0]
 
 
 class UpdateEquipmentService:
@@ -355,7 +730,7 @@ class UpdateEquipmentService:
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> EquipmentUpdateSerializer:
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Изменение оборудования
         """
@@ -374,27 +749,196 @@ class UpdateEquipmentService:
         equipment_serializer.is_valid(raise_exception=True)
         equipment_serializer.validated_data['updated_by_id'] = request.user.id
         instance = equipment_serializer.save()
-
-        # Преобразование данных в стандартную схему для ответа
-        equipment_serializer = EquipmentSerializer(data=equipment_serializer.data, instance=instance)
-        equipment_serializer.is_valid()
+        index_equipments([instance])
+        invalidate_counts(Equipment)
+        equipment_details_cache.invalidate(instance.id)
 
         # Формирование схемы ответа
         is_data = request.data.get('equipment_type', None) is not None or \
             request.data.get('serial_number', None) is not None or \
             request.data.get('description', None) is not None
-        return_serializer = EquipmentUpdateSerializer(
-            data={
-                'retCode': 0,
-                'retMsg': 'Ok' if is_data else 'You changed nothing',
-                'result': equipment_serializer.data,
-                'retExtInfo': '',
-                'retTime': int(time.time() * 10 ** 3)
-            }
+        return build_response(EquipmentSerializer(instance).data, ret_msg='Ok' if is_data else 'You changed nothing')
+
+
+class BulkUpdateEquipmentService:
+    """
+        Сервис пакетного изменения оборудования
+
+        Входящие записи ({id, ...изменения}) разбираются и обрабатываются пакетами, как при создании оборудования:
+        изменяемое оборудование читается одним запросом на пакет, маска проверяется пакетно по типам, уникальность
+        тип + серийный номер - одним запросом на пакет, запись - bulk_update только измененных полей (отдельно для
+        каждого набора измененных полей). Схема ответа и отчет об ошибках по индексам - как при создании оборудования
+    """
+
+    @staticmethod
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
+        """
+            Пакетное изменение оборудования
+        """
+
+        report = CreateEquipmentReport(
+            compact=request.query_params.get(CREATE_RESPONSE_QUERY_PARAM, None) == CREATE_RESPONSE_COMPACT
         )
-        return_serializer.is_valid()
+        equipments = CreateEquipmentService.iterate_equipments(request)
+        for batch in CreateEquipmentService.iterate_batches(equipments, report):
+            BulkUpdateEquipmentService._execute_batch(view, request.user.id, batch, report)
 
-        return return_serializer
+        # Формирование схемы ответа
+        return report.build_response()
+
+    @staticmethod
+    def _execute_batch(view: ModelViewSet, user_id: int, equipments: dict, report: CreateEquipmentReport) -> None:
+        """
+            Обработка пакета изменений (equipments - входящие записи по индексам)
+        """
+
+        # Актуальные типы оборудования (копия снимка реестра на время обработки пакета, ее дополняет
+        # PreloadedEquipmentTypeField типами, которых в снимке еще нет)
+        equipment_types = dict(equipment_type_registry.get_snapshot().types)
+
+        # Валидация полей без обращений к БД, повторы ключа внутри пакета
+        validated_equipments = dict()
+        indexes_by_id = dict()
+        for i, equipment in equipments.items():
+            try:
+                equipment_serializer = EquipmentBulkUpdateRequestSerializer(
+                    data=equipment, context={'equipment_types': equipment_types}
+                )
+                equipment_serializer.is_valid(raise_exception=True)
+                pk = equipment_serializer.validated_data['id']
+                if pk in indexes_by_id:
+                    raise serializers.ValidationError(
+                        f"Equipment with id='{pk}' is repeated in input set (index {indexes_by_id[pk]})", code='id'
+                    )
+            except serializers.ValidationError as e:
+                report.add_error(i, e, equipment)
+                continue
+            indexes_by_id[pk] = i
+            validated_equipments[i] = equipment_serializer.validated_data
+
+        # Изменяемое оборудование одним запросом на пакет, изменения - только отличающиеся значения полей
+        instances = view.queryset.only('id', 'equipment_type', 'serial_number', 'description', 'is_archived')\
+            .in_bulk(list(indexes_by_id))
+        changes = dict()
+        for pk, i in indexes_by_id.items():
+            instance = instances.get(pk, None)
+            if instance is None:
+                report.add_error(
+                    i, serializers.ValidationError(f"Equipment with id='{pk}' was not found", code='id'), equipments[i]
+                )
+                continue
+            # Тип изменяемого оборудования - из реестра типов
+            if instance.equipment_type_id in equipment_types:
+                instance.equipment_type = equipment_types[instance.equipment_type_id]
+            validated_data = validated_equipments[i]
+            fields = dict()
+            equipment_type = validated_data.get('equipment_type', None)
+            if equipment_type is not None and equipment_type.id != instance.equipment_type_id:
+                fields['equipment_type'] = equipment_type
+            for field in ('serial_number', 'description', ):
+                if field in validated_data and validated_data[field] != getattr(instance, field):
+                    fields[field] = validated_data[field]
+            changes[i] = (instance, fields)
+
+        # Тип и серийный номер оборудования после изменения
+        def get_target(i) -> tuple:
+            instance, fields = changes[i]
+            return fields.get('equipment_type', instance.equipment_type), \
+                fields.get('serial_number', instance.serial_number)
+
+        # Проверка серийных номеров по маске (пакетно по каждому типу; как при изменении - если тип или
+        # серийный номер переданы)
+        indexes_by_type = dict()
+        for i in changes:
+            if 'equipment_type' in validated_equipments[i] or 'serial_number' in validated_equipments[i]:
+                indexes_by_type.setdefault(get_target(i)[0], list()).append(i)
+        for equipment_type, indexes in indexes_by_type.items():
+            serial_numbers = [get_target(i)[1] for i in indexes]
+            for i, serial_number, is_match in zip(indexes, serial_numbers,
+                                                  match_serial_numbers(equipment_type, serial_numbers)):
+                if not is_match:
+                    changes.pop(i)
+                    report.add_error(
+                        i, EquipmentRequestSerializer.serial_number_mask_error(serial_number, equipment_type),
+                        equipments[i]
+                    )
+
+        # Проверка уникальности новых пар тип + серийный номер одним запросом на пакет, затем - внутри пакета
+        candidates = dict()
+        for i, (instance, fields) in changes.items():
+            if 'equipment_type' in fields or 'serial_number' in fields:
+                equipment_type, serial_number = get_target(i)
+                candidates.setdefault((equipment_type.id, serial_number), list()).append(i)
+        if candidates:
+            for equipment in Equipment.objects.filter(
+                    equipment_type_id__in={key[0] for key in candidates},
+                    serial_number__in={key[1] for key in candidates}
+            ).only('id', 'equipment_type_id', 'serial_number'):
+                key = (equipment.equipment_type_id, equipment.serial_number)
+                for i in candidates.pop(key, list()):
+                    changes.pop(i)
+                    report.add_error(i, EquipmentRequestSerializer.unique_error(), equipments[i])
+            # Архивное оборудование (холодная таблица) - одним запросом на пакет
+            for key, archived_equipment in find_archived_equipments(candidates).items():
+                for i in candidates.pop(key):
+                    equipment_type, serial_number = get_target(i)
+                    changes.pop(i)
+                    report.add_error(i, EquipmentRequestSerializer.archived_error(
+                        equipment_type, serial_number, archived_equipment.pk
+                    ), equipments[i])
+        for key, indexes in candidates.items():
+            for i in indexes[1:]:
+                changes.pop(i)
+                report.add_error(i, EquipmentRequestSerializer.unique_error(), equipments[i])
+
+        # Сохранение пакета
+        changed = BulkUpdateEquipmentService._save_batch(user_id, equipments, changes, report)
+        if changed:
+            index_equipments(changed)
+            invalidate_counts(Equipment)
+            equipment_details_cache.invalidate(*[instance.pk for instance in changed])
+        for i in sorted(changes):
+            report.add_saved(i, changes[i][0])
+
+    @staticmethod
+    def _save_batch(user_id: int, equipments: dict, changes: dict, report: CreateEquipmentReport) -> list:
+        """
+            Сохранение пакета: bulk_update по группам записей с одинаковым набором измененных полей, при нарушении
+            уникальности (гонка) - построчно. Возвращает измененное оборудование
+        """
+        updated_at = timezone.now()
+        groups = dict()
+        for i, (instance, fields) in changes.items():
+            if not fields:
+                continue
+            for field, value in fields.items():
+                setattr(instance, field, value)
+            instance.updated_by_id = user_id
+            instance.updated_at = updated_at
+            groups.setdefault((*fields, 'updated_by', 'updated_at'), list()).append(i)
+
+        changed = list()
+        for update_fields, indexes in groups.items():
+            instances = [changes[i][0] for i in indexes]
+            try:
+                with transaction.atomic():
+                    Equipment.objects.bulk_update(instances, update_fields)
+                changed.extend(instances)
+                continue
+            except IntegrityError:
+                pass
+            for i, instance in zip(indexes, instances):
+                try:
+                    with transaction.atomic():
+                        instance.save(update_fields=update_fields)
+                    changed.append(instance)
+                except IntegrityError:
+                    if not Equipment.objects.filter(equipment_type_id=instance.equipment_type_id,
+                                                    serial_number=instance.serial_number).exists():
+                        raise
+                    changes.pop(i)
+                    report.add_error(i, EquipmentRequestSerializer.unique_error(), equipments[i])
+        return changed
 
 
 class DeleteEquipmentService:
@@ -403,7 +947,7 @@ class DeleteEquipmentService:
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> EquipmentDeleteSerializer:
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Удаление оборудования
         """
@@ -420,20 +964,138 @@ class DeleteEquipmentService:
         # "Мягкое" удаление
         instance.is_archived = True
         instance.save()
+        unindex_equipments([instance.pk])
+        invalidate_counts(Equipment)
+        equipment_details_cache.invalidate(instance.pk)
 
         # Формирование схемы ответа
-        return_serializer = EquipmentDeleteSerializer(
-            data={
-                'retCode': 0,
-                'retMsg': 'Ok',
-                'result': f'Equipment with id={pk} was deleted',
-                'retExtInfo': '',
-                'retTime': int(time.time() * 10 ** 3)
-            }
-        )
-        return_serializer.is_valid()
+        return build_response(f'Equipment with id={pk} was deleted')
+
+
+class BulkArchiveEquipmentService:
+    """
+        Сервис пакетной архивации оборудования
 
-        return return_serializer
+        Оборудование - по списку ключей (ids в теле запроса) и (или) по параметрам фильтров списка оборудования.
+        Ключи читаются порциями по BULK_ARCHIVE_CHUNK_SIZE, каждая порция архивируется одним UPDATE (только
+        is_archived, updated_by, updated_at) без сохранения экземпляров. В ответе - количество измененного оборудования
+    """
+
+    @staticmethod
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
+        """
+            Пакетная архивация оборудования
+        """
+        chunks = BulkArchiveEquipmentService.get_chunks(request, view.get_queryset(), EquipmentFilter)
+        count = BulkArchiveEquipmentService.set_archived(request, chunks, True)
+
+        # Формирование схемы ответа
+        return build_response(f'{count} equipments were archived', {'count': count})
+
+    @staticmethod
+    def get_chunks(request: Request, queryset, filterset_class):
+        """
+            Порции ключей оборудования по ключам из тела запроса и (или) параметрам фильтров
+        """
+
+        # Обработка входящих данных (ключи и фильтры; без них запрос затронул бы все оборудование)
+        request_serializer = EquipmentBulkArchiveRequestSerializer(data=request.data)
+        request_serializer.is_valid(raise_exception=True)
+        ids = request_serializer.validated_data.get('ids', None)
+        if ids is None and not any(request.query_params.get(name) for name in filterset_class.base_filters):
+            raise ParseError("Request must have 'ids' or filter parameters", code='ids')
+
+        # Фильтрация (как в DjangoFilterBackend)
+        filterset = filterset_class(request.query_params, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return BulkArchiveEquipmentService._iterate_chunks(filterset.qs.order_by('id').values_list('id', flat=True),
+                                                           ids)
+
+    @staticmethod
+    def set_archived(request: Request, chunks, is_archived: bool) -> int:
+        """
+            Архивация (восстановление) оборудования порциями ключей, возвращает количество измененного
+        """
+        count = 0
+        updated_at = timezone.now()
+        for pks in chunks:
+            with transaction.atomic():
+                count += Equipment.objects.filter(pk__in=pks, is_archived=not is_archived)\
+                    .update(is_archived=is_archived, updated_by_id=request.user.id, updated_at=updated_at)
+                if is_archived:
+                    unindex_equipments(pks)
+                else:
+                    index_equipments(Equipment.objects.filter(pk__in=pks).only('id', 'serial_number', 'description'))
+            equipment_details_cache.invalidate(*pks)
+
+        if count:
+            invalidate_counts(Equipment)
+        return count
+
+    @staticmethod
+    def _iterate_chunks(queryset, ids: list = None):
+        """
+            Порции ключей отфильтрованного оборудования: по списку ключей или по возрастанию ключа (пустые не
+            возвращаются)
+        """
+        chunk_size = settings.BULK_ARCHIVE_CHUNK_SIZE
+        if ids is not None:
+            ids = sorted(set(ids))
+            for offset in range(0, len(ids), chunk_size):
+                pks = list(queryset.filter(id__in=ids[offset:offset + chunk_size]))
+                if pks:
+                    yield pks
+            return
+
+        last_id = 0
+        while True:
+            pks = list(queryset.filter(id__gt=last_id)[:chunk_size])
+            if not pks:
+                return
+            yield pks
+            last_id = pks[-1]
+
+
+class BulkRestoreEquipmentService:
+    """
+        Сервис пакетного восстановления архивного оборудования (как пакетная архивация, фильтры - по архивному
+        оборудованию)
+
+        Оборудование, еще не перенесенное в архив, восстанавливается снятием признака, перенесенное - переносом
+        из архива обратно (backend.archive)
+    """
+
+    @staticmethod
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
+        """
+            Пакетное восстановление оборудования
+        """
+        chunks = BulkArchiveEquipmentService.get_chunks(request, Equipment.objects.filter(is_archived=True),
+                                                        ArchivedEquipmentFilter)
+        count = BulkArchiveEquipmentService.set_archived(request, chunks, False)
+
+        # Восстановление из архива (оборудование, нарушающее уникальность, остается в архиве)
+        restored_count = 0
+        errors = list()
+        for pks in BulkArchiveEquipmentService.get_chunks(request, EquipmentArchive.objects.all(),
+                                                          ArchivedEquipmentFilter):
+            restored, not_restored = restore_archived_equipments(pks, request.user.id)
+            if not_restored:
+                error = str(EquipmentRequestSerializer.unique_error().detail[0])
+                errors.extend({'id': pk, 'error': error} for pk in not_restored)
+            if restored:
+                index_equipments(Equipment.objects.filter(pk__in=restored).only('id', 'serial_number', 'description'),
+                                 replace=False)
+                equipment_details_cache.invalidate(*restored)
+                restored_count += len(restored)
+        if restored_count:
+            invalidate_counts(Equipment)
+        count += restored_count
+
+        # Формирование схемы ответа
+        return build_response(f'{count} equipments were restored',
+                              {'count': count, 'failed': len(errors), 'errors': errors})
 
 
 class CreateUserService:
@@ -442,7 +1104,7 @@ class CreateUserService:
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> UserCreateSerializer:
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Регистрация пользователя
         """
@@ -452,23 +1114,8 @@ class CreateUserService:
         user_serializer.is_valid(raise_exception=True)
         instance = user_serializer.save()
 
-        # Преобразование данных в стандартную схему для ответа
-        user_serializer = UserSerializer(data=user_serializer.data, instance=instance)
-        user_serializer.is_valid()
-
         # Формирование схемы ответа
-        return_serializer = UserCreateSerializer(
-            data={
-                'retCode': 0,
-                'retMsg': 'Ok',
-                'result': user_serializer.data,
-                'retExtInfo': '',
-                'retTime': int(time.time() * 10 ** 3)
-            }
-        )
-        return_serializer.is_valid()
-
-        return return_serializer
+        return build_response(UserSerializer(instance).data)
 
 
 class GetUserDetailsService:
@@ -477,7 +1124,7 @@ class GetUserDetailsService:
     """
 
     @staticmethod
-    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> UserSerializer:
+    def execute(request: Request, view: ModelViewSet, *args, **kwargs) -> dict:
         """
             Получение профиля пользователя
         """
@@ -493,16 +1140,4 @@ class GetUserDetailsService:
             raise NotFound(f"User with id='{pk}' was not found", code='id')
 
         # Преобразование данных в стандартную схему для ответа
-        user_serializer = UserSerializer(
-            data={
-                'id': instance.id,
-                'username': instance.username,
-                'first_name': instance.first_name,
-                'last_name': instance.last_name,
-                'email': instance.email,
-            },
-            instance=instance
-        )
-        user_serializer.is_valid()
-
-        return user_serializer
+        return UserSerializer(instance).data
@@ -1,3 +1,837 @@
-from django.test import TestCase
+import gzip
+import json
+import time
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, modify_settings, \
+    override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.archive import move_archived_equipments
+from backend.counts import invalidate_counts
+from backend.db.pool import ConnectionPool, PooledConnection
+from backend.models import Equipment, EquipmentType, EquipmentArchive, EquipmentImportJob
+from backend.registry import equipment_type_registry
+from backend.replicas import get_sticky_key
+from backend.views import metrics
+
+# Ошибка уникальности тип + серийный номер в отчете создания (как у построчного сохранения с UniqueTogetherValidator)
+UNIQUE_ERROR = "{'non_field_errors': [ErrorDetail(string='The fields equipment_type, serial_number must make " \
+               "a unique set.', code='unique')]}"
+
+# Реплика чтения в тестах - отдельная БД SQLite в памяти (ее данные отличаются от основной БД: видно, откуда прочитано).
+# Псевдоним добавляется при загрузке тестов, тестовую БД для него создает и мигрирует test runner
+REPLICA_ALIAS = 'replica_test'
+connections.settings[REPLICA_ALIAS] = connections.configure_settings({
+    DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+    REPLICA_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+})[REPLICA_ALIAS]
+
+
+class EquipmentTestMixin:
+    """
+        Основа тестов оборудования: администратор и тип оборудования
+    """
+
+    def setUp(self):
+        cache.clear()
+        equipment_type_registry.invalidate()
+        self.user = User.objects.create_user('admin', password='admin', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.equipment_type = EquipmentType.objects.create(name='TP-Link', serial_number_mask='XXAAAAAXAA')
+
+    def create_equipments(self, equipments, **params):
+        response = self.client.post('/api/equipment', equipments, format='json', QUERY_STRING='&'.join(
+            f'{name}={value}' for name, value in params.items()
+        ))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+
+class EquipmentTestCase(EquipmentTestMixin, TestCase):
+    """
+        Базовый класс тестов оборудования
+    """
+
+
+class CreateEquipmentReportTestCase(EquipmentTestCase):
+    """
+        Отчет об ошибках создания оборудования (POST /api/equipment): состав, индексы и тексты ошибок
+    """
+
+    def test_duplicate_in_database(self):
+        self.create_equipments({'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'})
+
+        data = self.create_equipments({'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'})
+
+        self.assertEqual(data['retMsg'], 'There are some errors')
+        self.assertEqual(data['retExtInfo']['errors'], [{
+            'index': 0,
+            'error': UNIQUE_ERROR,
+            'data': f"{{'equipment_type': {self.equipment_type.id}, 'serial_number': '0QABCDE1FG'}}",
+        }])
+
+    def test_duplicate_in_payload(self):
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG', 'description': 'a'},
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG', 'description': 'dup'},
+        ])
+
+        self.assertEqual([equipment['description'] for equipment in data['result']], ['a'])
+        self.assertEqual(data['retExtInfo']['count'], 2)
+        self.assertEqual(data['retExtInfo']['saved'], 1)
+        self.assertEqual(data['retExtInfo']['failed'], 1)
+        self.assertEqual(data['retExtInfo']['errors'], [{
+            'index': 1,
+            'error': UNIQUE_ERROR,
+            'data': f"{{'equipment_type': {self.equipment_type.id}, 'serial_number': '0QABCDE1FG', "
+                    f"'description': 'dup'}}",
+        }])
+
+    def test_duplicate_in_archive(self):
+        data = self.create_equipments({'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'})
+        pk = data['result'][0]['id']
+        self.client.delete(f'/api/equipment/{pk}')
+        move_archived_equipments(chunk_size=100)
+
+        data = self.create_equipments({'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'})
+
+        self.assertEqual([error['error'] for error in data['retExtInfo']['errors']], [
+            f"{{'non_field_errors': [ErrorDetail(string=\"Equipment with type 'TP-Link' and serial number "
+            f"'0QABCDE1FG' is already exist (id={pk}-archived)\", code='serial_number')]}}"
+        ])
+
+    def test_errors_order_and_text(self):
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'},
+            {'equipment_type': self.equipment_type.id, 'serial_number': 'bad'},
+            {'equipment_type': 999, 'serial_number': '0QABCDE1FG'},
+            {'serial_number': '0QABCDE1FG'},
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'},
+        ])
+
+        self.assertEqual([error['index'] for error in data['retExtInfo']['errors']], [1, 2, 3, 4])
+        self.assertEqual([error['error'] for error in data['retExtInfo']['errors']], [
+            "{'non_field_errors': [ErrorDetail(string=\"Serial number 'bad' does not match 'TP-Link' equipment type "
+            "mask 'XXAAAAAXAA' where 'N' is in [0-9], 'A' is in [A-Z], 'a' is in [a-z], 'X' is in [A-Z, 0-9], "
+            "'Z' is in [-_@]\", code='serial_number')]}",
+            "{'equipment_type': [ErrorDetail(string='Invalid pk \"999\" - object does not exist.', "
+            "code='does_not_exist')]}",
+            "{'equipment_type': [ErrorDetail(string='This field is required.', code='required')]}",
+            UNIQUE_ERROR,
+        ])
+
+    def test_compact_report(self):
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'},
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'},
+        ], response='compact')
+
+        self.assertEqual(data['result'], [])
+        self.assertEqual(data['retExtInfo'], {'count': 2, 'saved': 1, 'failed': 1, 'failed_indexes': [1]})
+        self.assertEqual(Equipment.objects.count(), 1)
+
+
+class EquipmentTypeRegistryTestCase(EquipmentTestCase):
+    """
+        Запись при устаревшем снимке реестра типов (тип создан другим процессом, версия данных типов не изменилась)
+    """
+
+    def setUp(self):
+        super().setUp()
+        equipment_type_registry.get_snapshot()
+        self.other_type = EquipmentType.objects.create(name='D-Link', serial_number_mask='NNNNN')
+
+    def test_create_equipment_of_new_type(self):
+        data = self.create_equipments({'equipment_type': self.other_type.id, 'serial_number': '12345'})
+
+        self.assertEqual(data['retExtInfo']['saved'], 1)
+        self.assertEqual(data['result'][0]['equipment_type_name'], 'D-Link')
+
+    def test_update_equipment_to_new_type(self):
+        equipment = Equipment.objects.create(equipment_type=self.equipment_type, serial_number='0QABCDE1FG')
+
+        response = self.client.put(f'/api/equipment/{equipment.id}',
+                                   {'equipment_type': self.other_type.id, 'serial_number': '12345'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Equipment.objects.get(pk=equipment.id).equipment_type_id, self.other_type.id)
+
+    def test_unknown_type(self):
+        data = self.create_equipments({'equipment_type': 999, 'serial_number': '12345'})
+
+        self.assertEqual([error['error'] for error in data['retExtInfo']['errors']], [
+            "{'equipment_type': [ErrorDetail(string='Invalid pk \"999\" - object does not exist.', "
+            "code='does_not_exist')]}",
+        ])
+
+    def test_duplicate_name(self):
+        response = self.client.post('/api/equipment-type', {'name': 'd-link', 'serial_number_mask': 'NN'},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'name': [f"Equipment type with name='d-link' is already exist (id={self.other_type.id})"]
+        })
+
+
+class EquipmentTypeDictionaryTestCase(EquipmentTestCase):
+    """
+        Справочник типов оборудования (GET /api/equipment-type без параметров): retTime и ETag
+    """
+
+    def test_ret_time_is_response_time(self):
+        self.client.get('/api/equipment-type')
+        time.sleep(0.01)
+        started = int(time.time() * 10 ** 3)
+
+        response = self.client.get('/api/equipment-type')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(response.json()['retTime'], started)
+        self.assertEqual(response.json()['result'], [
+            {'id': self.equipment_type.id, 'name': 'TP-Link', 'serial_number_mask': 'XXAAAAAXAA'}
+        ])
+
+    def test_etag_follows_data_of_types(self):
+        etag = self.client.get('/api/equipment-type')['ETag']
+
+        # Новая отметка версии без изменения данных (истечение ключа версии, другой процесс) - тот же ETag
+        invalidate_counts(EquipmentType)
+        response = self.client.get('/api/equipment-type', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get('/api/equipment-type', HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.put(f'/api/equipment-type/{self.equipment_type.id}', {'name': 'TP-Link 2'},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/api/equipment-type', HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['result'][0]['name'], 'TP-Link 2')
+
+
+class RestoreEquipmentTestCase(EquipmentTestCase):
+    """
+        Пакетное восстановление оборудования из архивной таблицы (POST /api/equipment/restore)
+    """
+
+    def test_restore_report(self):
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'},
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FX'},
+        ])
+        ids = [equipment['id'] for equipment in data['result']]
+        self.client.post('/api/equipment/archive', {'ids': ids}, format='json')
+        move_archived_equipments(chunk_size=100)
+        # Оборудование с тем же типом и серийным номером создано в обход проверок
+        Equipment.objects.create(equipment_type=self.equipment_type, serial_number='0QABCDE1FX')
+
+        response = self.client.post('/api/equipment/restore', {'ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['retExtInfo'], {'count': 1, 'failed': 1, 'errors': [{
+            'id': ids[1],
+            'error': 'The fields equipment_type, serial_number must make a unique set.',
+        }]})
+        self.assertTrue(Equipment.objects.filter(pk=ids[0], is_archived=False).exists())
+        self.assertEqual(list(EquipmentArchive.objects.values_list('id', flat=True)), [ids[1]])
+
+    def test_duplicate_of_archived(self):
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'},
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FX'},
+        ])
+        archived_id, pk = [equipment['id'] for equipment in data['result']]
+        self.client.delete(f'/api/equipment/{archived_id}')
+        move_archived_equipments(chunk_size=100)
+        archived_error = f"Equipment with type 'TP-Link' and serial number '0QABCDE1FG' is already exist " \
+                         f"(id={archived_id}-archived)"
+
+        response = self.client.put(f'/api/equipment/{pk}', {'serial_number': '0QABCDE1FG'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': [archived_error]})
+
+        response = self.client.put('/api/equipment', [{'id': pk, 'serial_number': '0QABCDE1FG'}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([error['error'] for error in response.json()['retExtInfo']['errors']], [
+            f"{{'non_field_errors': [ErrorDetail(string=\"{archived_error}\", code='serial_number')]}}"
+        ])
+
+
+class EquipmentSearchTestCase(EquipmentTestCase):
+    """
+        Общий фильтр q списка оборудования (GET /api/equipment?q=)
+    """
+
+    def setUp(self):
+        super().setUp()
+        other_type = EquipmentType.objects.create(name='D-Link', serial_number_mask='NXXAAXZXaa')
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QRSTUV1WX', 'description': 'core switch'},
+            {'equipment_type': other_type.id, 'serial_number': '1ABCDE_Aaz', 'description': 'access point'},
+        ])
+        self.assertEqual(data['retExtInfo']['saved'], 2)
+
+    def search(self, value) -> list:
+        response = self.client.get('/api/equipment', {'q': value})
+        self.assertEqual(response.status_code, 200)
+        return [equipment['serial_number'] for equipment in response.json()['result']]
+
+    def test_serial_number_fragment(self):
+        self.assertEqual(self.search('stuv'), ['0QRSTUV1WX'])
+        self.assertEqual(self.search('E_A'), ['1ABCDE_Aaz'])
+
+    def test_words(self):
+        self.assertEqual(self.search('swi'), ['0QRSTUV1WX'])
+        self.assertEqual(self.search('access stuv'), [])
+        self.assertEqual(self.search('d-link poi'), ['1ABCDE_Aaz'])
+        self.assertEqual(self.search('tp-link poi'), [])
+        self.assertEqual(self.search('link'), ['0QRSTUV1WX', '1ABCDE_Aaz'])
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA_ALIAS])
+class ReplicaReadTestCase(EquipmentTestCase):
+    """
+        Чтение с реплики (ReplicaRouter, replica_read), привязка к основной БД после записи и кэши прочитанного
+        с реплики
+    """
+    databases = {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+
+    def setUp(self):
+        super().setUp()
+        self.equipment = Equipment.objects.create(equipment_type=self.equipment_type, serial_number='0QABCDE1FG',
+                                                  description='primary')
+        self.equipment_type.save(using=REPLICA_ALIAS, force_insert=True)
+        self.replicate(self.equipment, description='replica')
+        invalidate_counts(Equipment)
+        self.reader = APIClient()
+        self.reader.force_authenticate(User.objects.create_user('reader', password='reader'))
+
+    def replicate(self, equipment, **values) -> None:
+        """
+            Строка оборудования на реплике (values - отличия от основной БД)
+        """
+        Equipment.objects.using(REPLICA_ALIAS).update_or_create(id=equipment.id, defaults={
+            'equipment_type_id': equipment.equipment_type_id, 'serial_number': equipment.serial_number,
+            'description': equipment.description, **values,
+        })
+
+    def read(self, client) -> tuple:
+        """
+            Описание оборудования (детальная информация) и количество оборудования (список)
+        """
+        details = client.get(f'/api/equipment/{self.equipment.id}')
+        equipments = client.get('/api/equipment')
+        self.assertEqual((details.status_code, equipments.status_code), (200, 200))
+        return details.json()['result']['description'], equipments.json()['retExtInfo']['count_items']
+
+    def test_read_from_replica(self):
+        self.assertEqual(self.read(self.reader), ('replica', 1))
+
+        with override_settings(DATABASE_REPLICAS=[]):
+            cache.clear()
+            self.assertEqual(self.read(self.reader), ('primary', 1))
+
+    def test_write_sticks_to_primary(self):
+        response = self.client.put(f'/api/equipment/{self.equipment.id}', {'description': 'changed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertTrue(cache.get(get_sticky_key(self.user.pk)))
+        self.assertEqual(self.read(self.reader), ('replica', 1))
+        self.assertEqual(self.read(self.client), ('changed', 1))
+
+    def test_replica_reads_are_cached_when_settled(self):
+        # Данные только что изменены: прочитанное с реплики не кэшируется
+        self.assertEqual(self.read(self.reader), ('replica', 1))
+        self.replicate(self.equipment, description='replica 2')
+        Equipment.objects.using(REPLICA_ALIAS).create(equipment_type_id=self.equipment_type.id,
+                                                      serial_number='0QABCDE1FX')
+        self.assertEqual(self.read(self.reader), ('replica 2', 2))
+
+        # Изменения старше окна привязки к основной БД уже есть на репликах: прочитанное кэшируется
+        with override_settings(DATABASE_REPLICA_STICKY_TIMEOUT=0):
+            self.assertEqual(self.read(self.reader), ('replica 2', 2))
+            self.replicate(self.equipment, description='replica 3')
+            Equipment.objects.using(REPLICA_ALIAS).create(equipment_type_id=self.equipment_type.id,
+                                                          serial_number='0QABCDE1FY')
+            self.assertEqual(self.read(self.reader), ('replica 2', 2))
+
+
+class ImportWorkerTestCase(EquipmentTestMixin, TransactionTestCase):
+    """
+        Фоновая загрузка оборудования: POST /api/equipment-import и процесс run_import_worker (закрывает соединения
+        с БД между заданиями, поэтому тесты без общей транзакции)
+    """
+
+    def run_worker(self) -> str:
+        stdout = StringIO()
+        call_command('run_import_worker', '--once', stdout=stdout)
+        return stdout.getvalue()
+
+    def get_job(self, job_id: int) -> dict:
+        response = self.client.get(f'/api/equipment-import/{job_id}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['result']
+
+    def test_run_job(self):
+        response = self.client.post('/api/equipment-import', json.dumps([
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'},
+            {'equipment_type': self.equipment_type.id, 'serial_number': 'invalid'},
+        ]), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        job_id = response.json()['result']['id']
+        self.assertEqual(self.get_job(job_id)['status'], EquipmentImportJob.STATUS_PENDING)
+
+        self.assertIn(f'Import job {job_id} done', self.run_worker())
+
+        job = self.get_job(job_id)
+        self.assertEqual((job['status'], job['count'], job['saved'], job['failed']),
+                         (EquipmentImportJob.STATUS_DONE, 2, 1, 1))
+        self.assertTrue(Equipment.objects.filter(serial_number='0QABCDE1FG').exists())
+        self.assertEqual(self.client.get(f'/api/equipment-import/{job_id}/errors').status_code, 200)
+
+    @override_settings(IMPORT_JOB_TIMEOUT=60)
+    def test_stale_running_job(self):
+        now = timezone.now()
+        stale_job, running_job = (
+            EquipmentImportJob.objects.create(content_type='application/json', payload='[]', created_by=self.user,
+                                              status=EquipmentImportJob.STATUS_RUNNING, started_at=started_at)
+            for started_at in (now - timedelta(seconds=61), now - timedelta(seconds=59))
+        )
+
+        self.assertIn('1 import job(s) failed by timeout of 60 seconds', self.run_worker())
+
+        stale_job.refresh_from_db()
+        self.assertEqual(stale_job.status, EquipmentImportJob.STATUS_FAILED)
+        self.assertIn('not finished in 60 seconds', stale_job.error)
+        self.assertIsNotNone(stale_job.finished_at)
+        running_job.refresh_from_db()
+        self.assertEqual(running_job.status, EquipmentImportJob.STATUS_RUNNING)
+
+
+class EquipmentCursorPaginationTestCase(EquipmentTestCase):
+    """
+        Курсорная пагинация списка оборудования (GET /api/equipment?cursor=)
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': f'0QABCD{chr(ord("A") + i)}1FG'}
+            for i in range(self.page_size + 3)
+        ])
+        self.assertEqual(data['retExtInfo']['saved'], self.page_size + 3)
+
+    def get_page(self, cursor: str) -> dict:
+        response = self.client.get('/api/equipment', {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_next_cursor(self):
+        first_page = self.get_page('')
+        self.assertEqual(len(first_page['result']), self.page_size)
+        self.assertNotIn('count_items', first_page['retExtInfo'])
+        self.assertIsNone(first_page['retExtInfo']['previous_cursor'])
+
+        # Оборудование, добавленное после чтения первой страницы, попадает на следующую
+        self.create_equipments({'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDZ1FG'})
+        last_page = self.get_page(first_page['retExtInfo']['next_cursor'])
+        self.assertEqual(len(last_page['result']), 4)
+        self.assertIsNone(last_page['retExtInfo']['next_cursor'])
+        self.assertIsNotNone(last_page['retExtInfo']['previous_cursor'])
+
+        ids = [equipment['id'] for equipment in first_page['result'] + last_page['result']]
+        self.assertEqual(ids, list(Equipment.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/equipment', {'cursor': 'invalid'}).status_code, 404)
+
+
+@override_settings(COUNT_ESTIMATE_CAP=2)
+class EquipmentCountTestCase(EquipmentTestCase):
+    """
+        Количество оборудования в списке (count_items): точное (кэшируется до изменения данных) и оценочное
+        (?count=estimated, без статистики таблицы - подсчет до COUNT_ESTIMATE_CAP)
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': serial_number, 'description': description}
+            for serial_number, description in (('0QABCDE1FG', 'core'), ('0QABCDF1FG', 'core'), ('0QABCDG1FG', 'edge'))
+        ])
+
+    def get_count(self, **params) -> tuple:
+        response = self.client.get('/api/equipment', params)
+        self.assertEqual(response.status_code, 200)
+        info = response.json()['retExtInfo']
+        return info['count_items'], info['is_count_exact']
+
+    def test_exact_count(self):
+        self.assertEqual(self.get_count(), (3, True))
+
+        # Изменение в обход сервисов не видно до смены версии данных, изменение через API - видно сразу
+        Equipment.objects.create(equipment_type=self.equipment_type, serial_number='0QABCDH1FG', description='core')
+        self.assertEqual(self.get_count(), (3, True))
+        self.create_equipments({'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDI1FG'})
+        self.assertEqual(self.get_count(), (5, True))
+        self.assertEqual(self.get_count(description='core'), (3, True))
+
+    def test_estimated_count(self):
+        self.assertEqual(self.get_count(count='estimated'), (2, False))
+        self.assertEqual(self.get_count(count='estimated', description='core'), (2, True))
+        self.assertEqual(self.get_count(count='estimated', description='edge'), (1, True))
+        self.assertEqual(self.get_count(count='exact'), (3, True))
+
+
+class EquipmentSerialNumberFilterTestCase(EquipmentTestCase):
+    """
+        Фильтр serial_number списка оборудования (вхождение через индекс триграмм серийных номеров)
+    """
+
+    def setUp(self):
+        super().setUp()
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'},
+            {'equipment_type': self.equipment_type.id, 'serial_number': '0QCDEAB1FG'},
+        ])
+        self.ids = [equipment['id'] for equipment in data['result']]
+
+    def filter(self, value) -> list:
+        response = self.client.get('/api/equipment', {'serial_number': value})
+        self.assertEqual(response.status_code, 200)
+        return [equipment['serial_number'] for equipment in response.json()['result']]
+
+    def test_fragment(self):
+        self.assertEqual(self.filter('bcde'), ['0QABCDE1FG'])
+        self.assertEqual(self.filter('CDE'), ['0QABCDE1FG', '0QCDEAB1FG'])
+        self.assertEqual(self.filter('0QABCDE1FG'), ['0QABCDE1FG'])
+        self.assertEqual(self.filter('qcdeab'), ['0QCDEAB1FG'])
+        self.assertEqual(self.filter('ABCDEAB'), [])
+        # Короче триграммы - поиск без индекса
+        self.assertEqual(self.filter('AB'), ['0QABCDE1FG', '0QCDEAB1FG'])
+
+    def test_updated_serial_number(self):
+        response = self.client.put(f'/api/equipment/{self.ids[0]}', {'serial_number': '0QXYZDE1FG'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.filter('ABCD'), [])
+        self.assertEqual(self.filter('xyzd'), ['0QXYZDE1FG'])
+
+
+class EquipmentDetailsCacheTestCase(EquipmentTestCase):
+    """
+        Кэш детальной информации по оборудованию (GET /api/equipment/{id}): сброс при изменении, удалении
+        (архивации) оборудования и переименовании типа
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.equipment = Equipment.objects.create(equipment_type=self.equipment_type, serial_number='0QABCDE1FG',
+                                                  description='initial')
+        self.assertEqual(self.get_details()['description'], 'initial')
+        # Изменение в обход сервисов не видно: детальная информация читается из кэша
+        Equipment.objects.filter(pk=self.equipment.pk).update(description='bypassed')
+        self.assertEqual(self.get_details()['description'], 'initial')
+
+    def get_details(self, status_code: int = 200) -> dict:
+        response = self.client.get(f'/api/equipment/{self.equipment.id}')
+        self.assertEqual(response.status_code, status_code)
+        return response.json().get('result')
+
+    def test_update(self):
+        response = self.client.put(f'/api/equipment/{self.equipment.id}', {'description': 'changed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get_details()['description'], 'changed')
+
+    def test_archive(self):
+        self.assertEqual(self.client.delete(f'/api/equipment/{self.equipment.id}').status_code, 200)
+
+        self.get_details(status_code=404)
+
+    def test_rename_equipment_type(self):
+        response = self.client.put(f'/api/equipment-type/{self.equipment_type.id}', {'name': 'TP-Link 2'},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+
+        details = self.get_details()
+        self.assertEqual((details['equipment_type_name'], details['description']), ('TP-Link 2', 'bypassed'))
+
+
+class EquipmentConditionalGetTestCase(EquipmentTestCase):
+    """
+        Условные GET-запросы списка и детальной информации по оборудованию (ETag, If-None-Match)
+    """
+
+    def setUp(self):
+        super().setUp()
+        data = self.create_equipments({'equipment_type': self.equipment_type.id, 'serial_number': '0QABCDE1FG'})
+        self.equipment_id = data['result'][0]['id']
+
+    def test_not_modified(self):
+        for path in ('/api/equipment', f'/api/equipment/{self.equipment_id}'):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-cache', response['Cache-Control'])
+
+            not_modified = self.client.get(path, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual((not_modified.status_code, not_modified.content), (304, b''))
+            self.assertEqual(not_modified['ETag'], response['ETag'])
+
+    def test_modified(self):
+        etag = self.client.get('/api/equipment')['ETag']
+        # ETag зависит от параметров запроса
+        self.assertEqual(self.client.get('/api/equipment', {'page': 1}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        response = self.client.put(f'/api/equipment/{self.equipment_id}', {'description': 'changed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/api/equipment', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['result'][0]['description'], 'changed')
+
+
+class CachedJWTAuthenticationTestCase(EquipmentTestCase):
+    """
+        Аутентификация по JWT со снимком пользователя в кэше: сброс снимка при сохранении пользователя
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.jwt_client = APIClient()
+        self.jwt_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.assertEqual(self.jwt_client.get('/api/equipment').status_code, 200)
+
+    def test_deactivated_user(self):
+        # Изменение в обход модели учитывается по истечении срока хранения снимка
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.jwt_client.get('/api/equipment').status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.jwt_client.get('/api/equipment')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'user_inactive')
+
+    def test_deleted_user(self):
+        self.user.delete()
+
+        response = self.jwt_client.get('/api/equipment')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'user_not_found')
+
+
+class BulkUpdateEquipmentTestCase(EquipmentTestCase):
+    """
+        Пакетное изменение оборудования (PUT /api/equipment): сохранение корректных изменений и отчет об ошибках
+    """
+
+    def setUp(self):
+        super().setUp()
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': serial_number}
+            for serial_number in ('0QABCDE1FG', '0QABCDF1FG', '0QABCDG1FG', '0QABCDH1FG', '0QABCDI1FG')
+        ])
+        self.ids = [equipment['id'] for equipment in data['result']]
+
+    def test_partial_failure(self):
+        first, second, third, fourth, fifth = self.ids
+        response = self.client.put('/api/equipment', [
+            {'id': first, 'description': 'changed'},
+            {'id': max(self.ids) + 1, 'description': 'not found'},
+            {'id': first, 'description': 'repeated'},
+            {'id': second, 'serial_number': 'invalid'},
+            {'id': third, 'serial_number': '0QABCDH1FG'},
+            {'id': fifth, 'serial_number': '0QABCDZ1FG'},
+            {'id': fourth, 'serial_number': '0QABCDZ1FG'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual(data['retMsg'], 'There are some errors')
+        info = data['retExtInfo']
+        self.assertEqual((info['count'], info['saved'], info['failed']), (7, 2, 5))
+        errors = {error['index']: error['error'] for error in info['errors']}
+        self.assertEqual(list(errors), [1, 2, 3, 4, 6])
+        for i, text in ((1, 'was not found'), (2, 'is repeated in input set (index 0)'),
+                        (3, 'does not match'), (4, 'must make a unique set'), (6, 'must make a unique set')):
+            self.assertIn(text, errors[i])
+        self.assertEqual([equipment['id'] for equipment in data['result']], [first, fifth])
+
+        self.assertEqual(list(Equipment.objects.order_by('id').values_list('serial_number', 'description')), [
+            ('0QABCDE1FG', 'changed'), ('0QABCDF1FG', None), ('0QABCDG1FG', None), ('0QABCDH1FG', None),
+            ('0QABCDZ1FG', None)
+        ])
+
+
+@override_settings(BULK_ARCHIVE_CHUNK_SIZE=2)
+class BulkArchiveEquipmentTestCase(EquipmentTestCase):
+    """
+        Пакетная архивация оборудования (POST /api/equipment/archive) по ключам и фильтрам списка
+    """
+
+    def setUp(self):
+        super().setUp()
+        data = self.create_equipments([
+            {'equipment_type': self.equipment_type.id, 'serial_number': serial_number, 'description': description}
+            for serial_number, description in (('0QABCDE1FG', 'core'), ('0QABCDF1FG', 'edge'), ('0QABCDG1FG', 'core'),
+                                               ('0QABCDH1FG', 'core'))
+        ])
+        self.ids = [equipment['id'] for equipment in data['result']]
+
+    def archive(self, data: dict, query: str = '', status_code: int = 200) -> dict:
+        response = self.client.post(f'/api/equipment/archive?{query}', data, format='json')
+        self.assertEqual(response.status_code, status_code)
+        return response.json()
+
+    def get_serial_numbers(self, **params) -> list:
+        response = self.client.get('/api/equipment', params)
+        self.assertEqual(response.status_code, 200)
+        return [equipment['serial_number'] for equipment in response.json()['result']]
+
+    def test_archive_by_filter(self):
+        # Количество в кэше сбрасывается архивацией
+        self.get_serial_numbers()
+        self.assertEqual(self.archive({}, 'description=core')['retExtInfo'], {'count': 3})
+
+        self.assertEqual(self.get_serial_numbers(), ['0QABCDF1FG'])
+        self.assertEqual(self.get_serial_numbers(q='core'), [])
+        self.assertEqual(Equipment.objects.filter(is_archived=True, updated_by=self.user).count(), 3)
+        self.assertEqual(self.archive({}, 'description=core')['retExtInfo'], {'count': 0})
+
+    def test_archive_by_ids_and_filter(self):
+        self.assertEqual(self.archive({'ids': self.ids[:2]}, 'description=core')['retExtInfo'], {'count': 1})
+
+        self.assertEqual(self.get_serial_numbers(), ['0QABCDF1FG', '0QABCDG1FG', '0QABCDH1FG'])
+
+    def test_no_ids_and_filters(self):
+        self.archive({}, 'page=1', status_code=400)
+
+        self.assertEqual(Equipment.objects.filter(is_archived=True).count(), 0)
+
+
+class FakeConnection:
+    """
+        Соединение драйвера БД для тестов пула (ping - по признаку is_alive)
+    """
+
+    def __init__(self, params: dict):
+        self.params = params
+        self.is_alive = True
+        self.is_closed = False
+
+    def ping(self):
+        if not self.is_alive:
+            raise ConnectionError('Connection is lost')
+
+    def close(self):
+        self.is_closed = True
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    """
+        Пул соединений с БД (ConnectionPool): повторное использование, проверка и переоткрытие соединений, ожидание
+    """
+    params = {'host': 'db', 'database': 'equipment'}
+
+    def acquire(self, pool: ConnectionPool, params: dict = None) -> PooledConnection:
+        return pool.acquire(params or self.params, FakeConnection, lambda connection: connection.ping(), TimeoutError)
+
+    def test_reuse(self):
+        pool = ConnectionPool('default', size=2, timeout=1, recycle=3600, ping_interval=30)
+        first = self.acquire(pool)
+        pool.release(first)
+
+        second = self.acquire(pool)
+        self.assertIs(second, first)
+        self.assertTrue(second.is_reused)
+        self.assertEqual({name: pool.stats()[name] for name in ('open', 'in_use', 'connects', 'reuses')},
+                         {'open': 1, 'in_use': 1, 'connects': 1, 'reuses': 1})
+
+    def test_health_check(self):
+        pool = ConnectionPool('default', size=1, timeout=1, recycle=3600, ping_interval=0)
+        pooled = self.acquire(pool)
+        pool.release(pooled)
+        self.assertIs(self.acquire(pool), pooled)
+        pool.release(pooled)
+
+        # Соединение не отвечает - переоткрывается
+        pooled.connection.is_alive = False
+        reopened = self.acquire(pool)
+        self.assertIsNot(reopened, pooled)
+        self.assertTrue(pooled.connection.is_closed)
+        stats = pool.stats()
+        self.assertEqual((stats['open'], stats['connects'], stats['health_check_failures']), (1, 2, 1))
+
+    def test_recycle(self):
+        pool = ConnectionPool('default', size=1, timeout=1, recycle=3600, ping_interval=30)
+        pooled = self.acquire(pool)
+        pool.release(pooled)
+
+        # Соединение с другими параметрами переоткрывается
+        reopened = self.acquire(pool, {**self.params, 'database': 'test_equipment'})
+        self.assertEqual(reopened.connection.params['database'], 'test_equipment')
+        self.assertTrue(pooled.connection.is_closed)
+        self.assertEqual(pool.stats()['recycles'], 1)
+
+    def test_exhausted(self):
+        pool = ConnectionPool('default', size=1, timeout=0.01, recycle=3600, ping_interval=30)
+        pooled = self.acquire(pool)
+
+        with self.assertRaises(TimeoutError):
+            self.acquire(pool)
+        self.assertEqual((pool.stats()['waits'], pool.stats()['timeouts']), (1, 1))
+
+        # Закрытое соединение освобождает место в пуле
+        pool.release(pooled, discard=True)
+        self.assertTrue(pooled.connection.is_closed)
+        self.assertIsNot(self.acquire(pool), pooled)
+
+
+@modify_settings(MIDDLEWARE={'prepend': 'backend.metrics.MetricsMiddleware'})
+class MetricsTestCase(EquipmentTestCase):
+    """
+        Метрики запросов: доступ к GET /metrics по METRICS_ALLOWED_IPS и заголовок Server-Timing
+        (маршрут /metrics есть только при METRICS_ENABLED - контроллер вызывается напрямую)
+    """
+
+    def get_metrics(self, remote_addr: str):
+        return metrics(RequestFactory().get('/metrics', REMOTE_ADDR=remote_addr))
+
+    def test_allowed_ips(self):
+        self.assertEqual(self.client.get('/api/equipment').status_code, 200)
+
+        response = self.get_metrics('127.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('route="equipment-list",action="list",method="GET",status="200"', response.content.decode())
+        self.assertEqual(self.get_metrics('10.1.2.3').status_code, 403)
+        self.assertEqual(self.get_metrics('').status_code, 403)
+
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8']):
+            self.assertEqual(self.get_metrics('10.1.2.3').status_code, 200)
+            self.assertEqual(self.get_metrics('127.0.0.1').status_code, 403)
+
+    def test_server_timing(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/equipment'))
+
+        with override_settings(METRICS_SERVER_TIMING=True):
+            response = self.client.get('/api/equipment')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[0-9.]+;desc="[0-9]+ queries", .*total;dur=[0-9.]+$')
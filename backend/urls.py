@@ -1,20 +1,51 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, re_path, include
 
-from backend.routers import EquipmentRouter, EquipmentTypeRouter, UserRouter
+from backend.async_views import EquipmentListAsyncView, EquipmentDetailsAsyncView, EquipmentTypeListAsyncView
+from backend.routers import EquipmentRouter, EquipmentTypeRouter, UserRouter, EquipmentImportJobRouter
 from backend.views import EquipmentTypeViewSet, EquipmentViewSet, UserRegisterViewSet, \
-    EquipmentCustomTokenObtainPairView, EquipmentCustomTokenRefreshView
+    EquipmentCustomTokenObtainPairView, EquipmentCustomTokenRefreshView, EquipmentImportJobViewSet, metrics
 
 equipment_router = EquipmentRouter()
 equipment_router.register(r'equipment', EquipmentViewSet)
 equipment_type_router = EquipmentTypeRouter()
 equipment_type_router.register(r'equipment-type', EquipmentTypeViewSet)
+equipment_import_job_router = EquipmentImportJobRouter()
+equipment_import_job_router.register(r'equipment-import', EquipmentImportJobViewSet)
 user_router = UserRouter()
 user_router.register(r'user', UserRegisterViewSet)
 
+
+def get_route_view(router, name: str):
+    """
+        Контроллер маршрута роутера по имени маршрута
+    """
+    return next(url.callback for url in router.urls if url.name == name)
+
+
 urlpatterns = [
     path('api/', include(equipment_router.urls)),
     path('api/', include(equipment_type_router.urls)),
+    path('api/', include(equipment_import_job_router.urls)),
     path('api/', include(user_router.urls)),
     path("api/user/login", EquipmentCustomTokenObtainPairView.as_view(), name="token"),
     path("api/user/refresh_token", EquipmentCustomTokenRefreshView.as_view(), name="refresh_token"),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    # Async-контроллеры чтения (для ASGI) - перед маршрутами роутеров, остальные запросы они передают контроллерам DRF
+    urlpatterns = [
+        path('api/equipment',
+             EquipmentListAsyncView.as_view(delegate=get_route_view(equipment_router, 'equipment-list')),
+             name='equipment-list'),
+        re_path(r'^api/equipment/(?P<pk>[0-9]+)$',
+                EquipmentDetailsAsyncView.as_view(delegate=get_route_view(equipment_router, 'equipment-detail')),
+                name='equipment-detail'),
+        path('api/equipment-type',
+             EquipmentTypeListAsyncView.as_view(delegate=get_route_view(equipment_type_router, 'equipmenttype-list')),
+             name='equipmenttype-list'),
+    ] + urlpatterns
+
+if settings.METRICS_ENABLED:
+    # Метрики процесса для Prometheus
+    urlpatterns.append(path('metrics', metrics, name='metrics'))
@@ -6,7 +6,11 @@
     Схемы запросов и ответов посредством сериализаторов
 """
 from django.contrib.auth.models import User
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_GET
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.request import Request
@@ -14,17 +18,35 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from backend.filters import EquipmentTypeFilter, EquipmentFilter
+from backend.conditional import conditional_get, equipment_validators
+from backend.dictionary import equipment_type_dictionary, equipment_type_validators
+from backend.exports import EXPORT_FORMAT_QUERY_PARAM, EXPORT_FORMATS, EXPORT_FORMAT_NDJSON
+from backend.filters import EquipmentTypeFilter, EquipmentFilter, ArchivedEquipmentFilter
 from backend.helpers import expand_dict
-from backend.models import Equipment, EquipmentType
-from backend.permissions import EquipmentTypePermission, EquipmentPermission
+from backend.metrics import METRICS_CONTENT_TYPE, render_metrics, is_metrics_client
+from backend.models import Equipment, EquipmentType, EquipmentImportJob
+from backend.parsers import NDJSON_MEDIA_TYPE
+from backend.permissions import EquipmentTypePermission, EquipmentPermission, EquipmentImportJobPermission
 from backend.serializers import EquipmentSerializer, EquipmentTypeSerializer, EquipmentTypeListSerializer, \
     EquipmentListSerializer, simple_responses, EquipmentTypeCreateUpdateSerializer, EquipmentDetailsSerializer, \
     EquipmentRequestSerializer, EquipmentTypeRequestSerializer, EquipmentUpdateSerializer, EquipmentCreateSerializer, \
-    EquipmentDeleteSerializer, UserRegisterSerializer, UserSerializer, UserCreateSerializer, UserDetailsSerializer
+    EquipmentDeleteSerializer, UserRegisterSerializer, UserSerializer, UserCreateSerializer, UserDetailsSerializer, \
+    EquipmentImportJobSerializer, EquipmentImportJobDetailsSerializer, EquipmentImportJobErrorListSerializer, \
+    EquipmentBulkUpdateRequestSerializer, EquipmentBulkUpdateSerializer, EquipmentBulkArchiveRequestSerializer, \
+    EquipmentBulkArchiveSerializer, EquipmentBulkRestoreSerializer
 from backend.services import GetEquipmentTypeListService, GetEquipmentListService, CreateEquipmentTypeService, \
     UpdateEquipmentTypeService, GetEquipmentDetailsService, UpdateEquipmentService, CreateEquipmentService, \
-    DeleteEquipmentService, CreateUserService, GetUserDetailsService
+    DeleteEquipmentService, CreateUserService, GetUserDetailsService, ExportEquipmentService, \
+    CREATE_RESPONSE_QUERY_PARAM, CREATE_RESPONSE_FULL, CREATE_RESPONSE_COMPACT, CreateEquipmentImportJobService, \
+    GetEquipmentImportJobService, GetEquipmentImportJobErrorsService, FIELDS_QUERY_PARAM, BulkUpdateEquipmentService, \
+    BulkArchiveEquipmentService, BulkRestoreEquipmentService
+
+# Параметр полей схемы оборудования (список, детальная информация, выгрузка)
+fields_parameter = OpenApiParameter(
+    FIELDS_QUERY_PARAM, OpenApiTypes.STR, OpenApiParameter.QUERY,
+    description=f'Comma-separated fields of equipment to return (all by default): '
+                f'{", ".join(EquipmentSerializer.Meta.fields)}.'
+)
 
 
 @extend_schema(tags=['Type of equipment'])
@@ -43,12 +65,18 @@ class EquipmentTypeViewSet(ModelViewSet):
         description='Retrieve paginated and filtered list of type of equipments, bla-bla-bla...',
         responses=expand_dict({status.HTTP_200_OK: EquipmentTypeListSerializer, }, simple_responses),
     )
+    @method_decorator(conditional_get(equipment_type_validators))
     def list(self, request: Request, *args, **kwargs):
         """
             Получение пагинированого и отфильтрованного списка типов оборудования
         """
+        if equipment_type_dictionary.is_dictionary_request(request):
+            entry = equipment_type_dictionary.get(
+                lambda: GetEquipmentTypeListService.execute(request, self, *args, **kwargs)
+            )
+            return equipment_type_dictionary.get_response(request, entry)
         equipment_type_list = GetEquipmentTypeListService.execute(request, self, *args, **kwargs)
-        return Response(equipment_type_list.data)
+        return Response(equipment_type_list)
 
     @extend_schema(
         summary='Create type of equipments (administrator only permission)',
@@ -61,7 +89,7 @@ class EquipmentTypeViewSet(ModelViewSet):
             Создание типа оборудования
         """
         equipment_type_create = CreateEquipmentTypeService.execute(request, self, *args, **kwargs)
-        return Response(equipment_type_create.data)
+        return Response(equipment_type_create)
 
     @extend_schema(
         summary='Update type of equipments (administrator only permission)',
@@ -74,7 +102,7 @@ class EquipmentTypeViewSet(ModelViewSet):
             Изменения типа оборудования
         """
         equipment_type_update = UpdateEquipmentTypeService.execute(request, self, *args, **kwargs)
-        return Response(equipment_type_update.data)
+        return Response(equipment_type_update)
 
 
 @extend_schema(tags=['Equipment'])
@@ -84,26 +112,68 @@ class EquipmentViewSet(ModelViewSet):
     """
 
     permission_classes = (EquipmentPermission, )
-    queryset = Equipment.objects.select_related('equipment_type').filter(is_archived=False)
+    queryset = Equipment.objects.filter(is_archived=False)
     serializer_class = EquipmentSerializer
     filterset_class = EquipmentFilter
 
+    def perform_content_negotiation(self, request, force=False):
+        # Выгрузка формирует поток сама (NDJSON/CSV): заголовок Accept клиента не должен приводить к 406
+        return super().perform_content_negotiation(request, force=force or self.action == 'export')
+
     @extend_schema(
         summary='Retrieve paginated and filtered list of equipments',
-        description='Retrieve paginated and filtered list of equipments, bla-bla-bla...',
+        description='Retrieve paginated and filtered list of equipments, bla-bla-bla... '
+                    'Pass the cursor parameter (empty for the first page) to switch to cursor pagination, '
+                    'then the response is EquipmentCursorListSerializer.',
+        parameters=[
+            OpenApiParameter('cursor', OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description='Cursor of page (next_cursor or previous_cursor from retExtInfo).'),
+            fields_parameter,
+        ],
         responses=expand_dict({status.HTTP_200_OK: EquipmentListSerializer, }, simple_responses),
     )
+    @method_decorator(conditional_get(equipment_validators))
     def list(self, request, *args, **kwargs):
         """
             Получение пагинированого и отфильтрованного списка оборудования
         """
         equipment_list = GetEquipmentListService.execute(request, self, *args, **kwargs)
-        return Response(equipment_list.initial_data)
+        return Response(equipment_list)
+
+    @extend_schema(
+        summary='Export filtered list of equipments',
+        description='Stream the whole filtered list of equipments (without pagination) as NDJSON '
+                    '(one equipment per line) or CSV (with header), bla-bla-bla...',
+        parameters=[
+            OpenApiParameter(EXPORT_FORMAT_QUERY_PARAM, OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             enum=EXPORT_FORMATS, default=EXPORT_FORMAT_NDJSON,
+                             description='Format of export.'),
+            fields_parameter,
+        ],
+        responses=expand_dict({status.HTTP_200_OK: OpenApiTypes.BINARY, }, simple_responses),
+    )
+    def export(self, request, *args, **kwargs):
+        """
+            Потоковая выгрузка отфильтрованного списка оборудования
+        """
+        return ExportEquipmentService.execute(request, self, *args, **kwargs)
 
     @extend_schema(
         summary='Create equipment',
-        description='Create equipment, bla-bla-bla...',
-        request=EquipmentRequestSerializer(many=True),
+        description='Create equipment, bla-bla-bla... '
+                    'The body is a JSON array (or a single object) or NDJSON (application/x-ndjson, one equipment '
+                    'per line); large bodies are parsed and saved in batches. '
+                    'Pass response=compact to get only counts and indexes of failed items, '
+                    'then the response is EquipmentCreateCompactSerializer.',
+        parameters=[
+            OpenApiParameter(CREATE_RESPONSE_QUERY_PARAM, OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             enum=[CREATE_RESPONSE_FULL, CREATE_RESPONSE_COMPACT], default=CREATE_RESPONSE_FULL,
+                             description='Mode of response.'),
+        ],
+        request={
+            'application/json': EquipmentRequestSerializer(many=True),
+            NDJSON_MEDIA_TYPE: EquipmentRequestSerializer,
+        },
         responses=expand_dict({status.HTTP_200_OK: EquipmentCreateSerializer, }, simple_responses),
     )
     def create(self, request, *args, **kwargs):
@@ -111,19 +181,86 @@ class EquipmentViewSet(ModelViewSet):
             Создание оборудования
         """
         equipment_create = CreateEquipmentService.execute(request, self, *args, **kwargs)
-        return Response(equipment_create.initial_data)
+        return Response(equipment_create)
+
+    @extend_schema(
+        summary='Update equipments in bulk',
+        description='Update equipments in bulk, bla-bla-bla... '
+                    'The body is a JSON array (or a single object) or NDJSON (application/x-ndjson, one item per '
+                    'line) of id of equipment and fields to change; large bodies are parsed and saved in batches. '
+                    'Only changed fields are written. Errors are reported by indexes of items as in creation of '
+                    'equipment. Pass response=compact to get only counts and indexes of failed items.',
+        parameters=[
+            OpenApiParameter(CREATE_RESPONSE_QUERY_PARAM, OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             enum=[CREATE_RESPONSE_FULL, CREATE_RESPONSE_COMPACT], default=CREATE_RESPONSE_FULL,
+                             description='Mode of response.'),
+        ],
+        request={
+            'application/json': EquipmentBulkUpdateRequestSerializer(many=True),
+            NDJSON_MEDIA_TYPE: EquipmentBulkUpdateRequestSerializer,
+        },
+        responses=expand_dict({status.HTTP_200_OK: EquipmentBulkUpdateSerializer, }, simple_responses),
+    )
+    def bulk_update(self, request, *args, **kwargs):
+        """
+            Пакетное изменение оборудования
+        """
+        equipment_bulk_update = BulkUpdateEquipmentService.execute(request, self, *args, **kwargs)
+        return Response(equipment_bulk_update)
+
+    @extend_schema(
+        summary='Archive equipments in bulk',
+        description='Archive equipments in bulk by list of ids and (or) by filters of list of equipments, '
+                    'bla-bla-bla... Equipments are archived in chunks (one UPDATE per chunk), the response has '
+                    'the count of archived equipments. Either ids or at least one filter is required.',
+        parameters=[
+            OpenApiParameter(name, OpenApiTypes.STR, OpenApiParameter.QUERY, description=str(field.label))
+            for name, field in EquipmentFilter.base_filters.items()
+        ],
+        request=EquipmentBulkArchiveRequestSerializer,
+        responses=expand_dict({status.HTTP_200_OK: EquipmentBulkArchiveSerializer, }, simple_responses),
+    )
+    def bulk_archive(self, request, *args, **kwargs):
+        """
+            Пакетная архивация оборудования
+        """
+        equipment_bulk_archive = BulkArchiveEquipmentService.execute(request, self, *args, **kwargs)
+        return Response(equipment_bulk_archive)
+
+    @extend_schema(
+        summary='Restore archived equipments in bulk',
+        description='Restore archived equipments in bulk by list of ids and (or) by filters of list of equipments '
+                    '(applied to archived equipments, including moved to the archive table), bla-bla-bla... '
+                    'The response has the count of restored equipments and the ids of equipments left in the '
+                    'archive with the reason (another equipment with the same type and serial number exists). '
+                    'Either ids or at least one filter is required.',
+        parameters=[
+            OpenApiParameter(name, OpenApiTypes.STR, OpenApiParameter.QUERY, description=str(field.label))
+            for name, field in ArchivedEquipmentFilter.base_filters.items()
+        ],
+        request=EquipmentBulkArchiveRequestSerializer,
+        responses=expand_dict({status.HTTP_200_OK: EquipmentBulkRestoreSerializer, }, simple_responses),
+    )
+    def bulk_restore(self, request, *args, **kwargs):
+        """
+            Пакетное восстановление оборудования
+        """
+        equipment_bulk_restore = BulkRestoreEquipmentService.execute(request, self, *args, **kwargs)
+        return Response(equipment_bulk_restore)
 
     @extend_schema(
         summary='Retrieve equipment details',
         description='Retrieve equipment details, bla-bla-bla...',
+        parameters=[fields_parameter, ],
         responses=expand_dict({status.HTTP_200_OK: EquipmentDetailsSerializer, }, simple_responses),
     )
+    @method_decorator(conditional_get(equipment_validators))
     def retrieve(self, request, *args, **kwargs):
         """
             Получение детальной информации по заданному оборудованию
         """
         equipment_details = GetEquipmentDetailsService.execute(request, self, *args, **kwargs)
-        return Response(equipment_details.data)
+        return Response(equipment_details)
 
     @extend_schema(
         summary='Update equipment',
@@ -136,7 +273,7 @@ class EquipmentViewSet(ModelViewSet):
             Изменение оборудования
         """
         equipment_update = UpdateEquipmentService.execute(request, self, *args, **kwargs)
-        return Response(equipment_update.data)
+        return Response(equipment_update)
 
     @extend_schema(
         summary='Delete equipment',
@@ -148,7 +285,63 @@ class EquipmentViewSet(ModelViewSet):
             Удаление оборудования
         """
         equipment_delete = DeleteEquipmentService.execute(request, self, *args, **kwargs)
-        return Response(equipment_delete.data)
+        return Response(equipment_delete)
+
+
+@extend_schema(tags=['Equipment'])
+class EquipmentImportJobViewSet(ModelViewSet):
+    """
+        Методы для заданий фоновой загрузки оборудования
+    """
+
+    permission_classes = (EquipmentImportJobPermission, )
+    queryset = EquipmentImportJob.objects.all()
+    serializer_class = EquipmentImportJobSerializer
+
+    @extend_schema(
+        summary='Submit background import of equipments',
+        description='Queue the payload (JSON array or NDJSON, as for POST /api/equipment) for background import '
+                    'by the import worker, bla-bla-bla...',
+        request={
+            'application/json': EquipmentRequestSerializer(many=True),
+            NDJSON_MEDIA_TYPE: EquipmentRequestSerializer,
+        },
+        responses=expand_dict({status.HTTP_200_OK: EquipmentImportJobDetailsSerializer, }, simple_responses),
+    )
+    def create(self, request, *args, **kwargs):
+        """
+            Постановка задания фоновой загрузки оборудования
+        """
+        import_job_create = CreateEquipmentImportJobService.execute(request, self, *args, **kwargs)
+        return Response(import_job_create)
+
+    @extend_schema(
+        summary='Retrieve status and progress of background import of equipments',
+        description='Retrieve status and progress of background import of equipments, bla-bla-bla...',
+        responses=expand_dict({status.HTTP_200_OK: EquipmentImportJobDetailsSerializer, }, simple_responses),
+    )
+    def retrieve(self, request, *args, **kwargs):
+        """
+            Получение состояния задания фоновой загрузки оборудования
+        """
+        import_job_details = GetEquipmentImportJobService.execute(request, self, *args, **kwargs)
+        return Response(import_job_details)
+
+    @extend_schema(
+        summary='Retrieve errors of background import of equipments',
+        description='Retrieve failed items of background import of equipments (by index of item), bla-bla-bla...',
+        parameters=[
+            OpenApiParameter('cursor', OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description='Cursor of page (next_cursor or previous_cursor from retExtInfo).'),
+        ],
+        responses=expand_dict({status.HTTP_200_OK: EquipmentImportJobErrorListSerializer, }, simple_responses),
+    )
+    def errors(self, request, *args, **kwargs):
+        """
+            Получение ошибок задания фоновой загрузки оборудования
+        """
+        import_job_errors = GetEquipmentImportJobErrorsService.execute(request, self, *args, **kwargs)
+        return Response(import_job_errors)
 
 
 @extend_schema(tags=['Auth'])
@@ -196,7 +389,7 @@ class UserRegisterViewSet(ModelViewSet):
             Регистрация пользователя
         """
         user_create = CreateUserService.execute(request, self, *args, **kwargs)
-        return Response(user_create.data)
+        return Response(user_create)
 
     @extend_schema(
         summary='Retrieve user profile',
@@ -208,4 +401,14 @@ class UserRegisterViewSet(ModelViewSet):
             Получение профиля пользователя
         """
         user_details = GetUserDetailsService.execute(request, self, *args, **kwargs)
-        return Response({"user": user_details.data})
+        return Response({"user": user_details})
+
+
+@require_GET
+def metrics(request):
+    """
+        Метрики процесса в формате Prometheus (GET /metrics, при METRICS_ENABLED, для адресов METRICS_ALLOWED_IPS)
+    """
+    if not is_metrics_client(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
@@ -33,6 +33,8 @@ DATABASE_PORT: str = os.environ.get('DATABASE_PORT', '3306')
 DATABASE_NAME: str = os.environ.get('DATABASE_NAME', 'equipment')
 DATABASE_USER: str = os.environ.get('DATABASE_USER', 'equipment')
 DATABASE_PASSWORD: str = os.environ.get('DATABASE_PASSWORD', '')
+# Comma-separated host[:port] of read replicas of the database (same name, user and password), empty - no replicas
+DATABASE_REPLICA_HOSTS: str = os.environ.get('DATABASE_REPLICA_HOSTS', '')
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -67,6 +69,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.replicas.ReplicaStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'equipment.urls'
@@ -93,9 +96,23 @@ WSGI_APPLICATION = 'equipment.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connection pool per worker process and database alias (engine backend.db.mysql, see backend/db/pool.py). A connection
+# is returned to the pool at the end of every request (CONN_MAX_AGE=0) and reused by the next one without a new
+# handshake and session setup. At most DATABASE_POOL_SIZE connections per alias (keep workers * DATABASE_POOL_SIZE
+# below MySQL max_connections), a request waits up to DATABASE_POOL_TIMEOUT seconds for a free one. A connection idle
+# for more than DATABASE_POOL_PING_INTERVAL seconds is pinged before reuse, one older than DATABASE_POOL_RECYCLE
+# seconds is reopened (keep it below MySQL wait_timeout). DATABASE_POOL_SIZE=0 - no pool, persistent connections per
+# thread with health checks
+DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 10))
+DATABASE_POOL_TIMEOUT = float(os.environ.get('DATABASE_POOL_TIMEOUT', 10))
+DATABASE_POOL_RECYCLE = int(os.environ.get('DATABASE_POOL_RECYCLE', 3600))
+DATABASE_POOL_PING_INTERVAL = int(os.environ.get('DATABASE_POOL_PING_INTERVAL', 30))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'backend.db.mysql' if DATABASE_POOL_SIZE > 0 else 'django.db.backends.mysql',
+        'CONN_MAX_AGE': 0 if DATABASE_POOL_SIZE > 0 else DATABASE_POOL_RECYCLE,
+        'CONN_HEALTH_CHECKS': DATABASE_POOL_SIZE <= 0,
         'NAME': DATABASE_NAME,
         'USER': DATABASE_USER,
         'PASSWORD': DATABASE_PASSWORD,
@@ -107,6 +124,41 @@ DATABASES = {
     }
 }
 
+# Read replicas (aliases replica1, replica2, ...). The list, details and export of equipment are read from a random
+# replica, everything else uses the default (primary) database; after a write the user reads from the primary for
+# DATABASE_REPLICA_STICKY_TIMEOUT seconds (read-your-writes, kept in CACHES). To try it locally point a replica
+# to the primary itself (DATABASE_REPLICA_HOSTS=127.0.0.1)
+for replica_number, replica_host in enumerate(filter(None, map(str.strip, DATABASE_REPLICA_HOSTS.split(','))), 1):
+    replica_host, _, replica_port = replica_host.partition(':')
+    DATABASES[f'replica{replica_number}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASE_PORT,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['backend.replicas.ReplicaRouter']
+DATABASE_REPLICA_STICKY_TIMEOUT = int(os.environ.get('DATABASE_REPLICA_STICKY_TIMEOUT', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory by default (per process). When running several workers set a shared backend, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and CACHE_LOCATION=redis://127.0.0.1:6379
+
+CACHE_BACKEND: str = os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHE_LOCATION: str = os.environ.get('CACHE_LOCATION', '')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION,
+    }
+}
+if CACHE_BACKEND in ('django.core.cache.backends.locmem.LocMemCache',
+                     'django.core.cache.backends.filebased.FileBasedCache'):
+    # These backends keep only 300 entries by default
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))}
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -161,12 +213,19 @@ CORS_ORIGIN_WHITELIST = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'backend.renderers.FastJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 
+    'DEFAULT_PARSER_CLASSES': [
+        'backend.parsers.FastJSONParser',
+        'backend.parsers.NDJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "backend.authentication.CachedJWTAuthentication",
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -185,6 +244,69 @@ REST_FRAMEWORK = {
     'DEFAULT_METADATA_CLASS': 'rest_framework.metadata.SimpleMetadata',
 }
 
+# Size of batch for bulk creating of equipment (one bulk INSERT and one uniqueness SELECT per batch)
+BULK_CREATE_BATCH_SIZE = int(os.environ.get('BULK_CREATE_BATCH_SIZE', 1000))
+
+# Size of chunk for bulk archiving and restoring of equipment (one SELECT of ids and one UPDATE per chunk)
+BULK_ARCHIVE_CHUNK_SIZE = int(os.environ.get('BULK_ARCHIVE_CHUNK_SIZE', 1000))
+
+# Size of chunk (one transaction) and pause (seconds) when there is nothing to move of the archive mover
+# (manage.py run_archive_mover), which moves archived equipment to the archive table
+ARCHIVE_MOVER_CHUNK_SIZE = int(os.environ.get('ARCHIVE_MOVER_CHUNK_SIZE', 1000))
+ARCHIVE_MOVER_POLL_INTERVAL = float(os.environ.get('ARCHIVE_MOVER_POLL_INTERVAL', 60))
+
+# Lifetime (seconds) of cached counts of list items and the limit of estimated count (?count=estimated).
+# Cached counts are dropped on writes through the service layer; use a shared cache backend (CACHES) when
+# running several workers
+COUNT_CACHE_TIMEOUT = int(os.environ.get('COUNT_CACHE_TIMEOUT', 300))
+COUNT_ESTIMATE_CAP = int(os.environ.get('COUNT_ESTIMATE_CAP', 10000))
+
+# Lifetime (seconds) of data versions of models in CACHES (keys of cached counts, ETag and Last-Modified of lists
+# and details). A version is changed on writes through the service layer and stamped anew when it expires: with
+# a local cache (the default) writes of other processes (workers, run_import_worker) are seen within this time
+DATA_VERSION_MAX_AGE = int(os.environ.get('DATA_VERSION_MAX_AGE', 60))
+
+# Number of rows read from the database per query by the streaming export (/api/equipment/export)
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+# Pause (seconds) of the background import worker (manage.py run_import_worker) when there are no pending jobs
+IMPORT_WORKER_POLL_INTERVAL = float(os.environ.get('IMPORT_WORKER_POLL_INTERVAL', 2))
+
+# Maximum run time (seconds) of a background import job. A job running longer (its worker was stopped in the middle
+# of it) is marked as failed by the import worker; keep it above the time of the largest import
+IMPORT_JOB_TIMEOUT = int(os.environ.get('IMPORT_JOB_TIMEOUT', 3600))
+
+# Native async views for reading lists of equipment and equipment types and equipment details (async ORM).
+# Enable when running under an ASGI server (uvicorn equipment.asgi:application); under WSGI leave it off
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Lifetime (seconds) of cached equipment details (GET /api/equipment/{id}), 0 - no caching. Cached details are dropped
+# on update and delete of equipment and on rename of equipment type through the service layer
+EQUIPMENT_DETAILS_CACHE_TIMEOUT = int(os.environ.get('EQUIPMENT_DETAILS_CACHE_TIMEOUT', 300))
+
+# Maximum age (seconds) of the in-process registry and dictionary response of equipment types. They are rebuilt when
+# equipment types are changed through the service layer; the age limit picks up changes made by other processes with
+# a local cache
+EQUIPMENT_TYPE_REGISTRY_MAX_AGE = float(os.environ.get('EQUIPMENT_TYPE_REGISTRY_MAX_AGE', 60))
+
+# Lifetime (seconds) of cached JWT authentication: verified access tokens and a snapshot of the user (id, is_staff,
+# is_active), 0 - the user is read from the database on every request. The snapshot is dropped on save and delete
+# of the user (deactivation, change of permissions or password)
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Per-request instrumentation (backend/metrics.py): number of SQL queries and time of database, service, serializer,
+# renderer and the whole request, aggregated into histograms by route and action at GET /metrics (Prometheus text
+# format, per worker process). When disabled nothing is installed: no middleware, query wrappers or endpoint
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False') == 'True'
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'backend.metrics.MetricsMiddleware')
+# Client addresses and networks (comma-separated) allowed to read GET /metrics, others get 403. REMOTE_ADDR is
+# checked: behind a reverse proxy deny /metrics at the proxy or list the address of the scraper as seen by the server
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+                       if ip.strip()]
+# Add the measurements of each request to its Server-Timing response header (visible to every client)
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', 'False') == 'True'
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Equipment API',
     'DESCRIPTION': '''
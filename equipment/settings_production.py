@@ -0,0 +1,25 @@
+"""
+Production settings for equipment project.
+
+Usage: DJANGO_SETTINGS_MODULE=equipment.settings_production
+
+Same as equipment.settings, but without debug mode and without the browsable API:
+responses are rendered only by the fast JSON renderer (orjson, with the standard json fallback).
+"""
+from equipment.settings import *  # noqa: F401,F403
+from equipment.settings import REST_FRAMEWORK
+
+DEBUG = False
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'backend.renderers.FastJSONRenderer',
+    ],
+
+    'DEFAULT_PARSER_CLASSES': [
+        'backend.parsers.FastJSONParser',
+        'backend.parsers.NDJSONParser',
+    ],
+}